@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+#
+# Full games on the list based PlayingField vs the BitBoardPlayingField and,
+# if NumPy is installed, the NumpyPlayingField.
+#
+# Every game places the same fleet and then plays a seeded sequence of
+# attacks, special attacks and moves until the fleet is sunk. All backends
+# play the very same games. The batch run attacks every field of all boards
+# through one BoardBatch.
+#
+# Usage: python bench_board.py [--games N]
+#
+
+import argparse
+import random
+import time
+import benchutil
+from playingfield import Field, Orientation, PlayingField
+from bitboard import BitBoardPlayingField
+
+try:
+    from numpyboard import NumpyPlayingField, BoardBatch
+except ImportError:
+    NumpyPlayingField = None
+
+# ship i is placed vertically in column i
+FLEET = [(i, 0, i, length - 1) for i, length in enumerate([5, 4, 4, 3, 3, 3, 2, 2, 2, 2])]
+
+
+def script(seed):
+    """
+    Return the actions of one game: every field is attacked once in random order, with a
+    special attack or a move every now and then.
+    """
+    rnd = random.Random(seed)
+    cells = [(x, y) for x in range(16) for y in range(16)]
+    rnd.shuffle(cells)
+    actions = []
+    for x, y in cells:
+        roll = rnd.random()
+        if roll < 0.05:
+            actions.append(('special', rnd.randrange(14), rnd.randrange(14)))
+        elif roll < 0.25:
+            actions.append(('move', rnd.randrange(10), rnd.choice(list(Orientation))))
+        actions.append(('attack', x, y))
+    return actions
+
+
+def play(board, actions):
+    field = board(16)
+    for x0, y0, x1, y1 in FLEET:
+        field.placeShip(Field(x0, y0), Field(x1, y1))
+
+    turns = 0
+    for action, a, b in actions:
+        turns += 1
+        if action == 'attack':
+            field.attack(Field(a, b))
+        elif action == 'special':
+            field.specialAttack(Field(a, b))
+        elif field.movePossible(a, b):
+            field.move(a, b)
+        if field.isGameOver():
+            break
+    return turns
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="playing field backend benchmark")
+    argparser.add_argument('--games', type=int, default=200)
+    args = argparser.parse_args()
+
+    scripts = [script(seed) for seed in range(args.games)]
+    results = {}
+    boards = [('list', PlayingField), ('bitboard', BitBoardPlayingField)]
+    if NumpyPlayingField is not None:
+        boards.append(('numpy', NumpyPlayingField))
+    for name, board in boards:
+        start = time.perf_counter()
+        turns = [play(board, actions) for actions in scripts]
+        elapsed = time.perf_counter() - start
+        results[name] = turns
+        print("{:10} {:6d} games  {:8d} turns  {:8.1f} games/s  {:8.2f} us/turn".format(
+            name, len(turns), sum(turns), len(turns) / elapsed, elapsed * 1e6 / sum(turns)))
+
+    # all backends have to end every game at the same turn
+    for name, board in boards:
+        assert results['list'] == results[name]
+
+    if NumpyPlayingField is not None:
+        batch(scripts)
+
+
+def batch(scripts):
+    """
+    Plays the attacks of all games at once, one BoardBatch call per turn.
+    """
+    fields = []
+    for actions in scripts:
+        field = NumpyPlayingField(16)
+        for x0, y0, x1, y1 in FLEET:
+            field.placeShip(Field(x0, y0), Field(x1, y1))
+        fields.append(field)
+
+    attacks = [[(a, b) for action, a, b in actions if action == 'attack'] for actions in scripts]
+    boards = list(range(len(scripts)))
+
+    start = time.perf_counter()
+    boardBatch = BoardBatch(fields)
+    for turn in range(len(attacks[0])):
+        boardBatch.attack(boards, [game[turn][0] for game in attacks], [game[turn][1] for game in attacks])
+    elapsed = time.perf_counter() - start
+
+    assert boardBatch.isGameOver().all()
+    total = sum(len(game) for game in attacks)
+    print("{:10} {:6d} boards {:8d} attacks  {:8.1f} games/s  {:8.2f} us/attack".format(
+        'batch', len(scripts), total, len(scripts) / elapsed, elapsed * 1e6 / total))
+
+if __name__ == '__main__':
+    main()
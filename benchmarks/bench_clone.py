@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+#
+# Copy-on-write PlayingField.clone() vs copy.deepcopy on all playing field
+# backends.
+#
+# Every backend starts from the same game in progress. "clone" only clones
+# the field, "what-if" clones it and tries one move or attack on the clone,
+# which copies whatever the clone changes, and "deepcopy" copies the whole
+# field up front like bots had to before.
+#
+# Usage: python bench_clone.py [--clones N]
+#
+
+import argparse
+import copy
+import random
+import time
+import benchutil
+from playingfield import Field, Orientation, PlayingField
+from bitboard import BitBoardPlayingField
+
+try:
+    from numpyboard import NumpyPlayingField
+except ImportError:
+    NumpyPlayingField = None
+
+# ship i is placed vertically in column i
+FLEET = [(Field(i, 0), Field(i, length - 1)) for i, length in enumerate([5, 4, 4, 3, 3, 3, 2, 2, 2, 2])]
+
+
+def game(board):
+    field = board(16)
+    field.placeFleet(FLEET)
+    rnd = random.Random(1)
+    for turn in range(80):
+        field.attack(Field(rnd.randrange(16), rnd.randrange(16)))
+    return field
+
+
+def what_if(field, i):
+    clone = field.clone()
+    shipId, direction = i % 10, list(Orientation)[i % 4]
+    if clone.movePossible(shipId, direction):
+        clone.move(shipId, direction)
+    else:
+        clone.attack(Field(i % 16, (i // 16) % 16))
+    return clone
+
+
+def bench(name, board, run, clones):
+    field = game(board)
+    start = time.perf_counter()
+    for i in range(clones):
+        run(field, i)
+    elapsed = time.perf_counter() - start
+    print("{:10} {:10} {:8d} clones  {:10.0f} clones/s  {:8.2f} us/clone".format(
+        board.__name__.replace('PlayingField', '') or 'List', name, clones, clones / elapsed,
+        elapsed * 1e6 / clones))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="playing field clone benchmark")
+    argparser.add_argument('--clones', type=int, default=100000)
+    args = argparser.parse_args()
+
+    boards = [PlayingField, BitBoardPlayingField]
+    if NumpyPlayingField is not None:
+        boards.append(NumpyPlayingField)
+    for board in boards:
+        bench('clone', board, lambda field, i: field.clone(), args.clones)
+        bench('what-if', board, what_if, args.clones)
+        bench('deepcopy', board, lambda field, i: copy.deepcopy(field), max(args.clones // 20, 1))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+#
+# Cost of publishing a lobby event with the EventBus vs calling every
+# subscriber right away, for a growing number of subscribers.
+#
+# Subscribers encode a chat report and put it into a queue like the
+# ClientHandler does. Reports the time the publisher spends per event and
+# the delivery latency the bus measured.
+#
+# Usage: python bench_events.py [--subscribers N [N ...]] [--events E]
+#
+
+import argparse
+import time
+from collections import deque
+import benchutil
+from eventbus import EventBus
+from lobby import LobbyEvent
+from messageparser import MessageParser
+
+parser = MessageParser()
+
+
+def subscriber(queue):
+    def on_chat(timestamp, player, msg):
+        queue.append(parser.encode('report', {'status': '15', 'author_id': player, 'timestamp': timestamp,
+                                              'message_content': msg}))
+    return on_chat
+
+
+def bench(subscribers, events):
+    params = {'timestamp': '0', 'player': 'someone', 'msg': 'hello'}
+    queue = deque()
+    callbacks = [subscriber(queue) for i in range(subscribers)]
+
+    start = time.perf_counter()
+    for i in range(events):
+        for cb in callbacks:
+            cb(**params)
+    direct = (time.perf_counter() - start) / events
+
+    bus = EventBus()
+    for cb in callbacks:
+        bus.subscribe(LobbyEvent.on_chat, cb)
+    start = time.perf_counter()
+    for i in range(events):
+        bus.publish(LobbyEvent.on_chat, params)
+    published = (time.perf_counter() - start) / events
+    while bus.get_stats()['queued']:
+        time.sleep(0.01)
+    stats = bus.get_stats()
+
+    print("{:6d} subscribers  direct {:9.1f} us/event  publish {:7.2f} us/event  delivery {:9.3f} ms mean".format(
+        subscribers, direct * 1e6, published * 1e6, stats['mean_ms']))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="lobby event publishing benchmark")
+    argparser.add_argument('--subscribers', type=int, nargs='+', default=[10, 100, 1000])
+    argparser.add_argument('--events', type=int, default=200)
+    args = argparser.parse_args()
+
+    for subscribers in args.subscribers:
+        bench(subscribers, args.events)
+
+if __name__ == '__main__':
+    main()
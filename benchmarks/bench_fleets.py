@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+#
+# Random fleets from the FleetGenerator vs rejection sampling through
+# PlayingField.placeShip, which retries random ships until every ship of the
+# fleet has been accepted.
+#
+# Usage: python bench_fleets.py [--fleets N] [--ruleset classic|big]
+#
+
+import argparse
+import logging
+import random
+import time
+import benchutil
+from playingfield import Field, PlayingField
+from ruleset import rulesets
+from fleetgenerator import FleetGenerator
+
+
+def rejection(ruleset, rnd):
+    """
+    Place random ships on a PlayingField until it accepts all of them.
+    """
+    n = ruleset.fieldLength
+    field = PlayingField(n, ruleset=ruleset)
+    for length in ruleset.shipLengths:
+        while True:
+            x, y = rnd.randrange(n), rnd.randrange(n)
+            dx, dy = rnd.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+            if field.placeShip(Field(x, y), Field(x + dx * (length - 1), y + dy * (length - 1)))[0] != -1:
+                break
+    return field
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="random fleet benchmark")
+    argparser.add_argument('--fleets', type=int, default=1000000)
+    argparser.add_argument('--ruleset', choices=sorted(rulesets), default='classic')
+    args = argparser.parse_args()
+    ruleset = rulesets[args.ruleset]
+
+    generator = FleetGenerator(ruleset, seed=0)
+    start = time.perf_counter()
+    for fleet in generator.fleets(args.fleets):
+        pass
+    elapsed = time.perf_counter() - start
+    print("{:10} {:8d} fleets  {:10.0f} fleets/min  {:8.2f} us/fleet".format(
+        'generator', args.fleets, args.fleets * 60 / elapsed, elapsed * 1e6 / args.fleets))
+
+    # every rejected ship is logged as an error
+    logging.disable(logging.ERROR)
+    count = max(args.fleets // 100, 1)
+    rnd = random.Random(0)
+    start = time.perf_counter()
+    for i in range(count):
+        rejection(ruleset, rnd)
+    elapsed = time.perf_counter() - start
+    print("{:10} {:8d} fleets  {:10.0f} fleets/min  {:8.2f} us/fleet".format(
+        'placeShip', count, count * 60 / elapsed, elapsed * 1e6 / count))
+
+if __name__ == '__main__':
+    main()
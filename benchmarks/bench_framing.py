@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+#
+# recv syscalls per message: the old recv(2) + recv(size) loop vs FrameReader.
+#
+# A sender thread streams a mix of small reports and board_init sized
+# messages through a socketpair while the receiver counts its recv calls.
+#
+# Usage: python bench_framing.py [--messages N]
+#
+
+import argparse
+import socket
+import struct
+import threading
+import time
+import benchutil
+from framing import FrameReader
+from messageparser import MessageParser
+
+
+def messages(count):
+    parser = MessageParser()
+    small = parser.encode('report', {'status': 11})
+    board = parser.encode('board_init', dict(('ship_{}_{}'.format(i, k), 1) for i in range(10) for k in ('x', 'y')))
+    return [board if i % 10 == 0 else small for i in range(count)]
+
+
+def send_all(sock, msgs):
+    for i in range(0, len(msgs), 64):
+        sock.sendall(b''.join(msgs[i:i + 64]))
+    sock.shutdown(socket.SHUT_WR)
+
+
+def recv_exactly(sock, count, calls):
+    # the old loop did a single recv, this is already the fixed, looping variant
+    data = b''
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        calls[0] += 1
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def old_loop(sock):
+    calls = [0]
+    received = 0
+    while True:
+        size = recv_exactly(sock, 2, calls)
+        if not size:
+            break
+        if recv_exactly(sock, struct.unpack('>H', size)[0], calls) is None:
+            break
+        received += 1
+    return received, calls[0]
+
+
+def frame_reader(sock):
+    reader = FrameReader(sock)
+    received = 0
+    for _ in reader.frames():
+        received += 1
+    return received, reader.syscalls
+
+
+def bench(name, receive, msgs):
+    sender, receiver = socket.socketpair()
+    t = threading.Thread(target=send_all, args=(sender, msgs))
+    start = time.perf_counter()
+    t.start()
+    received, calls = receive(receiver)
+    elapsed = time.perf_counter() - start
+    t.join()
+    sender.close()
+    receiver.close()
+    print("{:14} {:8d} messages  {:6.3f} recv/message  {:10.0f} messages/s".format(
+        name, received, calls / float(received), received / elapsed))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="framing syscall benchmark")
+    argparser.add_argument('--messages', type=int, default=200000)
+    args = argparser.parse_args()
+
+    msgs = messages(args.messages)
+    bench('recv(2)+recv(n)', old_loop, msgs)
+    bench('FrameReader', frame_reader, msgs)
+
+if __name__ == '__main__':
+    main()
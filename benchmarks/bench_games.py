@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+#
+# Stress many games in parallel and check that no turn gets lost or played
+# twice.
+#
+# Every pair of bots plays a fixed number of turns. Bots do not wait for
+# their turn but always keep an attack in flight, so both players of a game
+# hit the server at the same time and the attacks out of turn are rejected.
+# The accepted attacks of a game have to alternate: a bot that sees two of
+# its own attacks or two attacks of its opponent in a row counts a duplicated
+# turn. Turns that are not played before the timeout are lost.
+#
+# Usage: python bench_games.py [--games N [N ...]] [--turns T] [--port P]
+#
+
+import argparse
+import asyncio
+import time
+import benchutil
+import loadbot
+
+
+async def play_turns(bot, turns):
+    """
+    Attack until the bot and its opponent attacked turns times.
+    Return the number of duplicated turns the bot saw.
+    """
+    attack = {'coordinate_x': 15, 'coordinate_y': 15}
+    bot.hits = 0
+    duplicated = 0
+    last = None
+    bot.send('attack', attack)
+    while bot.attacks < turns or bot.hits < turns:
+        status = await bot.report()
+        if status in (22, 13):
+            if status == last:
+                duplicated += 1
+            last = status
+        if status == 22:
+            bot.attacks += 1
+        elif status == 13:
+            bot.hits += 1
+        # try again right after every answer to an attack
+        if status in (22, 41) and bot.attacks < turns:
+            bot.send('attack', attack)
+    return duplicated
+
+
+async def run(port, games, turns, prefix):
+    bots = []
+    for i in range(games):
+        bots.extend(await loadbot.setup_game('127.0.0.1', port, '{}-{}'.format(prefix, i)))
+
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(play_turns(bot, turns)) for bot in bots]
+    done, pending = await asyncio.wait(tasks, timeout=30 + turns * games / 100)
+    elapsed = time.perf_counter() - start
+    for task in pending:
+        task.cancel()
+    for bot in bots:
+        bot.close()
+
+    attacks = sum(bot.attacks for bot in bots)
+    duplicated = sum(task.result() for task in done)
+    return attacks, 2 * turns * games - attacks, duplicated, elapsed
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="parallel games stress benchmark")
+    argparser.add_argument('--games', type=int, nargs='+', default=[1, 10, 50])
+    argparser.add_argument('--turns', type=int, default=200)
+    argparser.add_argument('--port', type=int, default=45690)
+    args = argparser.parse_args()
+
+    port = args.port
+    for engine in ('threading', 'asyncio'):
+        proc = benchutil.start_server(port, '--engine', engine)
+        try:
+            for games in args.games:
+                attacks, lost, duplicated, elapsed = asyncio.run(
+                    run(port, games, args.turns, 'stress-{}'.format(games)))
+                print("{:10} {:4d} games  {:10.0f} turns/s  {:6d} lost  {:6d} duplicated".format(
+                    engine, games, attacks / elapsed, lost, duplicated))
+        finally:
+            benchutil.stop_server(proc)
+        port += 1
+
+if __name__ == '__main__':
+    main()
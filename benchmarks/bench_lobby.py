@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+#
+# Lobby contention benchmark, runs the LobbyModel in-process.
+#
+# Every thread connects two players, creates a game, joins it and then
+# reads the lobby a number of times (games info, counters, a game lookup
+# and the encoded lobby report) before it deletes everything again.
+# Reports lobby operations per second and the p99 latency of the reads.
+#
+# Usage: python bench_lobby.py [--threads N [N ...]] [--reads R] [--duration S]
+#
+
+import argparse
+import threading
+import time
+import benchutil
+import lobby
+from benchutil import percentile
+
+
+def worker(model, prefix, reads, deadline, counts, latencies):
+    operations = 0
+    samples = []
+    i = 0
+    while time.perf_counter() < deadline:
+        host, guest, name = '{}-h{}'.format(prefix, i), '{}-g{}'.format(prefix, i), '{}-{}'.format(prefix, i)
+        model.add_player(host)
+        model.add_player(guest)
+        model.add_lobby(name, host)
+        model.join_lobby(name, guest)
+        for j in range(reads):
+            start = time.perf_counter()
+            model.get_games_info()
+            model.get_number_of_games()
+            model.get_game(name)
+            model.get_lobby_report()
+            samples.append(time.perf_counter() - start)
+        model.delete_game(name)
+        model.delete_player(host)
+        model.delete_player(guest)
+        operations += 7 + 4 * reads
+        i += 1
+    counts.append(operations)
+    latencies.extend(samples)
+
+
+def bench(threads, reads, duration, background):
+    model = lobby.LobbyModel()
+    # a lobby that is not empty
+    for i in range(background):
+        model.add_player('idle{}'.format(i))
+        if i % 2 == 0:
+            model.add_lobby('idle{}'.format(i), 'idle{}'.format(i))
+
+    counts, latencies = [], []
+    deadline = time.perf_counter() + duration
+    workers = [threading.Thread(target=worker, args=(model, 't{}-{}'.format(threads, t), reads, deadline,
+                                                     counts, latencies))
+               for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    for i in range(background):
+        model.delete_player('idle{}'.format(i))
+    print("{:4d} threads  {:10.0f} ops/s  read p50 {:8.1f} us  p99 {:8.1f} us".format(
+        threads, sum(counts) / duration, percentile(latencies, 50) * 1e6, percentile(latencies, 99) * 1e6))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="lobby contention benchmark")
+    argparser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    argparser.add_argument('--reads', type=int, default=20)
+    argparser.add_argument('--duration', type=float, default=3.0)
+    argparser.add_argument('--background', type=int, default=100)
+    args = argparser.parse_args()
+
+    # broadcast right away, nobody is listening anyway
+    lobby.broadcaster.window = 0
+    for threads in args.threads:
+        bench(threads, args.reads, args.duration, args.background)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+#
+# MessageParser encode/decode on Update_Lobby sized reports: the previous
+# string concatenation codec vs the current one.
+#
+# The bodies are timed without the 2 byte size header, a 10k entry lobby does
+# not fit into a 64 KiB frame.
+#
+# Usage: python bench_messageparser.py [--repeat N]
+#
+
+import argparse
+import timeit
+import benchutil
+from messageparser import MessageParser
+
+
+def old_encode(type, params):
+    result = "type:%s;" % type
+    for param, value in params.items():
+        result = "%s%s:%s;" % (result, param, value)
+    return result.encode('UTF-8')
+
+
+def old_decode(frame):
+    message = str(frame, 'UTF-8')
+    messageType = None
+    params = {}
+    for t in message.split(";"):
+        if t != "":
+            tokens = t.split(":")
+            if tokens[0].strip() == "type":
+                messageType = tokens[1].strip()
+            else:
+                try:
+                    params[tokens[0].strip()] = tokens[1].strip()
+                except IndexError:
+                    params[tokens[0].strip()] = None
+    return messageType, params
+
+
+def lobby_params(entries):
+    # a player contributes an id and a nickname, the same shape as __build_lobby_report
+    params = {'status': 16, 'number_of_clients': entries // 2, 'number_of_games': 0}
+    for i in range(entries // 2):
+        params['player_identifier_{}'.format(i)] = '{:040x}'.format(i)
+        params['player_name_{}'.format(i)] = 'player{}'.format(i)
+    return params
+
+
+def bench(name, func, repeat):
+    elapsed = min(timeit.repeat(func, number=1, repeat=repeat))
+    print("  {:18} {:9.3f} ms".format(name, elapsed * 1000))
+    return elapsed
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="MessageParser benchmark")
+    argparser.add_argument('--repeat', type=int, default=5)
+    args = argparser.parse_args()
+
+    parser = MessageParser()
+    for entries in (1000, 10000):
+        params = lobby_params(entries)
+        body = parser.encodeBody('report', params)
+        assert old_encode('report', params) == body
+        assert old_decode(body) == parser.decodeFrame(memoryview(body))
+
+        print("{} entries, {} bytes".format(entries, len(body)))
+        old = bench('encode (old)', lambda: old_encode('report', params), args.repeat)
+        new = bench('encode', lambda: parser.encodeBody('report', params), args.repeat)
+        print("  {:18} {:9.1f}x".format('speedup', old / new))
+        old = bench('decode (old)', lambda: old_decode(body), args.repeat)
+        new = bench('decodeFrame', lambda: parser.decodeFrame(memoryview(body)), args.repeat)
+        print("  {:18} {:9.1f}x".format('speedup', old / new))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+#
+# Encodes and decodes binary game snapshots (Game.snapshot / Game.restore).
+#
+# A pool of games in different stages (waiting, placement, early and late in
+# the game) is built first, then the snapshots of the pool are encoded and
+# decoded round robin until the requested number is reached. Every decoded
+# game is checked to encode to the very same bytes once per pool round.
+#
+# Usage: python bench_snapshot.py [--snapshots N] [--pool N] [--board list|bitboard|numpy]
+#
+
+import argparse
+import random
+import time
+import benchutil
+import game
+from game import Game
+
+FLEET = [(2 * i, 0, 'N') for i in range(8)] + [(3, 10, 'E'), (7, 12, 'N')]
+
+
+def build(seed):
+    """
+    Return a game somewhere between creation and its very end.
+    """
+    rnd = random.Random(seed)
+    g = Game('game {}'.format(seed), '{:040x}'.format(rnd.getrandbits(160)))
+    stage = seed % 4
+    if stage == 0:
+        return g
+    g.set_second_player('{:040x}'.format(rnd.getrandbits(160)))
+    assert g.place_fleet(1, FLEET) == (None, -1)
+    if stage == 1:
+        return g
+    assert g.place_fleet(2, FLEET) == (None, -1)
+    g.start()
+    for turn in range(rnd.randrange(40, 240) if stage == 3 else rnd.randrange(40)):
+        player = g.get_turn()
+        if rnd.random() < 0.03:
+            if g.nuke(player, rnd.randrange(14), rnd.randrange(14)) is not False:
+                continue
+        g.fire(player, rnd.randrange(16), rnd.randrange(16))
+    return g
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="game snapshot benchmark")
+    argparser.add_argument('--snapshots', type=int, default=1000000)
+    argparser.add_argument('--pool', type=int, default=1000)
+    argparser.add_argument('--board', choices=sorted(game.boards), default='list')
+    args = argparser.parse_args()
+
+    game.board = game.boards[args.board]
+    pool = [build(seed) for seed in range(args.pool)]
+    sizes = [len(g.snapshot()) for g in pool]
+    print("{} games, {} to {} bytes, {:.1f} bytes on average".format(
+        len(pool), min(sizes), max(sizes), sum(sizes) / float(len(sizes))))
+
+    start = time.perf_counter()
+    snapshots = []
+    for i in range(args.snapshots):
+        data = pool[i % len(pool)].snapshot()
+        if i < len(pool):
+            snapshots.append(data)
+    elapsed = time.perf_counter() - start
+    print("{:8} {:8d} snapshots  {:10.0f} snapshots/s  {:8.2f} us/snapshot".format(
+        'encode', args.snapshots, args.snapshots / elapsed, elapsed * 1e6 / args.snapshots))
+
+    start = time.perf_counter()
+    for i in range(args.snapshots):
+        data = snapshots[i % len(snapshots)]
+        restored = Game.restore(data)
+        if i < len(snapshots):
+            assert restored.snapshot() == data
+    elapsed = time.perf_counter() - start
+    print("{:8} {:8d} snapshots  {:10.0f} snapshots/s  {:8.2f} us/snapshot".format(
+        'decode', args.snapshots, args.snapshots / elapsed, elapsed * 1e6 / args.snapshots))
+
+if __name__ == '__main__':
+    main()
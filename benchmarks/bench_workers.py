@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+#
+# Load benchmark for the multi-process (--workers N) server mode.
+#
+# Several load generator processes play games against the server and the
+# total number of attacks per second is reported for each worker count.
+#
+# Usage: python bench_workers.py [--workers 1 2 4] [--loaders P] [--games G] [--duration S]
+#
+
+import argparse
+import asyncio
+import multiprocessing
+from benchutil import start_server, stop_server
+from loadbot import run_games
+
+
+def loader(port, prefix, games, duration, results):
+    results.put(asyncio.run(run_games('127.0.0.1', port, prefix, games, duration)))
+
+
+def bench(workers, port, loaders, games, duration):
+    proc = start_server(port, '--workers', str(workers))
+    try:
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=loader, args=(port, 'w{}-l{}'.format(workers, i), games, duration, results))
+                 for i in range(loaders)]
+        for p in procs:
+            p.start()
+        attacks = sum(results.get() for _ in procs)
+        for p in procs:
+            p.join()
+    finally:
+        stop_server(proc)
+
+    print("{:3d} worker(s)  {:5d} games  {:10.0f} attacks/s".format(workers, loaders * games, attacks / float(duration)))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="multi-process server load benchmark")
+    argparser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    argparser.add_argument('--loaders', type=int, default=multiprocessing.cpu_count())
+    argparser.add_argument('--games', type=int, default=20)
+    argparser.add_argument('--duration', type=int, default=10)
+    argparser.add_argument('--port', type=int, default=45679)
+    args = argparser.parse_args()
+
+    for workers in args.workers:
+        bench(workers, args.port, args.loaders, args.games, args.duration)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#
+# Small helpers shared by the benchmark scripts in this directory.
+#
+
+import os
+import sys
+import time
+import socket
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'common'))
+sys.path.append(os.path.join(ROOT, 'server'))
+
+
+def start_server(port, *args):
+    """
+    Start server/main.py in a subprocess and wait until it accepts connections.
+    """
+    cmd = [sys.executable, os.path.join(ROOT, 'server', 'main.py'), '--log-level', 'WARNING']
+    cmd.extend(args)
+    cmd.extend(['127.0.0.1', str(port)])
+    proc = subprocess.Popen(cmd)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            # let the server forget about the probe connection
+            time.sleep(0.2)
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("server did not come up on port {}".format(port))
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def rss(pid):
+    """
+    Resident set size of a process in bytes (Linux only).
+    """
+    with open('/proc/{}/status'.format(pid)) as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def percentile(samples, p):
+    if not samples:
+        return float('nan')
+    samples = sorted(samples)
+    k = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+    return samples[k]
+
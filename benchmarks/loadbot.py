@@ -0,0 +1,92 @@
+#
+# Minimal asyncio bot speaking the battleship++ protocol, used to put load
+# on a server. Every pair of bots creates and joins a game, places a fleet
+# and then keeps shooting at open water so that the game never ends.
+#
+
+import asyncio
+import struct
+import benchutil
+from messageparser import MessageParser
+from fleetgenerator import FleetGenerator
+
+parser = MessageParser()
+
+# every bot places another random fleet, the same ones on every run
+fleets = FleetGenerator(seed=0)
+
+
+class Bot:
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.attacks = 0
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def send(self, msgtype, params):
+        self.writer.write(parser.encode(msgtype, params))
+
+    async def report(self):
+        size = struct.unpack('>H', await self.reader.readexactly(2))[0]
+        _, params = parser.decode((await self.reader.readexactly(size)).decode())
+        return int(params['status'])
+
+    async def expect(self, *statuses):
+        while True:
+            status = await self.report()
+            if status in statuses:
+                return status
+
+    async def play(self, deadline):
+        loop = asyncio.get_event_loop()
+        while loop.time() < deadline:
+            status = await self.report()
+            if status == 11:
+                self.send('attack', {'coordinate_x': 15, 'coordinate_y': 15})
+            elif status == 22:
+                self.attacks += 1
+
+    def close(self):
+        self.writer.close()
+
+
+async def setup_game(host, port, name):
+    """
+    Connect two bots and bring them into a running game.
+    """
+    host_bot, guest_bot = Bot(host, port), Bot(host, port)
+    await host_bot.connect()
+    await guest_bot.connect()
+
+    host_bot.send('game_create', {'name': name})
+    await host_bot.expect(28)
+    guest_bot.send('game_join', {'name': name})
+    await guest_bot.expect(27)
+
+    for bot in (host_bot, guest_bot):
+        await bot.expect(18)
+        bot.send('board_init', fleets.toParams(fleets.next()))
+    for bot in (host_bot, guest_bot):
+        await bot.expect(29)
+    return host_bot, guest_bot
+
+
+async def run_games(host, port, prefix, games, duration):
+    """
+    Play the given number of games in parallel and return the number of attacks.
+    """
+    bots = []
+    for i in range(games):
+        bots.extend(await setup_game(host, port, '{}-{}'.format(prefix, i)))
+
+    deadline = asyncio.get_event_loop().time() + duration
+    try:
+        await asyncio.wait_for(asyncio.gather(*[b.play(deadline) for b in bots]), duration + 5)
+    except asyncio.TimeoutError:
+        pass
+    for b in bots:
+        b.close()
+    return sum(b.attacks for b in bots)
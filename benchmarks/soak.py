@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+#
+# Soak test: thousands of connect/play/disconnect cycles against a server,
+# failing if it keeps anything of the clients that are gone.
+#
+# Every cycle brings two bots into a game and ends it another way: surrender,
+# the host disconnecting in the middle of the game, the guest leaving before
+# the fleets are placed or the host disconnecting while nobody joined. The
+# server runs in-process, so that the live ClientHandler, Game and outbound
+# queue objects can be counted along the way. Once all bots are gone these
+# counts, the subscribers of the lobby bus and the number of dead subscribers
+# it had to prune have to be back where they were before the first cycle.
+# RSS alone is too coarse for this, a few thousand leaked handlers only add a
+# couple of MB.
+#
+# Usage: python soak.py [--cycles N] [--parallel P] [--port P]
+#
+
+import argparse
+import asyncio
+import gc
+import os
+import socket
+import sys
+import threading
+import time
+import benchutil
+import loadbot
+import lobby
+import outbound
+from aioserver import AsyncServer
+from game import Game
+from ruleset import CLASSIC
+from server import TCPServer, RequestHandler, ClientHandler
+
+
+async def surrender(host, port, name):
+    host_bot, guest_bot = await loadbot.setup_game(host, port, name)
+    # both fleets are placed, the game is on
+    host_bot.send('surrender', {})
+    await host_bot.expect(23)
+    await guest_bot.expect(17)
+    return host_bot, guest_bot
+
+
+async def disconnect(host, port, name):
+    host_bot, guest_bot = await loadbot.setup_game(host, port, name)
+    host_bot.close()
+    await guest_bot.expect(17)
+    return guest_bot,
+
+
+async def leave(host, port, name):
+    host_bot, guest_bot = loadbot.Bot(host, port), loadbot.Bot(host, port)
+    await host_bot.connect()
+    await guest_bot.connect()
+    host_bot.send('game_create', {'name': name})
+    await host_bot.expect(28)
+    guest_bot.send('game_join', {'name': name})
+    await guest_bot.expect(27)
+    guest_bot.send('game_abort', {})
+    await guest_bot.expect(19)
+    await host_bot.expect(19)
+    return host_bot, guest_bot
+
+
+async def abandon(host, port, name):
+    host_bot = loadbot.Bot(host, port)
+    await host_bot.connect()
+    host_bot.send('game_create', {'name': name})
+    await host_bot.expect(28)
+    return host_bot,
+
+
+ENDINGS = [surrender, disconnect, leave, abandon]
+
+
+def census():
+    """
+    Count what the server keeps of its clients. Nothing is collected first,
+    handlers and games have to go as soon as nothing references them rather
+    than whenever the cycle collector finds them.
+    """
+    counts = {'handlers': 0, 'games': 0}
+    for obj in gc.get_objects():
+        if isinstance(obj, ClientHandler):
+            counts['handlers'] += 1
+        elif isinstance(obj, Game):
+            counts['games'] += 1
+    counts['queues'] = outbound.get_stats()['clients']
+    stats = lobby.bus.get_stats()
+    counts['subscribers'] = stats['subscribers']
+    counts['pruned'] = stats['pruned']
+    return counts
+
+
+def settle(baseline, timeout=5.0):
+    """
+    Wait for the server to close the last connections, return the final census.
+    """
+    deadline = time.perf_counter() + timeout
+    while True:
+        counts = census()
+        if counts == baseline or time.perf_counter() > deadline:
+            return counts
+        time.sleep(0.1)
+
+
+def start_server(engine, port):
+    if engine == 'asyncio':
+        server = AsyncServer(('127.0.0.1', port))
+    else:
+        server = TCPServer(('127.0.0.1', port), RequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            # let the server forget about the probe connection
+            time.sleep(0.2)
+            return server, thread
+        except OSError:
+            if time.time() > deadline:
+                raise RuntimeError("server did not come up on port {}".format(port))
+            time.sleep(0.05)
+
+
+def stop_server(server, thread):
+    server.shutdown()
+    server.server_close()
+    thread.join(5)
+
+
+async def cycle(port, i):
+    bots = await asyncio.wait_for(ENDINGS[i % len(ENDINGS)]('127.0.0.1', port, 'soak-{}'.format(i)), 10)
+    for bot in bots:
+        bot.close()
+
+
+async def run(port, cycles, parallel, samples):
+    handlers = []
+    done = 0
+    while done < cycles:
+        batch = min(parallel, cycles - done)
+        await asyncio.gather(*[cycle(port, done + i) for i in range(batch)])
+        done += batch
+        if done % max(cycles // samples, parallel) < parallel or done == cycles:
+            # let the server close the connections of the last batch
+            await asyncio.sleep(0.2)
+            handlers.append(census()['handlers'])
+    return handlers
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="connect/play/disconnect soak test")
+    argparser.add_argument('--cycles', type=int, default=4000)
+    argparser.add_argument('--parallel', type=int, default=20)
+    argparser.add_argument('--samples', type=int, default=10)
+    argparser.add_argument('--port', type=int, default=45700)
+    args = argparser.parse_args()
+
+    lobby.broadcaster.window = 0
+    ClientHandler.configure(CLASSIC)
+
+    failed = False
+    port = args.port
+    for engine in ('threading', 'asyncio'):
+        server, thread = start_server(engine, port)
+        try:
+            baseline = census()
+            handlers = asyncio.run(run(port, args.cycles, args.parallel, args.samples))
+            counts = settle(baseline)
+        finally:
+            stop_server(server, thread)
+        port += 1
+
+        print("{:10} {:6d} cycles  live handlers {}  RSS {:.1f} MB".format(
+            engine, args.cycles, ' '.join(str(h) for h in handlers), benchutil.rss(os.getpid()) / float(1 << 20)))
+        for key in sorted(baseline):
+            if counts[key] != baseline[key]:
+                print("{}: {} {} after the last cycle, {} before the first".format(
+                    engine, counts[key], key, baseline[key]))
+                failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
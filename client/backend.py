@@ -212,20 +212,22 @@ class Backend:
 				self.__lobbyUpdateGamesCallbacks.remove(callback)
 		logging.debug("Lobby callback removed")
 
-	def onLobbyUpdates(self, players, games):
+	def onLobbyUpdates(self, players, games, removedPlayers=None, removedGames=None):
 		"""
 		Calls all lobby update callbacks when there is any update.
 
 		Args:
-			players: complete list of the current players
-			games: complete list of the current games
+			players: complete list of the current players or the added and changed ones of a delta update
+			games: complete list of the current games or the added and changed ones of a delta update
+			removedPlayers: identifiers of the removed players of a delta update
+			removedGames: names of the removed games of a delta update
 		"""
 
-		self.lobby.onUpdate(games, players)
+		self.lobby.onUpdate(games, players, removedGames, removedPlayers)
 
 		# check if there was an update with the own game. E.g. opponent joined or changed nickname
 		if self.lobby.hasGame():
-			for game in games:
+			for game in self.lobby.games:
 				if game.name == self.lobby.game.name:
 					if self.lobby.hasOpponent():
 						# TODO: Check if opponent changed nickname
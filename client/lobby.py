@@ -8,17 +8,27 @@ class Lobby:
 		Maximilian Hess <mail@maximilianhess.com>
 	"""
 
-	def onUpdate(self, games, players):
+	def onUpdate(self, games, players, removedGames=None, removedPlayers=None):
 		"""
 		Updates everything. Is called automatically when the server sends a new Update_Lobby report.
 
 		Args:
-		    games: the games currently active
-		    players: the players currently active
-		"""
-
-		self.games = games
-		self.players = players
+		    games: the games currently active or the added and changed games of a delta update
+		    players: the players currently active or the added and changed players of a delta update
+		    removedGames: the names of the removed games of a delta update
+		    removedPlayers: the ids of the removed players of a delta update
+		"""
+
+		if removedGames is None and removedPlayers is None:
+			self.games = games
+			self.players = players
+		else:
+			# delta update: replace changed entries and drop removed ones
+			dropGames = set(removedGames or []) | set(game.name for game in games)
+			self.games = [game for game in self.games if game.name not in dropGames] + games
+
+			dropPlayers = set(removedPlayers or []) | set(player.id for player in players)
+			self.players = [player for player in self.players if player.id not in dropPlayers] + players
 
 		self.__playerNicks = {}
 		for player in self.players:
@@ -2,6 +2,7 @@ import logging, socket, sys
 from threading import Thread
 
 from messageparser import *
+from framing import FrameReader
 from playingfield import Orientation
 
 reportCodes = {
@@ -81,6 +82,16 @@ class ServerHandler:
 
 		player_identifier_0:[identifier];...;player_identifier_n-1:[identifier];
 			Per-server-unique identifier (implementations may map any string as identifier)
+
+		version:[number];
+			The lobby version of this report. Acknowledging it with lobby_ack switches to delta reports.
+
+	Delta reports additionally contain delta:true and base_version:[number]. Games and players are only listed if
+	they were added or changed since the base version and the following parameters list the removed ones. A delta
+	report only applies to the lobby of the report with the base version, every other one is dropped:
+
+		removed_game_0:[name];...
+		removed_player_0:[identifier];...
 	"""
 	def __onUpdateLobby(self, params):
 		from backend import GameInformation, PlayerInformation
@@ -88,6 +99,13 @@ class ServerHandler:
 		games   = []
 		players = []
 
+		isDelta = params.get("delta") == "true"
+		if isDelta and (self.__lobbyVersion is None or int(params["base_version"]) != self.__lobbyVersion):
+			# the delta does not apply to our lobby, ask for a full one
+			logging.error("Update_Lobby error: Unknown base version.")
+			self.__sendMessage("lobby_ack", {"version": -1})
+			return
+
 		# extract players count and games count
 		playersTotal = int(params["number_of_clients"])
 		gamesTotal   = int(params["number_of_games"])
@@ -108,6 +126,7 @@ class ServerHandler:
 				playersCounter += 1
 
 				# extract counter and nickname if there is one...
+				nickname = None
 				if "player_name_" + param[18:] in params:
 					nickname = params["player_name_" + param[18:]]
 
@@ -138,7 +157,17 @@ class ServerHandler:
 
 				games.append(game)
 
-		self.__backend.onLobbyUpdates(players, games)
+		if isDelta:
+			removedGames   = [value for param, value in params.items() if param.startswith("removed_game_")]
+			removedPlayers = [value for param, value in params.items() if param.startswith("removed_player_")]
+			self.__backend.onLobbyUpdates(players, games, removedPlayers, removedGames)
+		else:
+			self.__backend.onLobbyUpdates(players, games)
+
+		# acknowledge the version, the server answers with deltas from now on
+		if "version" in params:
+			self.__lobbyVersion = int(params["version"])
+			self.__sendMessage("lobby_ack", {"version": self.__lobbyVersion})
 
 	def joinGame(self, gameId):
 		"""
@@ -235,93 +264,110 @@ class ServerHandler:
 		self.__sendMessage("surrender", {})
 
 	def __receiveLoop(self):
-		while not self.__stopReceiveLoop:
+		# large lobby reports arrive in chunks, see connect()
+		reader = FrameReader(self.__sock, extended=True)
 
-			try:
-
-				# read the first to byte to receive the byte size of the message
-				size = self.__sock.recv(2)
-				if not size:
+		try:
+			for frame in reader.frames():
+				if self.__stopReceiveLoop:
+					break
+
+				try:
+					msg = str(frame, "UTF-8")
+				except UnicodeDecodeError:
+					logging.error("Failed to decode report: %s" % bytes(frame))
 					continue
-				else:
-					try:
-						msg = self.__sock.recv(size[0] * 256 + size[1]).decode()
-					except:
-						logging.error("Failed to decode report: %s" % msg)
-						continue
-					messageType, params = self.__messageParser.decode(msg)
-					#logging.debug("Receive: {}".format(msg))
-
-					# validate that the status code exists
-					status = int(params["status"])
-					if status in reportCodes:
-						logging.debug("%s received: %s" % (messageType, reportCodes[status]))
-
-						if status is 15:
-							self.__backend.onIncomingChatMessage(params["author_id"], params["timestamp"], params["message_content"])
-
-						elif status is 16:														# Update_Lobby
-							self.__onUpdateLobby(params)
-
-						elif status is 17:														# Game_Ended
-							self.__backend.onGameEnded(params)
-
-						# game creation stuff
-						elif status is 19:														# Game_Aborted
-							self.__backend.onGameAborted()
-						elif status is 23:
-							self.__backend.onCapitulate()										# Surrender_Accepted
-						elif status is 27 or status is 47:										# Successful_Game_Join
-							self.__backend.onJoinGame(status is 27)								# or Game_Join_Denied
-						elif status is 28:														# Successful_Game_Create
-							self.__backend.onCreateGame(True)
-						elif status is 29 or status is 38:										# Successful_Ship_Placement
-							self.__backend.onPlaceShips(status is 29)							# or Illegal_Ship_Placement
-						elif status is 37:														# Illegal_Game_Definition
-							self.__backend.onIllegalGameDefinition()
-						elif status is 48:														# Game_Preparation_Ended
-							self.__backend.gamePreparationsEndedResponse()
-
-						# game play stuff
-						#  _ Begin_Turn
-						#  - Successful_Move
-						#  - Successful_Attack
-						#  - Surrender_Accepted
-						#  - Successful_Special_Attack
-						#  - Illegal_Move
-						#  - Illegal_Special_Attack
-						#  - Illegal_Field
-						#  - Illegal_Ship_Index
-						#  - Illegal_Attack
-						#  - Not_Your_Turn
-						elif status is 11 or status is 21 or status is 22 or status is 23 or status is 24 or status is 31 \
-								or status is 32 or status is 33 or status is 34 or status is 39 or status is 41:
-							self.__backend.onGamePlayUpdate(status)
-
-						# Begin_Ship_Placing
-						elif status is 18:
-							self.__backend.onBeginShipPlacing()
-
-						# field updates
-						elif status is 13:
-							self.__backend.onUpdateOwnFields(params)
-						elif status is 14:
-							self.__backend.onUpdateEnemyFields(params)
-
-						# bad error stuff
-						#  - Message_Not_Recognized
-						#  - Not_In_Any_Game (what? wtf? :D)
-						elif status is 40 or status is 43:
-							self.__backend.errorResponse(status)
-
-					else:
-						logging.debug("%s received with unknown status code." % (messageType))
-			except Exception as ex:
-				import traceback
-				traceback.print_exc(file=sys.stdout)
-				logging.error("Connection error: %s" % ex)
-				logging.error("Lost connection to server! Cleaning up...")
-				#self.__backend.onLostConnection()
+
+				try:
+					self.__onReport(msg)
+				except Exception as ex:
+					import traceback
+					traceback.print_exc(file=sys.stdout)
+					logging.error("Failed to handle report: %s" % ex)
+		except Exception as ex:
+			logging.error("Connection error: %s" % ex)
+
+		if not self.__stopReceiveLoop:
+			logging.error("Lost connection to server! Cleaning up...")
+			#self.__backend.onLostConnection()
+
+	def __onReport(self, msg):
+		messageType, params = self.__messageParser.decode(msg)
+		#logging.debug("Receive: {}".format(msg))
+
+		# validate that the status code exists
+		status = int(params["status"])
+
+		# servers without large frames answer the large_frames request of connect() with Message_Not_Recognized, which
+		# is the first reply that is not a broadcast on such a connection, newer servers do not answer it at all
+		if self.__largeFramesRequested and status not in (15, 16):
+			self.__largeFramesRequested = False
+			if status == 40:
+				logging.info("Server does not support large frames.")
+				return
+
+		if status in reportCodes:
+			logging.debug("%s received: %s" % (messageType, reportCodes[status]))
+
+			if status is 15:
+				self.__backend.onIncomingChatMessage(params["author_id"], params["timestamp"], params["message_content"])
+
+			elif status is 16:														# Update_Lobby
+				self.__onUpdateLobby(params)
+
+			elif status is 17:														# Game_Ended
+				self.__backend.onGameEnded(params)
+
+			# game creation stuff
+			elif status is 19:														# Game_Aborted
+				self.__backend.onGameAborted()
+			elif status is 23:
+				self.__backend.onCapitulate()										# Surrender_Accepted
+			elif status is 27 or status is 47:										# Successful_Game_Join
+				self.__backend.onJoinGame(status is 27)								# or Game_Join_Denied
+			elif status is 28:														# Successful_Game_Create
+				self.__backend.onCreateGame(True)
+			elif status is 29 or status is 38:										# Successful_Ship_Placement
+				self.__backend.onPlaceShips(status is 29)							# or Illegal_Ship_Placement
+			elif status is 37:														# Illegal_Game_Definition
+				self.__backend.onIllegalGameDefinition()
+			elif status is 48:														# Game_Preparation_Ended
+				self.__backend.gamePreparationsEndedResponse()
+
+			# game play stuff
+			#  _ Begin_Turn
+			#  - Successful_Move
+			#  - Successful_Attack
+			#  - Surrender_Accepted
+			#  - Successful_Special_Attack
+			#  - Illegal_Move
+			#  - Illegal_Special_Attack
+			#  - Illegal_Field
+			#  - Illegal_Ship_Index
+			#  - Illegal_Attack
+			#  - Not_Your_Turn
+			elif status is 11 or status is 21 or status is 22 or status is 23 or status is 24 or status is 31 \
+					or status is 32 or status is 33 or status is 34 or status is 39 or status is 41:
+				self.__backend.onGamePlayUpdate(status)
+
+			# Begin_Ship_Placing
+			elif status is 18:
+				self.__backend.onBeginShipPlacing()
+
+			# field updates
+			elif status is 13:
+				self.__backend.onUpdateOwnFields(params)
+			elif status is 14:
+				self.__backend.onUpdateEnemyFields(params)
+
+			# bad error stuff
+			#  - Message_Not_Recognized
+			#  - Not_In_Any_Game (what? wtf? :D)
+			elif status is 40 or status is 43:
+				self.__backend.errorResponse(status)
+
+		else:
+			logging.debug("%s received with unknown status code." % (messageType))
 
 	def __sendMessage(self, type, params):
 		if not self.__connected:
@@ -381,6 +427,11 @@ class ServerHandler:
 			self.__sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 			self.__sock.connect((hostname, port))
 			self.__connected = True
+			self.__lobbyVersion = None
+
+			# lobby reports of busy servers exceed 64 KiB
+			self.__largeFramesRequested = True
+			self.__sendMessage("large_frames", {})
 
 			self.__stopReceiveLoop = False
 			Thread(target=self.__receiveLoop).start()
@@ -397,3 +448,5 @@ class ServerHandler:
 		self.__messageParser = MessageParser()
 
 		self.__connected = False
+		self.__lobbyVersion = None
+		self.__largeFramesRequested = False
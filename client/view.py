@@ -5,6 +5,8 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtMultimedia import QSound
 
 from playingfield import *
+from ruleset import Ruleset
+from fleetgenerator import FleetGenerator
 
 class ViewModel:
 	"""
@@ -819,19 +821,10 @@ class MainForm(QWidget):
 			self.__updatePlayersLbl()
 
 	def __placeShipsQuickly(self):
-		self.__backend.placeShip(Field( 8,  9), Field( 9,  9))
-		self.__backend.placeShip(Field( 8,  6), Field( 8,  7))
-		self.__backend.placeShip(Field( 7,  7), Field( 7,  6))
-		self.__backend.placeShip(Field( 6,  6), Field( 6,  7))
-
-		self.__backend.placeShip(Field( 5,  9), Field( 7,  9))
-		self.__backend.placeShip(Field( 8,  5), Field( 6,  5))
-		self.__backend.placeShip(Field( 6,  8), Field( 8,  8))
-
-		self.__backend.placeShip(Field( 8,  4), Field( 5,  4))
-		self.__backend.placeShip(Field( 5,  5), Field( 5,  8))
-
-		self.__backend.placeShip(Field( 9,  8), Field( 9,  4))
+		# a random fleet, ordered by ship id
+		generator = FleetGenerator(Ruleset(self.__fieldLength))
+		for bow, rear in generator.toFields(generator.next()):
+			self.__backend.placeShip(bow, rear)
 
 		self.__onRepaint()
 
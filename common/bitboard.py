@@ -0,0 +1,944 @@
+import copy
+import logging
+from playingfield import Field, Ship, FieldStatus, Orientation, PlacementError
+from ruleset import Ruleset
+
+class BoardMasks:
+	"""
+	Precomputed bit masks of a square board. Cell (x, y) is bit y * length + x, the masks are shared by all boards of
+	the same size.
+
+	Args:
+		fieldLength: the length of the field in x and y direction
+	"""
+
+	__cache = {}
+
+	@classmethod
+	def get(cls, fieldLength):
+		"""
+		Returns the masks of a board size.
+
+		Args:
+			fieldLength: the length of the field in x and y direction
+
+		Returns:
+			The shared masks of this board size.
+		"""
+
+		masks = cls.__cache.get(fieldLength)
+		if masks is None:
+			masks = cls.__cache[fieldLength] = BoardMasks(fieldLength)
+		return masks
+
+	def __init__(self, fieldLength):
+		n = fieldLength
+		self.length = n
+
+		row = (1 << n) - 1
+		column = 0
+		for y in range(n):
+			column |= 1 << (y * n)
+
+		self.bottom = row
+		self.top    = row << (n * (n - 1))
+		self.left   = column
+		self.right  = column << (n - 1)
+
+		# vertical lines of a given length with their lowest field at the origin, longer ones are built on each call
+		self.__columns = [0]
+		for length in range(1, min(n, 8) + 1):
+			self.__columns.append(self.__columns[-1] | (1 << ((length - 1) * n)))
+
+	def column(self, length):
+		"""
+		Returns the mask of a vertical line.
+
+		Args:
+			length: the number of fields of the line
+
+		Returns:
+			The mask of the line with its lowest field at the origin.
+		"""
+
+		if length < len(self.__columns):
+			return self.__columns[length]
+
+		column = 0
+		for y in range(length):
+			column |= 1 << (y * self.length)
+		return column
+
+	def square(self, x, y, size):
+		"""
+		Returns the mask of a square clipped to the board.
+
+		Args:
+			x: horizontal coordinate of the lowest left field, may be off the board
+			y: vertical coordinate of the lowest left field, may be off the board
+			size: the length of the square
+
+		Returns:
+			The mask of all fields of the square on the board.
+		"""
+
+		n = self.length
+		width = min(x + size, n) - max(x, 0)
+		height = min(y + size, n) - max(y, 0)
+		if width <= 0 or height <= 0:
+			return 0
+		x, y = max(x, 0), max(y, 0)
+		# the column bits are n apart, so multiplying them with a row of at most n bits never carries
+		return (self.column(height) * ((1 << width) - 1)) << (y * n + x)
+
+def bits(mask):
+	"""
+	Yields the index of every set bit of a mask.
+
+	Args:
+		mask: the mask
+
+	Returns:
+		A generator of bit indices in ascending order.
+	"""
+
+	while mask:
+		low = mask & -mask
+		yield low.bit_length() - 1
+		mask ^= low
+
+class BitBoardShipList:
+	"""
+	Manages all ships on the playing field as bitboards. Drop-in replacement for ShipList: the ships are still
+	available as Ship objects, but placement, collision and move checks are done on an occupancy mask and a mask per
+	ship.
+
+	Args:
+		fieldLength: the length of the field in x and y direction
+		ruleset: the rules of the game, the classic rules on a field of fieldLength if None
+	"""
+
+	def cellMask(self, field):
+		"""
+		Returns the bit of a field.
+
+		Args:
+			field: the field
+
+		Returns:
+			The bit of the field or 0 if it is not on the board.
+		"""
+
+		n = self.__fieldLength
+		if 0 <= field.x < n and 0 <= field.y < n:
+			return 1 << (field.y * n + field.x)
+		return 0
+
+	def getFieldStatus(self, field):
+		"""
+		Returns the status of a field.
+
+		Args:
+		    field: the field
+
+		Returns:
+			The status of the field.
+		"""
+
+		bit = self.cellMask(field)
+		if not bit & self.__occupied:
+			return FieldStatus.WATER, None
+
+		ship = self.__ships[self.__shipIdAt(bit)]
+		if bit & self.__damaged:
+			return FieldStatus.DAMAGEDSHIP, ship
+		return FieldStatus.SHIP, ship
+
+	def getStatus(self, bit):
+		"""
+		Returns the status of a field given as bit.
+
+		Args:
+			bit: the bit of the field
+
+		Returns:
+			The status of the field.
+		"""
+
+		if bit & self.__damaged:
+			return FieldStatus.DAMAGEDSHIP
+		if bit & self.__occupied:
+			return FieldStatus.SHIP
+		return FieldStatus.WATER
+
+	def getShipAtPosition(self, field):
+		"""
+		Returns the id of the ship at a given position.
+
+		Args:
+		    field: the field
+
+		Returns:
+			The id of the ship or -1 if there is no ship at this position.
+		"""
+
+		bit = self.cellMask(field)
+		if not bit & self.__occupied:
+			return -1
+		return self.__shipIdAt(bit)
+
+	def getShips(self):
+		"""
+		Returns a list of all Ships.
+
+		Return:
+			Returns a list of all Ships.
+		"""
+
+		return [ship for ship in self.__ships if ship is not None]
+
+	def getShip(self, shipId):
+		"""
+		Returns a specified ship from the own playing field.
+
+		Args:
+			shipId: the id of the ship
+
+		Returns:
+			Returns a specified ship from the own playing field.
+		"""
+
+		return self.__ships[shipId]
+
+	def getMask(self, shipId):
+		"""
+		Returns the mask of a ship.
+
+		Args:
+			shipId: the id of the ship
+
+		Returns:
+			The mask of all fields of the ship.
+		"""
+
+		return self.__masks[shipId]
+
+	def getOccupied(self):
+		"""
+		Returns the mask of all fields with a ship.
+
+		Returns:
+			The occupancy mask.
+		"""
+
+		return self.__occupied
+
+	def damage(self, mask, order=None):
+		"""
+		Damages all ship parts within a mask.
+
+		Args:
+			mask: the attacked fields
+			order: the bits of the attacked fields in the order they are attacked, which is the order ships are sunken
+				in, ascending if None
+
+		Returns:
+			The mask of the parts that have not been damaged before.
+		"""
+
+		hits = mask & self.__occupied & ~self.__damaged
+		if hits:
+			self.__damaged |= hits
+			n = self.__fieldLength
+			for i in bits(hits) if order is None else [bit.bit_length() - 1 for bit in order if bit & hits]:
+				shipId = self.__ids[i]
+				ship = self.__ownShip(shipId)
+				ship.addDamage(Field(i % n, i // n))
+				self.__intact -= 1
+				if ship.isSunk():
+					self.__sunk.append(shipId)
+		return hits
+
+	def isSunk(self):
+		"""
+		Checks if the whole fleet has been placed and sunken.
+
+		Returns:
+			True if all ships have been sunken or False if not.
+		"""
+
+		return self.__intact == 0 and self.__placed == len(self.__masks)
+
+	def getSunkShips(self):
+		"""
+		Returns the ids of all sunken ships in the order they have been sunken.
+
+		Returns:
+			A list of ship ids.
+		"""
+
+		return self.__sunk
+
+	def movePossible(self, shipId, direction):
+		"""
+		Validates if the move of a ship is possible.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction
+
+		Returns:
+			True if the move is possible or False if not.
+		"""
+
+		if not (0 <= shipId < len(self.__masks)):
+			return False
+
+		mask = self.__masks[shipId]
+		if not mask or mask & self.__damaged == mask:
+			return False
+
+		moved = self.__shift(mask, direction)
+		if moved is None:
+			return False
+		return not moved & self.__occupied & ~mask
+
+	def move(self, shipId, direction):
+		"""
+		Moves a given ship to a given direction.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction
+		"""
+
+		mask = self.__masks[shipId]
+		moved = self.__shift(mask, direction)
+		if moved is None:
+			logging.error("Ship %s cannot leave the playing field." % shipId)
+			return
+
+		damaged = self.__damaged & mask
+		self.__occupied = (self.__occupied & ~mask) | moved
+		self.__damaged = (self.__damaged & ~mask) | self.__shift(damaged, direction)
+		self.__masks[shipId] = moved
+		self.__setShipAtPosition(mask, -1)
+		self.__setShipAtPosition(moved, shipId)
+
+		ship = self.__ownShip(shipId)
+		bow = ship.bow
+		rear = ship.rear
+
+		if direction is Orientation.NORTH:
+			bowNew  = Field(bow.x , bow.y  + 1)
+			rearNew = Field(rear.x, rear.y + 1)
+		elif direction is Orientation.WEST:
+			bowNew  = Field(bow.x  - 1,  bow.y)
+			rearNew = Field(rear.x - 1, rear.y)
+		elif direction is Orientation.SOUTH:
+			bowNew  = Field(bow.x, bow.y   - 1)
+			rearNew = Field(rear.x, rear.y - 1)
+		else:
+			bowNew  = Field(bow.x  + 1,  bow.y)
+			rearNew = Field(rear.x + 1, rear.y)
+
+		ship.move(bowNew, rearNew, direction)
+
+	def moreShipsLeftToPlace(self):
+		"""
+		Checks if the user has to place more ships.
+
+		Returns:
+			Returns True if all ships have been placed or False if not.
+		"""
+
+		return self.__placed < len(self.__masks)
+
+	def add(self, bow, rear):
+		"""
+		Adds a new Ship to the playing field. Validates if the maximum count of this kind of ship is reached.
+
+		Args:
+			bow: the bow of the Ship to add
+			rear: the rear of the Ship to add
+
+		Return:
+			Returns the id of the newly built ship or -1 if there was any game rule violation. In addition returns if
+			the user has to place more ships.
+		"""
+
+		error, mask = self.__shipMask(bow, rear, self.__occupied)
+		if error is not None:
+			return -1, True
+
+		# first free slot of this kind of ship
+		length = bin(mask).count("1")
+		for shipId in self.__ruleset.getShipIds(length):
+			if not self.__masks[shipId]:
+				break
+		else:
+			return -1, self.moreShipsLeftToPlace()
+
+		self.__place(shipId, bow, rear, mask)
+
+		return shipId, self.moreShipsLeftToPlace()
+
+	def placeFleet(self, ships):
+		"""
+		Places the whole fleet at once. Either all ships are placed or none of them.
+
+		Args:
+			ships: bow and rear of every ship, ordered by ship id
+
+		Returns:
+			None if the fleet has been placed or the PlacementError. In addition returns the id of the first ship
+			that violates the rules or -1 if the fleet as a whole is invalid.
+		"""
+
+		if self.__placed:
+			return PlacementError.ALREADY_PLACED, -1
+		if len(ships) != len(self.__masks):
+			return PlacementError.FLEET_SIZE, -1
+
+		masks = []
+		occupied = 0
+		for shipId, (bow, rear) in enumerate(ships):
+			error, mask = self.__shipMask(bow, rear, occupied)
+			if error is None and bin(mask).count("1") != self.__ruleset.getShipLength(shipId):
+				logging.error("Ship %s does not have the length of its id." % shipId)
+				error = PlacementError.WRONG_LENGTH
+			if error is not None:
+				return error, shipId
+			masks.append(mask)
+			occupied |= mask
+
+		for shipId, (bow, rear) in enumerate(ships):
+			self.__place(shipId, bow, rear, masks[shipId])
+
+		return None, -1
+
+	def getCarrierCount(self):
+		"""
+		Returns the count of carriers currently on the field.
+
+		Returns:
+			The count of carriers currently on the field.
+		"""
+
+		return self.__counts.get(5, 0)
+
+	def getBattleshipCount(self):
+		"""
+		Returns the count of battleships currently on the field.
+
+		Returns:
+			The count of battleships currently on the field.
+		"""
+
+		return self.__counts.get(4, 0)
+
+	def getCruiserCount(self):
+		"""
+		Returns the count of cruisers currently on the field.
+
+		Returns:
+			The count of cruisers currently on the field.
+		"""
+
+		return self.__counts.get(3, 0)
+
+	def getDestroyerCount(self):
+		"""
+		Returns the count of destroyers currently on the field.
+
+		Returns:
+			The count of destroyers currently on the field.
+		"""
+
+		return self.__counts.get(2, 0)
+
+	def getShipCount(self):
+		"""
+		Returns the count of ships currently on the field.
+
+		Returns:
+			The count of ships currently on the field.
+		"""
+
+		return self.__placed
+
+	def __shipIdAt(self, bit):
+		return self.__ids[bit.bit_length() - 1]
+
+	def __setShipAtPosition(self, mask, shipId):
+		if self.__idsShared:
+			self.__ids = list(self.__ids)
+			self.__idsShared = False
+		for i in bits(mask):
+			self.__ids[i] = shipId
+
+	def __shift(self, mask, direction):
+		n = self.__fieldLength
+		edges = self.__edges
+
+		if direction is Orientation.NORTH:
+			return None if mask & edges.top else mask << n
+		elif direction is Orientation.SOUTH:
+			return None if mask & edges.bottom else mask >> n
+		elif direction is Orientation.WEST:
+			return None if mask & edges.left else mask >> 1
+		elif direction is Orientation.EAST:
+			return None if mask & edges.right else mask << 1
+		return None
+
+	def __place(self, shipId, bow, rear, mask):
+		self.__masks[shipId] = mask
+		self.__setShipAtPosition(mask, shipId)
+		self.__occupied |= mask
+		self.__ships[shipId] = Ship(bow, rear)
+		self.__owned[shipId] = True
+		length = bin(mask).count("1")
+		self.__counts[length] += 1
+		self.__placed += 1
+		self.__intact += length
+
+	def __shipMask(self, bow, rear, occupied):
+		# check if the length of the potential ship is valid
+		if bow.x == rear.x:
+			length = abs(bow.y - rear.y) + 1
+		else:
+			length = abs(bow.x - rear.x) + 1
+
+		if not self.__ruleset.getShipIds(length):
+			logging.error("This type of ship does not exist.")
+			return PlacementError.UNKNOWN_SHIP, 0
+
+		# check if the ship is diagonal
+		if not (bow.x == rear.x or bow.y == rear.y):
+			logging.error("Diagonal ship!")
+			return PlacementError.DIAGONAL, 0
+
+		# check playing field borders
+		n = self.__fieldLength
+		if not (0 <= bow.x < n and 0 <= bow.y < n and 0 <= rear.x < n and 0 <= rear.y < n):
+			logging.error("Collision with border!")
+			return PlacementError.BORDER, 0
+
+		if bow.y == rear.y:
+			mask = ((1 << length) - 1) << (bow.y * n + min(bow.x, rear.x))
+		else:
+			mask = self.__edges.column(length) << (min(bow.y, rear.y) * n + bow.x)
+
+		# check for collisions with previously placed ships
+		if mask & occupied:
+			logging.error("Collision with ship!")
+			return PlacementError.COLLISION, 0
+
+		return None, mask
+
+	def clone(self):
+		"""
+		Returns a copy of the ship list. Both share the id index and all ships until they change them, the masks are
+		immutable integers anyway.
+
+		Returns:
+			The copy of the ship list.
+		"""
+
+		other = copy.copy(self)
+		other.__ships = list(self.__ships)
+		other.__masks = list(self.__masks)
+		other.__counts = dict(self.__counts)
+		other.__sunk = list(self.__sunk)
+		self.__idsShared = other.__idsShared = True
+		self.__owned = [False] * len(self.__ships)
+		other.__owned = [False] * len(self.__ships)
+		return other
+
+	def __ownShip(self, shipId):
+		if not self.__owned[shipId]:
+			self.__ships[shipId] = self.__ships[shipId].copy()
+			self.__owned[shipId] = True
+		return self.__ships[shipId]
+
+	def __init__(self, fieldLength, ruleset=None):
+		self.__ruleset = ruleset if ruleset is not None else Ruleset(fieldLength)
+		self.__fieldLength = self.__ruleset.fieldLength
+		self.__edges = BoardMasks.get(self.__fieldLength)
+
+		self.__ships = [None] * self.__ruleset.shipCount
+		self.__masks = [0] * self.__ruleset.shipCount
+		self.__counts = {length: 0 for length, count in self.__ruleset.fleet}
+		self.__placed = 0
+
+		# id of the ship on every field (by bit index), only valid for occupied fields
+		self.__ids = [-1] * (self.__fieldLength * self.__fieldLength)
+
+		self.__occupied = 0
+		self.__damaged = 0
+
+		# undamaged parts of all placed ships and the ids of sunken ships
+		self.__intact = 0
+		self.__sunk = []
+
+		# copy-on-write state of clones: the id index and ships that are not owned are shared with another ship list
+		self.__idsShared = False
+		self.__owned = [True] * self.__ruleset.shipCount
+
+class BitBoardPlayingField:
+	"""
+	A complete playing field that consists of 16x16 fields, backed by bitboards. Same public API as PlayingField.
+
+	Args:
+		length: the dimension of playing field
+		devmode: developer mode
+		ruleset: the rules of the game, the classic rules on a field of length if None
+	"""
+
+	def attack(self, field):
+		"""
+		The enemy attacks a field.
+
+		Args:
+		    field: the field the enemy attacks
+
+		Returns:
+			Returns the status of the field after the attack together with True if it changed or False if not.
+		"""
+
+		bit = self.__ships.cellMask(field)
+		updated = bool(self.__ships.damage(bit))
+
+		# unfog field
+		if bit and not bit & self.__fog:
+			updated = True
+			self.__fog |= bit
+			self.__ownUnfogged().append(field)
+
+		return self.__ships.getStatus(bit), updated
+
+	def specialAttack(self, field):
+		"""
+		The enemy attacks a lot of fields.
+
+		Args:
+		    field: the most significant field
+
+		Returns:
+			A dictionary of fields and statuses that have been updated. Keys are 'field' and 'status'.
+		"""
+
+		# special attacks left
+		if self.__allowed_attacks == 0:
+			return False
+		self.__allowed_attacks -= 1
+
+		area = self.__specialAttackMask(field)
+		if not area:
+			return []
+
+		fields = self.__specialAttackFields(field)
+		hits = self.__ships.damage(area, [bit for f, bit in fields])
+		unfogged = area & ~self.__fog
+		self.__fog |= area
+		changed = hits | unfogged
+		if not changed:
+			return []
+
+		updates = []
+		for f, bit in fields:
+			if bit & changed:
+				if bit & unfogged:
+					self.__ownUnfogged().append(f)
+				updates.append({
+					'field': f,
+					'status': self.__ships.getStatus(bit)
+				})
+
+		return updates
+
+	def movePossible(self, shipId, direction):
+		"""
+		Validates if a move of a given ship to a given direction is possible.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction
+
+		Returns:
+			True if the move is possible or False if not.
+		"""
+
+		return self.__ships.movePossible(shipId, direction)
+
+	def move(self, shipId, direction):
+		"""
+		Moves a ship.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction of the ship
+
+		Returns:
+		    A dictionary of fields and statuses that have been updated and are unfogged. Keys are 'field' and 'status'.
+		"""
+
+		old = self.__ships.getMask(shipId)
+		oldfields = self.getShip(shipId).parts
+		self.__ships.move(shipId, direction)
+		new = self.__ships.getMask(shipId)
+
+		# the new parts first and then the fields the ship left, like PlayingField
+		changed = (old | new) & self.__fog
+		updates = []
+		for f in self.getShip(shipId).parts + oldfields:
+			bit = self.__ships.cellMask(f)
+			if bit & changed:
+				changed &= ~bit
+				updates.append({
+					'field': f,
+					'status': self.__ships.getStatus(bit)
+				})
+		return updates
+
+	def getShips(self):
+		"""
+		Returns all ships.
+
+		Returns:
+			Returns all ships.
+		"""
+
+		return self.__ships.getShips()
+
+	def getShip(self, shipId):
+		"""
+		Returns a specified ship.
+
+		Args:
+		    shipId: the id of the ship
+
+		Returns:
+			Returns a specified ship.
+		"""
+
+		return self.__ships.getShip(shipId)
+
+	def getShipAtPosition(self, field):
+		return self.__ships.getShipAtPosition(field)
+
+	def placeShip(self, bow, rear):
+		"""
+		Places a ship on the playing field.
+
+		Args:
+			bow: bow of the ship
+			rear: rear of the ship
+
+		Return:
+			Returns the id of the newly built ship or -1 if there was any game rule violation. In addition returns if
+			the user has to place more ships.
+		"""
+
+		return self.__ships.add(bow, rear)
+
+	def placeFleet(self, ships):
+		"""
+		Places the whole fleet at once. Either all ships are placed or none of them.
+
+		Args:
+			ships: bow and rear of every ship, ordered by ship id
+
+		Returns:
+			None if the fleet has been placed or the PlacementError together with the id of the first ship that
+			violates the rules (-1 if the fleet as a whole is invalid).
+		"""
+
+		return self.__ships.placeFleet(ships)
+
+	def moreShipsLeftToPlace(self):
+		"""
+		Checks if the player has to place more ships.
+
+		Returns:
+			True if the player has to place more ships or False if not.
+		"""
+
+		return self.__ships.moreShipsLeftToPlace()
+
+	def onAttack(self, params):
+		"""
+		Is called when there is an attack.
+
+		Args:
+		    params: some cool params
+
+		Returns:
+			True if there has been a hit or False if not.
+		"""
+
+		wasSpecialAttack = True if params["was_special_attack"] == "true" else False
+		field = Field(int(params["coordinate_x"]), int(params["coordinate_y"]))
+
+		if wasSpecialAttack:
+			fields = self.__specialAttackFields(field)
+			mask = self.__specialAttackMask(field)
+		else:
+			mask = self.__ships.cellMask(field)
+			fields = [(field, mask)] if mask else []
+
+		playSound = bool(self.__ships.damage(mask, [bit for f, bit in fields]))
+
+		# unfog fields
+		for f, bit in fields:
+			if not bit & self.__fog:
+				self.__ownUnfogged().append(f)
+		self.__fog |= mask
+
+		return playSound
+
+	def unfog(self, field):
+		"""
+		Unfoggs a field.
+
+		Args:
+		    field: the field to unfog
+		"""
+
+		bit = self.__ships.cellMask(field)
+		if bit and not bit & self.__fog:
+			self.__fog |= bit
+			self.__ownUnfogged().append(field)
+
+	def isUnfogged(self, field):
+		"""
+		Validates if a field is unfogged.
+
+		Args:
+		    field: the field to validate
+
+		Returns:
+			True if the field is unfogged or False if not.
+		"""
+
+		return bool(self.__ships.cellMask(field) & self.__fog)
+
+	def getUnfogged(self):
+		"""
+		Returns all unfogged fields as a list.
+
+		Returns:
+			All unfogged fields as a list.
+		"""
+
+		return self.__unfogged
+
+	def isGameOver(self):
+		"""
+		Checks if all ships have been sunken.
+
+		Returns:
+			True if all ships have been sunken or False if not.
+		"""
+
+		return self.__ships.isSunk()
+
+	def getSunkShips(self):
+		"""
+		Returns the ids of all sunken ships in the order they have been sunken.
+
+		Returns:
+			A list of ship ids.
+		"""
+
+		return self.__ships.getSunkShips()
+
+	def damage(self, field):
+		"""
+		Damages the ship part at a field without unfogging it, e.g. to restore a saved game.
+
+		Args:
+		    field: the field of the part
+
+		Returns:
+			True if an undamaged part has been hit or False if not.
+		"""
+
+		return bool(self.__ships.damage(self.__ships.cellMask(field)))
+
+	def getSpecialAttacksLeft(self):
+		"""
+		Returns the number of special attacks the enemy has left on this playing field.
+
+		Returns:
+			The number of special attacks left.
+		"""
+
+		return self.__allowed_attacks
+
+	def setSpecialAttacksLeft(self, count):
+		"""
+		Sets the number of special attacks the enemy has left on this playing field, e.g. to restore a saved game.
+
+		Args:
+		    count: the number of special attacks left
+		"""
+
+		self.__allowed_attacks = count
+
+	def getRuleset(self):
+		"""
+		Returns the rules of the game.
+
+		Returns:
+			The ruleset of the playing field.
+		"""
+
+		return self.__ruleset
+
+	def clone(self):
+		"""
+		Returns a copy of the playing field, e.g. to try moves and attacks without changing the real one. Both share
+		their state until they change it, so cloning costs O(ships). Ships returned by getShip() must not be changed
+		directly.
+
+		Returns:
+			The copy of the playing field.
+		"""
+
+		other = copy.copy(self)
+		other.__ships = self.__ships.clone()
+		self.__unfoggedShared = other.__unfoggedShared = True
+		return other
+
+	def __ownUnfogged(self):
+		if self.__unfoggedShared:
+			self.__unfogged = list(self.__unfogged)
+			self.__unfoggedShared = False
+		return self.__unfogged
+
+	def __specialAttackMask(self, field):
+		return self.__edges.square(field.x, field.y, self.__ruleset.specialAttackSize)
+
+	def __specialAttackFields(self, field):
+		# the fields of a special attack on the board and their bits, in the order PlayingField attacks them
+		fields = []
+		for dx, dy in self.__ruleset.specialAttackArea:
+			f = Field(field.x + dx, field.y + dy)
+			bit = self.__ships.cellMask(f)
+			if bit:
+				fields.append((f, bit))
+		return fields
+
+	def __init__(self, fieldLength, devmode=False, ruleset=None):
+		self.__ruleset = ruleset if ruleset is not None else Ruleset(fieldLength)
+		self.__ships = BitBoardShipList(fieldLength, self.__ruleset)
+		self.__fieldLength = self.__ruleset.fieldLength
+		self.__edges = BoardMasks.get(self.__fieldLength)
+		self.__devmode = devmode
+		# unfogged fields as mask and in the order they have been unfogged
+		self.__fog = 0
+		self.__unfogged = []
+		# True while the list of unfogged fields is shared with a clone
+		self.__unfoggedShared = False
+		self.__allowed_attacks = self.__ruleset.specialAttackCount
@@ -0,0 +1,186 @@
+import random
+from playingfield import Field
+from ruleset import CLASSIC
+
+class FleetGenerator:
+	"""
+	Samples random valid fleets of a ruleset, e.g. for quick placement, bots and simulations.
+
+	Every ship is placed by drawing one of the precomputed placements of its length and checking it against a bit
+	mask of the fields that are already taken, so a fleet costs a few random numbers and integer operations per ship
+	instead of the collision checks of placing the ships on a PlayingField. Fleets are in the form of board_init: a
+	field (x, y) and the direction the ship reaches from there, ordered by ship id.
+
+	Args:
+		ruleset: the rules of the game, the classic rules if None
+		seed: seed of the random numbers, None for a random seed
+	"""
+
+	# boards up to this length keep a mask of every placement, larger ones shift a mask of the ship instead
+	PRECOMPUTED_LENGTH = 32
+
+	# tries to place a single ship before the whole fleet is sampled again
+	TRIES = 100
+
+	def next(self):
+		"""
+		Samples a random valid fleet.
+
+		Returns:
+			A list of (x, y, direction) by ship id.
+		"""
+
+		draw = self.__random.random
+		fleet = [None] * self.__ruleset.shipCount
+
+		while True:
+			occupied = 0
+			for shipId in self.__order:
+				placements = self.__placements[self.__ruleset.shipLengths[shipId]]
+				for i in range(self.TRIES):
+					placement = placements[int(draw() * len(placements))]
+					mask = placement[0]
+					if not mask & occupied:
+						break
+				else:
+					break
+				occupied |= mask
+				fleet[shipId] = placement[1:]
+			else:
+				return fleet
+
+	def fleets(self, count=None):
+		"""
+		Streams random valid fleets.
+
+		Args:
+			count: the number of fleets, endless if None
+
+		Returns:
+			A generator of fleets, see next().
+		"""
+
+		if count is None:
+			while True:
+				yield self.next()
+		for i in range(count):
+			yield self.next()
+
+	def toFields(self, fleet):
+		"""
+		Converts a fleet to the bow and rear of every ship, e.g. to place it on a PlayingField. The field of
+		board_init is the rear of the ship.
+
+		Args:
+			fleet: a fleet of next()
+
+		Returns:
+			A list of (bow, rear) by ship id.
+		"""
+
+		fields = []
+		for shipId, (x, y, direction) in enumerate(fleet):
+			length = self.__ruleset.shipLengths[shipId] - 1
+			if direction == "N":
+				bow = Field(x, y + length)
+			elif direction == "W":
+				bow = Field(x - length, y)
+			elif direction == "S":
+				bow = Field(x, y - length)
+			else:
+				bow = Field(x + length, y)
+			fields.append((bow, Field(x, y)))
+		return fields
+
+	def toParams(self, fleet):
+		"""
+		Converts a fleet to the parameters of a board_init message.
+
+		Args:
+			fleet: a fleet of next()
+
+		Returns:
+			A dictionary of parameters.
+		"""
+
+		params = {}
+		for shipId, (x, y, direction) in enumerate(fleet):
+			params["ship_%s_x" % shipId] = str(x)
+			params["ship_%s_y" % shipId] = str(y)
+			params["ship_%s_direction" % shipId] = direction
+		return params
+
+	def __placementsOf(self, length):
+		"""
+		Computes every placement of a ship on the board, each one with the field at both ends of the ship.
+
+		Args:
+			length: the length of the ship
+
+		Returns:
+			A list of (mask, x, y, direction).
+		"""
+
+		n = self.__ruleset.fieldLength
+		last = length - 1
+		row = (1 << length) - 1
+		column = sum(1 << (i * n) for i in range(length))
+
+		placements = []
+		for y in range(n):
+			for x in range(n - last):
+				mask = row << (y * n + x)
+				placements.append((mask, x, y, "E"))
+				placements.append((mask, x + last, y, "W"))
+		for y in range(n - last):
+			for x in range(n):
+				mask = column << (y * n + x)
+				placements.append((mask, x, y, "N"))
+				placements.append((mask, x, y + last, "S"))
+		return placements
+
+	def __init__(self, ruleset=None, seed=None):
+		self.__ruleset = ruleset if ruleset is not None else CLASSIC
+		self.__random = random.Random(seed)
+
+		# long ships first, they are the hardest to fit in
+		self.__order = sorted(range(self.__ruleset.shipCount), key=lambda shipId: -self.__ruleset.shipLengths[shipId])
+
+		if self.__ruleset.fieldLength <= self.PRECOMPUTED_LENGTH:
+			self.__placements = {length: self.__placementsOf(length) for length, count in self.__ruleset.fleet}
+		else:
+			self.__placements = {length: LazyPlacements(self.__ruleset.fieldLength, length)
+				for length, count in self.__ruleset.fleet}
+
+class LazyPlacements:
+	"""
+	The placements of a ship on a large board, computed when they are drawn. Behaves like the list of placements of
+	FleetGenerator.
+
+	Args:
+		fieldLength: the length of the field in x and y direction
+		length: the length of the ship
+	"""
+
+	def __len__(self):
+		return self.__count * 4
+
+	def __getitem__(self, index):
+		n = self.__fieldLength
+		last = self.__length - 1
+		placement, kind = divmod(index, 4)
+		if kind < 2:
+			y, x = divmod(placement, n - last)
+			mask = self.__row << (y * n + x)
+			return (mask, x, y, "E") if kind == 0 else (mask, x + last, y, "W")
+		y, x = divmod(placement, n)
+		mask = self.__column << (y * n + x)
+		return (mask, x, y, "N") if kind == 2 else (mask, x, y + last, "S")
+
+	def __init__(self, fieldLength, length):
+		self.__fieldLength = fieldLength
+		self.__length = length
+		# placements per direction, the same number horizontally and vertically
+		self.__count = (fieldLength - length + 1) * fieldLength
+		self.__row = (1 << length) - 1
+		self.__column = sum(1 << (i * fieldLength) for i in range(length))
@@ -0,0 +1,160 @@
+import logging, struct
+
+class FrameReader:
+	"""
+	Buffered reader for the length-prefixed protocol (a 2 byte big-endian size header followed by the message body).
+
+	The reader receives into a preallocated buffer and pulls as much as the socket has per syscall, so a single recv
+	usually yields several frames while frames split up by TCP are simply completed by the next recv.
+
+	In large frame mode a size header of 0xFFFF marks a chunk: a 4 byte big-endian size and that many bytes of the
+	message follow and the message continues with the next chunk. The last part of every message is a regular frame,
+	so messages below 64 KiB look exactly the same in both modes.
+
+	Args:
+		sock: the socket to read from
+		bufferSize: the initial size of the receive buffer
+		pending: bytes that have already been received from the socket, but not yet been parsed
+		extended: True if the peer agreed on large frames
+	"""
+
+	HEADER = struct.Struct(">H")
+	CHUNK = 0xFFFF
+	CHUNK_HEADER = struct.Struct(">I")
+
+	def frames(self):
+		"""
+		Yields every complete frame until the peer closes the connection.
+
+		The frames are memoryviews into the receive buffer which are only valid until the next frame is requested.
+		Messages that were split into chunks are handed out as bytes. Socket errors are passed on to the caller.
+
+		Returns:
+			A generator of message bodies without the size header.
+		"""
+
+		header = self.HEADER
+		headerSize = header.size
+
+		while True:
+			# hand out every complete frame that is already in the buffer
+			while self.__end - self.__start >= headerSize:
+				size = header.unpack_from(self.__buffer, self.__start)[0]
+				bodyStart = self.__start + headerSize
+
+				if size == self.CHUNK and self.extended:
+					if self.__end - bodyStart < self.CHUNK_HEADER.size:
+						break
+					size = self.CHUNK_HEADER.unpack_from(self.__buffer, bodyStart)[0]
+					bodyStart += self.CHUNK_HEADER.size
+					if self.__end - bodyStart < size:
+						break
+					self.__start = bodyStart + size
+					self.__chunks.append(bytes(self.__view[bodyStart:self.__start]))
+					continue
+
+				if self.__end - bodyStart < size:
+					break
+				self.__start = bodyStart + size
+
+				if self.__chunks:
+					# the regular frame completes a chunked message
+					self.__chunks.append(self.__view[bodyStart:self.__start])
+					message = b"".join(self.__chunks)
+					self.__chunks = []
+					yield message
+				else:
+					yield self.__view[bodyStart:self.__start]
+
+			self.__compact()
+
+			count = self.__sock.recv_into(self.__view[self.__end:])
+			self.syscalls += 1
+			if count == 0:
+				logging.debug("Peer closed the connection.")
+				return
+			self.__end += count
+
+	def pending(self):
+		"""
+		Returns the bytes that have been received but not been handed out as a frame yet.
+
+		Returns:
+			The received but unparsed bytes.
+		"""
+
+		return bytes(self.__view[self.__start:self.__end])
+
+	def __compact(self):
+		# everything consumed: start over at the beginning of the buffer
+		if self.__start == self.__end:
+			self.__start = self.__end = 0
+			if len(self.__buffer) > self.__bufferSize:
+				# back to the normal size once a large frame is through
+				self.__buffer = bytearray(self.__bufferSize)
+				self.__view = memoryview(self.__buffer)
+			return
+
+		# make sure the next frame fits into the buffer
+		needed = self.__needed()
+		remaining = self.__end - self.__start
+		shrink = len(self.__buffer) > self.__bufferSize and max(needed, remaining) <= self.__bufferSize
+
+		if needed > len(self.__buffer) or shrink:
+			# frames handed out earlier may still reference the old buffer, so it is replaced instead of resized
+			buffer = bytearray(max(needed, self.__bufferSize))
+			buffer[:self.__end - self.__start] = self.__view[self.__start:self.__end]
+			self.__buffer = buffer
+			self.__view = memoryview(buffer)
+			self.__end -= self.__start
+			self.__start = 0
+
+		# move the beginning of a partial frame to the front if there is not enough space left behind it
+		elif self.__start + needed > len(self.__buffer) or self.__end == len(self.__buffer):
+			remaining = self.__end - self.__start
+			self.__view[:remaining] = self.__view[self.__start:self.__end]
+			self.__start = 0
+			self.__end = remaining
+
+	def __needed(self):
+		# size of the next frame or chunk including its headers, as far as it is known yet
+		available = self.__end - self.__start
+		needed = self.HEADER.size
+		if available < needed:
+			return needed
+
+		size = self.HEADER.unpack_from(self.__buffer, self.__start)[0]
+		if size != self.CHUNK or not self.extended:
+			return needed + size
+
+		needed += self.CHUNK_HEADER.size
+		if available < needed:
+			return needed
+		return needed + self.CHUNK_HEADER.unpack_from(self.__buffer, self.__start + self.HEADER.size)[0]
+
+	def __init__(self, sock, bufferSize=4096, pending=b"", extended=False):
+		self.__sock = sock
+		self.__bufferSize = bufferSize
+		self.__buffer = bytearray(max(bufferSize, len(pending)))
+		self.__view = memoryview(self.__buffer)
+		self.__buffer[:len(pending)] = pending
+		self.__start = 0
+		self.__end = len(pending)
+		# chunks of the message that is currently being received
+		self.__chunks = []
+
+		# whether chunks are understood, may be switched on once the peer agreed on large frames
+		self.extended = extended
+
+		# number of recv calls so far
+		self.syscalls = 0
+
+	def bufferSize(self):
+		"""
+		Returns the current size of the receive buffer.
+
+		Returns:
+			The size of the receive buffer in bytes.
+		"""
+
+		return len(self.__buffer)
@@ -1,5 +1,6 @@
 import logging, struct
 from helpers import *
+from framing import FrameReader
 
 class MessageParser:
 	"""
@@ -9,6 +10,8 @@ class MessageParser:
 		Maximilian Hess <mail@maximilianhess.com>
 	"""
 
+	HEADER = struct.Struct(">H")
+
 	def encode(self, type, params):
 		"""
 		Encodes a message.
@@ -21,11 +24,64 @@ class MessageParser:
 			Returns the hexadecimal encoded message size and the message itself as a utf-8 string.
 		"""
 
-		result = "type:%s;" % type
-		for param, value in params.items():
-			result = "%s%s:%s;" % (result, param, value)
+		body = self.encodeBody(type, params)
+		return self.HEADER.pack(len(body)) + body
+
+	def encodeBody(self, type, params):
+		"""
+		Encodes a message without the size header.
+
+		Args:
+			type: the type of the message
+			params: a dictionary of parameters that will be encoded separately
+
+		Returns:
+			Returns the utf-8 encoded message body.
+		"""
+
+		# collect the fields and join them once, the message is built in linear time
+		fields = ["type:%s;" % type]
+		fields.extend(["%s:%s;" % field for field in params.items()])
+		return "".join(fields).encode("UTF-8")
+
+	def encodeChunks(self, type, params, chunkSize=FrameReader.CHUNK - 1):
+		"""
+		Encodes a message piece by piece for the large frame mode.
+
+		Messages below 64 KiB result in a single regular frame that every peer understands. Larger ones are split into
+		chunks (see FrameReader) that are encoded while the previous ones are already handed out, so the message is never
+		built as a whole.
+
+		Args:
+			type: the type of the message
+			params: a dictionary of parameters that will be encoded separately
+			chunkSize: the maximum size of a chunk, must be below 0xFFFF
+
+		Returns:
+			A generator of encoded chunks, the last one being a regular frame.
+		"""
+
+		chunkHeader = self.HEADER.pack(FrameReader.CHUNK)
+		fields = [("type:%s;" % type).encode("UTF-8")]
+		size = len(fields[0])
 
-		return struct.pack('>H', len(result)) + b(result)
+		for field in params.items():
+			field = ("%s:%s;" % field).encode("UTF-8")
+			if fields and size + len(field) > chunkSize:
+				# the chunk is full, hand it out and start the next one
+				yield chunkHeader + FrameReader.CHUNK_HEADER.pack(size) + b"".join(fields)
+				fields = []
+				size = 0
+			fields.append(field)
+			size += len(field)
+
+			if size > chunkSize:
+				# a single field that does not even fit into a chunk of its own
+				yield chunkHeader + FrameReader.CHUNK_HEADER.pack(size) + field
+				fields = []
+				size = 0
+
+		yield self.HEADER.pack(size) + b"".join(fields)
 
 	def decode(self, message):
 		"""
@@ -38,18 +94,24 @@ class MessageParser:
 			Returns the type of the message and the parameters as a dictionary.
 		"""
 
-		messageType = None
 		params = {}
-		tuples = message.split(";")
-		for t in tuples:
-			if t is not "":
-				tokens = t.split(":")
-				if tokens[0].strip() == "type":
-					messageType = tokens[1].strip()
-				else:
-					try:
-						params[tokens[0].strip()] = tokens[1].strip()
-					except IndexError:
-						params[tokens[0].strip()] = None
-
-		return messageType, params
+		for t in message.split(";"):
+			if t:
+				key, separator, value = t.partition(":")
+				params[key.strip()] = value.strip() if separator else None
+
+		return params.pop("type", None), params
+
+	def decodeFrame(self, frame):
+		"""
+		Decodes a message body straight from the receive buffer.
+
+		Args:
+			frame: the message body without the size header as bytes or memoryview
+
+		Returns:
+			Returns the type of the message and the parameters as a dictionary.
+		"""
+
+		# decoding the buffer in one go is cheaper than decoding every token on its own
+		return self.decode(str(frame, "UTF-8"))
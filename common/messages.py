@@ -8,3 +8,5 @@ NUKE = 'special_attack'
 MOVE = 'move'
 SURRENDER = 'surrender'
 CHAT_SEND = 'chat_send'
+LOBBY_ACK = 'lobby_ack'
+LARGE_FRAMES = 'large_frames'
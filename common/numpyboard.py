@@ -0,0 +1,929 @@
+import copy
+import logging
+import numpy
+from playingfield import Field, Ship, FieldStatus, Orientation, PlacementError, conditionCodes
+from ruleset import Ruleset
+
+# cell states of own playing fields, the values index STATUSES
+WATER       = 0
+SHIP        = 1
+DAMAGEDSHIP = 2
+STATUSES    = (FieldStatus.WATER, FieldStatus.SHIP, FieldStatus.DAMAGEDSHIP)
+
+# cell states of enemy playing fields, the values index ENEMY_STATUSES
+ENEMY_STATUSES = (FieldStatus.FOG, FieldStatus.WATER, FieldStatus.SHIP, FieldStatus.DAMAGEDSHIP)
+ENEMY_CODES    = {status: code for code, status in enumerate(ENEMY_STATUSES)}
+
+class NumpyShipList:
+	"""
+	Manages all ships on the playing field as NumPy grids. Drop-in replacement for ShipList: the ships are still
+	available as Ship objects, but placement, collision and move checks are done on a grid of cell states and a grid of
+	ship ids, both indexed [x, y].
+
+	Args:
+		fieldLength: the length of the field in x and y direction
+		ruleset: the rules of the game, the classic rules on a field of fieldLength if None
+	"""
+
+	def onBoard(self, field):
+		"""
+		Validates if a field is on the board.
+
+		Args:
+			field: the field
+
+		Returns:
+			True if the field is on the board or False if not.
+		"""
+
+		return 0 <= field.x < self.__fieldLength and 0 <= field.y < self.__fieldLength
+
+	def getCells(self):
+		"""
+		Returns the grid of cell states.
+
+		Returns:
+			The uint8 grid of WATER, SHIP and DAMAGEDSHIP indexed [x, y].
+		"""
+
+		return self.__cells
+
+	def getFieldStatus(self, field):
+		"""
+		Returns the status of a field.
+
+		Args:
+		    field: the field
+
+		Returns:
+			The status of the field.
+		"""
+
+		if not self.onBoard(field):
+			return FieldStatus.WATER, None
+
+		shipId = self.__ids[field.x, field.y]
+		if shipId < 0:
+			return FieldStatus.WATER, None
+		return STATUSES[self.__cells[field.x, field.y]], self.__ships[shipId]
+
+	def getShipAtPosition(self, field):
+		"""
+		Returns the id of the ship at a given position.
+
+		Args:
+		    field: the field
+
+		Returns:
+			The id of the ship or -1 if there is no ship at this position.
+		"""
+
+		if not self.onBoard(field):
+			return -1
+		return int(self.__ids[field.x, field.y])
+
+	def getShips(self):
+		"""
+		Returns a list of all Ships.
+
+		Return:
+			Returns a list of all Ships.
+		"""
+
+		return [ship for ship in self.__ships if ship is not None]
+
+	def getShip(self, shipId):
+		"""
+		Returns a specified ship from the own playing field.
+
+		Args:
+			shipId: the id of the ship
+
+		Returns:
+			Returns a specified ship from the own playing field.
+		"""
+
+		return self.__ships[shipId]
+
+	def damage(self, area):
+		"""
+		Damages all ship parts within an area of the board.
+
+		Args:
+			area: a tuple of slices of the grid
+
+		Returns:
+			The mask of the area's parts that have not been damaged before.
+		"""
+
+		hits = self.__cells[area] == SHIP
+		if hits.any():
+			self.__ownGrids()
+			self.__cells[area][hits] = DAMAGEDSHIP
+			ids = self.__ids[area]
+			for i, j in zip(*numpy.nonzero(hits)):
+				x = area[0].start + int(i)
+				y = area[1].start + int(j)
+				shipId = int(ids[i, j])
+				ship = self.__ownShip(shipId)
+				ship.addDamage(Field(x, y))
+				self.__intact -= 1
+				if ship.isSunk():
+					self.__sunk.append(shipId)
+		return hits
+
+	def isSunk(self):
+		"""
+		Checks if the whole fleet has been placed and sunken.
+
+		Returns:
+			True if all ships have been sunken or False if not.
+		"""
+
+		return self.__intact == 0 and not self.moreShipsLeftToPlace()
+
+	def getSunkShips(self):
+		"""
+		Returns the ids of all sunken ships in the order they have been sunken.
+
+		Returns:
+			A list of ship ids.
+		"""
+
+		return self.__sunk
+
+	def movePossible(self, shipId, direction):
+		"""
+		Validates if the move of a ship is possible.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction
+
+		Returns:
+			True if the move is possible or False if not.
+		"""
+
+		if not (0 <= shipId < len(self.__ships)) or self.__ships[shipId] is None:
+			return False
+
+		ship = self.__ships[shipId]
+		if not (self.__cells[self.__area(ship.bow, ship.rear)] == SHIP).any():
+			return False
+
+		moved = self.__shift(ship, direction)
+		if moved is None:
+			return False
+
+		ids = self.__ids[self.__area(*moved)]
+		return bool(((ids == -1) | (ids == shipId)).all())
+
+	def move(self, shipId, direction):
+		"""
+		Moves a given ship to a given direction.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction
+		"""
+
+		ship = self.__ownShip(shipId)
+		moved = self.__shift(ship, direction)
+		if moved is None:
+			logging.error("Ship %s cannot leave the playing field." % shipId)
+			return
+
+		# damages move along with the ship
+		self.__ownGrids()
+		old = self.__area(ship.bow, ship.rear)
+		cells = self.__cells[old].copy()
+		self.__cells[old] = WATER
+		self.__ids[old] = -1
+
+		new = self.__area(*moved)
+		self.__cells[new] = cells
+		self.__ids[new] = shipId
+
+		ship.move(moved[0], moved[1], direction)
+
+	def moreShipsLeftToPlace(self):
+		"""
+		Checks if the user has to place more ships.
+
+		Returns:
+			Returns True if all ships have been placed or False if not.
+		"""
+
+		return self.__placed < len(self.__ships)
+
+	def add(self, bow, rear):
+		"""
+		Adds a new Ship to the playing field. Validates if the maximum count of this kind of ship is reached.
+
+		Args:
+			bow: the bow of the Ship to add
+			rear: the rear of the Ship to add
+
+		Return:
+			Returns the id of the newly built ship or -1 if there was any game rule violation. In addition returns if
+			the user has to place more ships.
+		"""
+
+		error, length = self.__testShipPlacement(bow, rear)
+		if error is not None:
+			return -1, True
+
+		# first free slot of this kind of ship
+		for shipId in self.__ruleset.getShipIds(length):
+			if self.__ships[shipId] is None:
+				break
+		else:
+			return -1, self.moreShipsLeftToPlace()
+
+		self.__place(shipId, bow, rear, length)
+
+		return shipId, self.moreShipsLeftToPlace()
+
+	def placeFleet(self, ships):
+		"""
+		Places the whole fleet at once. Either all ships are placed or none of them.
+
+		Args:
+			ships: bow and rear of every ship, ordered by ship id
+
+		Returns:
+			None if the fleet has been placed or the PlacementError. In addition returns the id of the first ship
+			that violates the rules or -1 if the fleet as a whole is invalid.
+		"""
+
+		if self.__placed:
+			return PlacementError.ALREADY_PLACED, -1
+		if len(ships) != len(self.__ships):
+			return PlacementError.FLEET_SIZE, -1
+
+		lengths = []
+		occupied = numpy.zeros(self.__cells.shape, dtype=bool)
+		for shipId, (bow, rear) in enumerate(ships):
+			error, length = self.__testShipPlacement(bow, rear, occupied)
+			if error is None and length != self.__ruleset.getShipLength(shipId):
+				logging.error("Ship %s does not have the length of its id." % shipId)
+				error = PlacementError.WRONG_LENGTH
+			if error is not None:
+				return error, shipId
+			lengths.append(length)
+			occupied[self.__area(bow, rear)] = True
+
+		for shipId, (bow, rear) in enumerate(ships):
+			self.__place(shipId, bow, rear, lengths[shipId])
+
+		return None, -1
+
+	def getCarrierCount(self):
+		"""
+		Returns the count of carriers currently on the field.
+
+		Returns:
+			The count of carriers currently on the field.
+		"""
+
+		return self.__counts.get(5, 0)
+
+	def getBattleshipCount(self):
+		"""
+		Returns the count of battleships currently on the field.
+
+		Returns:
+			The count of battleships currently on the field.
+		"""
+
+		return self.__counts.get(4, 0)
+
+	def getCruiserCount(self):
+		"""
+		Returns the count of cruisers currently on the field.
+
+		Returns:
+			The count of cruisers currently on the field.
+		"""
+
+		return self.__counts.get(3, 0)
+
+	def getDestroyerCount(self):
+		"""
+		Returns the count of destroyers currently on the field.
+
+		Returns:
+			The count of destroyers currently on the field.
+		"""
+
+		return self.__counts.get(2, 0)
+
+	def getShipCount(self):
+		"""
+		Returns the count of ships currently on the field.
+
+		Returns:
+			The count of ships currently on the field.
+		"""
+
+		return self.__placed
+
+	def __area(self, bow, rear):
+		return (slice(min(bow.x, rear.x), max(bow.x, rear.x) + 1),
+				slice(min(bow.y, rear.y), max(bow.y, rear.y) + 1))
+
+	def __shift(self, ship, direction):
+		if direction is Orientation.NORTH:
+			dx, dy = 0, 1
+		elif direction is Orientation.SOUTH:
+			dx, dy = 0, -1
+		elif direction is Orientation.WEST:
+			dx, dy = -1, 0
+		elif direction is Orientation.EAST:
+			dx, dy = 1, 0
+		else:
+			return None
+
+		bow = Field(ship.bow.x + dx, ship.bow.y + dy)
+		rear = Field(ship.rear.x + dx, ship.rear.y + dy)
+		if not (self.onBoard(bow) and self.onBoard(rear)):
+			return None
+		return bow, rear
+
+	def __place(self, shipId, bow, rear, length):
+		self.__ownGrids()
+		area = self.__area(bow, rear)
+		self.__cells[area] = SHIP
+		self.__ids[area] = shipId
+		self.__ships[shipId] = Ship(bow, rear)
+		self.__owned[shipId] = True
+		self.__counts[length] += 1
+		self.__placed += 1
+		self.__intact += length
+
+	def __testShipPlacement(self, bow, rear, occupied=None):
+		# check if the length of the potential ship is valid
+		if bow.x == rear.x:
+			length = abs(bow.y - rear.y) + 1
+		else:
+			length = abs(bow.x - rear.x) + 1
+
+		if not self.__ruleset.getShipIds(length):
+			logging.error("This type of ship does not exist.")
+			return PlacementError.UNKNOWN_SHIP, length
+
+		# check if the ship is diagonal
+		if not (bow.x == rear.x or bow.y == rear.y):
+			logging.error("Diagonal ship!")
+			return PlacementError.DIAGONAL, length
+
+		# check playing field borders
+		if not (self.onBoard(bow) and self.onBoard(rear)):
+			logging.error("Collision with border!")
+			return PlacementError.BORDER, length
+
+		# check for collisions with previously placed ships or the given occupancy grid
+		area = self.__area(bow, rear)
+		if (self.__ids[area] != -1).any() if occupied is None else occupied[area].any():
+			logging.error("Collision with ship!")
+			return PlacementError.COLLISION, length
+
+		return None, length
+
+	def clone(self):
+		"""
+		Returns a copy of the ship list. Both share the grids and all ships until they change them.
+
+		Returns:
+			The copy of the ship list.
+		"""
+
+		other = copy.copy(self)
+		other.__ships = list(self.__ships)
+		other.__counts = dict(self.__counts)
+		other.__sunk = list(self.__sunk)
+		self.__gridsShared = other.__gridsShared = True
+		self.__owned = [False] * len(self.__ships)
+		other.__owned = [False] * len(self.__ships)
+		return other
+
+	def __ownShip(self, shipId):
+		if not self.__owned[shipId]:
+			self.__ships[shipId] = self.__ships[shipId].copy()
+			self.__owned[shipId] = True
+		return self.__ships[shipId]
+
+	def __ownGrids(self):
+		if self.__gridsShared:
+			self.__cells = self.__cells.copy()
+			self.__ids = self.__ids.copy()
+			self.__gridsShared = False
+
+	def __init__(self, fieldLength, ruleset=None):
+		self.__ruleset = ruleset if ruleset is not None else Ruleset(fieldLength)
+		self.__fieldLength = n = self.__ruleset.fieldLength
+
+		self.__ships = [None] * self.__ruleset.shipCount
+		self.__counts = {length: 0 for length, count in self.__ruleset.fleet}
+		self.__placed = 0
+
+		# undamaged parts of all placed ships and the ids of sunken ships
+		self.__intact = 0
+		self.__sunk = []
+
+		self.__cells = numpy.zeros((n, n), dtype=numpy.uint8)
+		self.__ids = numpy.full((n, n), -1, dtype=numpy.int8 if self.__ruleset.shipCount < 128 else numpy.int32)
+
+		# copy-on-write state of clones: the grids and ships that are not owned are shared with another ship list
+		self.__gridsShared = False
+		self.__owned = [True] * self.__ruleset.shipCount
+
+class NumpyPlayingField:
+	"""
+	A complete playing field that consists of 16x16 fields, backed by NumPy grids. Same public API as PlayingField.
+
+	Args:
+		length: the dimension of playing field
+		devmode: developer mode
+		ruleset: the rules of the game, the classic rules on a field of length if None
+	"""
+
+	def attack(self, field):
+		"""
+		The enemy attacks a field.
+
+		Args:
+		    field: the field the enemy attacks
+
+		Returns:
+			Returns the status of the field after the attack together with True if it changed or False if not.
+		"""
+
+		if not self.__ships.onBoard(field):
+			return FieldStatus.WATER, False
+
+		area = (slice(field.x, field.x + 1), slice(field.y, field.y + 1))
+		updated = bool(self.__ships.damage(area).any())
+
+		# unfog field
+		if not self.__fog[field.x, field.y]:
+			updated = True
+			self.__ownFog()
+			self.__fog[field.x, field.y] = True
+
+		return STATUSES[self.__ships.getCells()[field.x, field.y]], updated
+
+	def specialAttack(self, field):
+		"""
+		The enemy attacks a lot of fields.
+
+		Args:
+		    field: the most significant field
+
+		Returns:
+			A dictionary of fields and statuses that have been updated. Keys are 'field' and 'status'.
+		"""
+
+		# special attacks left
+		if self.__allowed_attacks == 0:
+			return False
+		self.__allowed_attacks -= 1
+
+		area = self.__specialAttackArea(field, self.__ruleset.specialAttackSize)
+		hits = self.__ships.damage(area)
+		self.__ownFog()
+		fog = self.__fog[area]
+		changed = hits | ~fog
+		fog[...] = True
+
+		cells = self.__ships.getCells()[area]
+		updates = []
+		for i, j in zip(*numpy.nonzero(changed)):
+			updates.append({
+				'field': Field(area[0].start + int(i), area[1].start + int(j)),
+				'status': STATUSES[cells[i, j]]
+			})
+
+		return updates
+
+	def movePossible(self, shipId, direction):
+		"""
+		Validates if a move of a given ship to a given direction is possible.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction
+
+		Returns:
+			True if the move is possible or False if not.
+		"""
+
+		return self.__ships.movePossible(shipId, direction)
+
+	def move(self, shipId, direction):
+		"""
+		Moves a ship.
+
+		Args:
+		    shipId: the id of the ship
+		    direction: the direction of the ship
+
+		Returns:
+		    A dictionary of fields and statuses that have been updated and are unfogged. Keys are 'field' and 'status'.
+		"""
+
+		oldfields = self.getShip(shipId).parts
+		self.__ships.move(shipId, direction)
+		newfields = self.getShip(shipId).parts
+
+		# merge old and new fields
+		fields = newfields + [f for f in oldfields if f not in newfields]
+
+		cells = self.__ships.getCells()
+		updates = []
+		for f in fields:
+			if self.__fog[f.x, f.y]:
+				updates.append({
+					'field': f,
+					'status': STATUSES[cells[f.x, f.y]]
+				})
+		return updates
+
+	def getShips(self):
+		"""
+		Returns all ships.
+
+		Returns:
+			Returns all ships.
+		"""
+
+		return self.__ships.getShips()
+
+	def getShip(self, shipId):
+		"""
+		Returns a specified ship.
+
+		Args:
+		    shipId: the id of the ship
+
+		Returns:
+			Returns a specified ship.
+		"""
+
+		return self.__ships.getShip(shipId)
+
+	def getShipAtPosition(self, field):
+		return self.__ships.getShipAtPosition(field)
+
+	def placeShip(self, bow, rear):
+		"""
+		Places a ship on the playing field.
+
+		Args:
+			bow: bow of the ship
+			rear: rear of the ship
+
+		Return:
+			Returns the id of the newly built ship or -1 if there was any game rule violation. In addition returns if
+			the user has to place more ships.
+		"""
+
+		return self.__ships.add(bow, rear)
+
+	def placeFleet(self, ships):
+		"""
+		Places the whole fleet at once. Either all ships are placed or none of them.
+
+		Args:
+			ships: bow and rear of every ship, ordered by ship id
+
+		Returns:
+			None if the fleet has been placed or the PlacementError together with the id of the first ship that
+			violates the rules (-1 if the fleet as a whole is invalid).
+		"""
+
+		return self.__ships.placeFleet(ships)
+
+	def moreShipsLeftToPlace(self):
+		"""
+		Checks if the player has to place more ships.
+
+		Returns:
+			True if the player has to place more ships or False if not.
+		"""
+
+		return self.__ships.moreShipsLeftToPlace()
+
+	def onAttack(self, params):
+		"""
+		Is called when there is an attack.
+
+		Args:
+		    params: some cool params
+
+		Returns:
+			True if there has been a hit or False if not.
+		"""
+
+		wasSpecialAttack = True if params["was_special_attack"] == "true" else False
+		field = Field(int(params["coordinate_x"]), int(params["coordinate_y"]))
+		area = self.__specialAttackArea(field, self.__ruleset.specialAttackSize if wasSpecialAttack else 1)
+		playSound = bool(self.__ships.damage(area).any())
+
+		# unfog fields
+		self.__ownFog()
+		self.__fog[area] = True
+
+		return playSound
+
+	def unfog(self, field):
+		"""
+		Unfoggs a field.
+
+		Args:
+		    field: the field to unfog
+		"""
+
+		if self.__ships.onBoard(field):
+			self.__ownFog()
+			self.__fog[field.x, field.y] = True
+
+	def isUnfogged(self, field):
+		"""
+		Validates if a field is unfogged.
+
+		Args:
+		    field: the field to validate
+
+		Returns:
+			True if the field is unfogged or False if not.
+		"""
+
+		return self.__ships.onBoard(field) and bool(self.__fog[field.x, field.y])
+
+	def getUnfogged(self):
+		"""
+		Returns all unfogged fields as a set.
+
+		Returns:
+			All unfogged fields as a set.
+		"""
+
+		return set(Field(int(x), int(y)) for x, y in zip(*numpy.nonzero(self.__fog)))
+
+	def getGrids(self):
+		"""
+		Returns the grids of the playing field, e.g. to stack them into a BoardBatch.
+
+		Returns:
+			The grid of cell states and the grid of unfogged fields.
+		"""
+
+		return self.__ships.getCells(), self.__fog
+
+	def isGameOver(self):
+		"""
+		Checks if all ships have been sunken.
+
+		Returns:
+			True if all ships have been sunken or False if not.
+		"""
+
+		return self.__ships.isSunk()
+
+	def getSunkShips(self):
+		"""
+		Returns the ids of all sunken ships in the order they have been sunken.
+
+		Returns:
+			A list of ship ids.
+		"""
+
+		return self.__ships.getSunkShips()
+
+	def damage(self, field):
+		"""
+		Damages the ship part at a field without unfogging it, e.g. to restore a saved game.
+
+		Args:
+		    field: the field of the part
+
+		Returns:
+			True if an undamaged part has been hit or False if not.
+		"""
+
+		if not self.__ships.onBoard(field):
+			return False
+		return bool(self.__ships.damage((slice(field.x, field.x + 1), slice(field.y, field.y + 1))).any())
+
+	def getSpecialAttacksLeft(self):
+		"""
+		Returns the number of special attacks the enemy has left on this playing field.
+
+		Returns:
+			The number of special attacks left.
+		"""
+
+		return self.__allowed_attacks
+
+	def setSpecialAttacksLeft(self, count):
+		"""
+		Sets the number of special attacks the enemy has left on this playing field, e.g. to restore a saved game.
+
+		Args:
+		    count: the number of special attacks left
+		"""
+
+		self.__allowed_attacks = count
+
+	def getRuleset(self):
+		"""
+		Returns the rules of the game.
+
+		Returns:
+			The ruleset of the playing field.
+		"""
+
+		return self.__ruleset
+
+	def clone(self):
+		"""
+		Returns a copy of the playing field, e.g. to try moves and attacks without changing the real one. Both share
+		their state until they change it, so cloning costs O(ships). Ships returned by getShip() must not be changed
+		directly.
+
+		Returns:
+			The copy of the playing field.
+		"""
+
+		other = copy.copy(self)
+		other.__ships = self.__ships.clone()
+		self.__fogShared = other.__fogShared = True
+		return other
+
+	def __ownFog(self):
+		if self.__fogShared:
+			self.__fog = self.__fog.copy()
+			self.__fogShared = False
+
+	def __specialAttackArea(self, field, size):
+		# the square clipped to the board, negative bounds would count from the other end of the grid
+		return (slice(max(field.x, 0), max(field.x + size, 0)), slice(max(field.y, 0), max(field.y + size, 0)))
+
+	def __init__(self, fieldLength, devmode=False, ruleset=None):
+		self.__ruleset = ruleset if ruleset is not None else Ruleset(fieldLength)
+		self.__ships = NumpyShipList(fieldLength, self.__ruleset)
+		self.__fieldLength = self.__ruleset.fieldLength
+		self.__devmode = devmode
+		self.__fog = numpy.zeros((self.__fieldLength, self.__fieldLength), dtype=bool)
+		# True while the fog is shared with a clone
+		self.__fogShared = False
+		self.__allowed_attacks = self.__ruleset.specialAttackCount
+
+class NumpyEnemyPlayingField:
+	"""
+	Represents the playing field of an enemy, backed by a NumPy grid. Same public API as EnemyPlayingField.
+
+	Args:
+	    fieldLength: the length of the field in x and y direction
+	"""
+
+	def getField(self):
+		"""
+		Returns the complete playing field as a two-dimensional list.
+
+		Returns:
+			The complete playing field as a two-dimensional list.
+		"""
+
+		return [[ENEMY_STATUSES[code] for code in column] for column in self.__fields.tolist()]
+
+	def getGrid(self):
+		"""
+		Returns the grid of the playing field.
+
+		Returns:
+			The uint8 grid of ENEMY_STATUSES indices indexed [x, y].
+		"""
+
+		return self.__fields
+
+	def getUnfogged(self):
+		"""
+		Returns all unfogged fields as a list.
+
+		Returns:
+			All unfogged fields as a list.
+		"""
+
+		return self.__unfogged
+
+	def onAttack(self, params):
+		"""
+		Is called when there is an attack.
+
+		Args:
+		    params: some cool params
+		"""
+
+		count = int(params["number_of_updated_fields"])
+		xs = numpy.fromiter((int(params["field_%s_x" % i]) for i in range(count)), dtype=numpy.intp, count=count)
+		ys = numpy.fromiter((int(params["field_%s_y" % i]) for i in range(count)), dtype=numpy.intp, count=count)
+		codes = numpy.fromiter((ENEMY_CODES[conditionCodes[params["field_%s_condition" % i]]] for i in range(count)),
+			dtype=numpy.uint8, count=count)
+		logging.debug("Update at %s enemy fields" % count)
+		self.__fields[xs, ys] = codes
+
+	def __init__(self, fieldLength):
+		self.__fieldLength = fieldLength
+		self.__unfogged = []
+
+		# fill with fog everywhere
+		self.__fields = numpy.full((fieldLength, fieldLength), ENEMY_CODES[FieldStatus.FOG], dtype=numpy.uint8)
+
+class BoardBatch:
+	"""
+	The grids of many playing fields stacked into arrays for simulations and analytics. Attacks are applied to the
+	stacked grids only, the Ship objects of the original playing fields are not updated.
+
+	Args:
+		fields: the NumpyPlayingFields to stack
+	"""
+
+	def attack(self, boards, xs, ys):
+		"""
+		Attacks one field on each of the given boards.
+
+		Args:
+			boards: array of board indices
+			xs: array of x coordinates
+			ys: array of y coordinates
+
+		Returns:
+			Array of the cell states after the attacks, WATER for fields that are not on the board.
+		"""
+
+		valid, b, x, y = self.__onBoard(boards, xs, ys)
+		cells = self.cells[b, x, y]
+		cells[cells == SHIP] = DAMAGEDSHIP
+		self.cells[b, x, y] = cells
+		self.fog[b, x, y] = True
+
+		result = numpy.zeros(valid.shape, dtype=numpy.uint8)
+		result[valid] = cells
+		return result
+
+	def specialAttack(self, boards, xs, ys):
+		"""
+		Attacks the special attack area starting at a field on each of the given boards.
+
+		Args:
+			boards: array of board indices
+			xs: array of x coordinates of the most significant fields
+			ys: array of y coordinates of the most significant fields
+
+		Returns:
+			Array of the number of ship parts hit by every attack. Attacks are evaluated against the grids before the
+			call, so a part within two overlapping areas counts for both.
+		"""
+
+		boards = numpy.asarray(boards)
+		xs = numpy.asarray(xs)[:, None] + self.__areaX
+		ys = numpy.asarray(ys)[:, None] + self.__areaY
+		boards = numpy.broadcast_to(boards[:, None], xs.shape)
+
+		valid, b, x, y = self.__onBoard(boards, xs, ys)
+		hit = self.cells[b, x, y] == SHIP
+		self.cells[b[hit], x[hit], y[hit]] = DAMAGEDSHIP
+		self.fog[b, x, y] = True
+
+		hits = numpy.zeros(valid.shape, dtype=bool)
+		hits[valid] = hit
+		return hits.sum(axis=1)
+
+	def isGameOver(self):
+		"""
+		Checks on which boards all ships have been sunken.
+
+		Returns:
+			Boolean array with one entry per board.
+		"""
+
+		return self.__complete & ~(self.cells == SHIP).any(axis=(1, 2))
+
+	def __onBoard(self, boards, xs, ys):
+		boards, xs, ys = numpy.asarray(boards), numpy.asarray(xs), numpy.asarray(ys)
+		n = self.cells.shape[1]
+		valid = (xs >= 0) & (xs < n) & (ys >= 0) & (ys < n)
+		return valid, boards[valid], xs[valid], ys[valid]
+
+	def __init__(self, fields):
+		grids = [f.getGrids() for f in fields]
+		self.cells = numpy.stack([cells for cells, fog in grids])
+		self.fog = numpy.stack([fog for cells, fog in grids])
+		self.__complete = numpy.array([not f.moreShipsLeftToPlace() for f in fields], dtype=bool)
+
+		# offsets of the special attack area, the boards share the ruleset of the first one
+		area = fields[0].getRuleset().specialAttackArea
+		self.__areaX = numpy.array([dx for dx, dy in area])
+		self.__areaY = numpy.array([dy for dx, dy in area])
@@ -1,5 +1,7 @@
+import copy
 import logging
 from enum import Enum
+from ruleset import Ruleset, rulesets
 
 class Orientation(Enum):
 	"""
@@ -27,6 +29,19 @@ class FieldStatus(Enum):
 	SHIP = "ship"
 	DAMAGEDSHIP = "damagedship"
 
+class PlacementError(Enum):
+	"""
+	The reasons a ship cannot be placed.
+	"""
+
+	UNKNOWN_SHIP   = "there is no ship of this length in the fleet"
+	WRONG_LENGTH   = "the ship does not have the length of its id"
+	DIAGONAL       = "the ship is diagonal"
+	BORDER         = "the ship collides with the border"
+	COLLISION      = "the ship collides with another ship"
+	FLEET_SIZE     = "the fleet does not have the number of ships of the ruleset"
+	ALREADY_PLACED = "there are ships on the field already"
+
 conditionCodes = {
 	"free":      FieldStatus.WATER,
 	"damaged":   FieldStatus.DAMAGEDSHIP,
@@ -37,6 +52,10 @@ class Field:
 	"""
 	Describes a single field on the playing field.
 
+	Fields are immutable values that can be compared, hashed and put into sets. There is only one instance per
+	coordinate below Field.INTERNED, which covers the boards of all rulesets in ruleset.rulesets, so creating a field on
+	them does not allocate anything. Fields further out are created on demand and only compare equal.
+
 	Author:
 		Maximilian Hess <mail@maximilianhess.com>
 
@@ -45,6 +64,12 @@ class Field:
 		y: vertical coordinate starting in the top left corner
 	"""
 
+	__slots__ = ("x", "y")
+
+	# coordinates from 0 up to this bound are interned, enough for the largest configured board
+	INTERNED = max(ruleset.fieldLength for ruleset in rulesets.values())
+	__interned = [None] * (INTERNED * INTERNED)
+
 	def toString(self):
 		return ("%s%s") % (chr(self.x + 65), str(self.y + 1))
 
@@ -53,11 +78,45 @@ class Field:
 		Standard equals method.
 		"""
 
-		return (otherField.x is self.x and otherField.y is self.y)
+		return self == otherField
+
+	def __eq__(self, other):
+		return self is other or (isinstance(other, Field) and self.x == other.x and self.y == other.y)
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash((self.x, self.y))
+
+	def __repr__(self):
+		return "Field(%s, %s)" % (self.x, self.y)
+
+	def __setattr__(self, name, value):
+		raise AttributeError("Field is immutable")
+
+	def __reduce__(self):
+		return (Field, (self.x, self.y))
 
-	def __init__(self, x, y):
-		self.x = int(x)
-		self.y = int(y)
+	def __new__(cls, x, y):
+		x = int(x)
+		y = int(y)
+
+		if 0 <= x < Field.INTERNED and 0 <= y < Field.INTERNED:
+			index = x * Field.INTERNED + y
+			field = Field.__interned[index]
+			if field is None:
+				field = Field.__interned[index] = Field.__create(x, y)
+			return field
+
+		return Field.__create(x, y)
+
+	@staticmethod
+	def __create(x, y):
+		field = object.__new__(Field)
+		object.__setattr__(field, "x", x)
+		object.__setattr__(field, "y", y)
+		return field
 
 def splitShip(bow, rear):
 	"""
@@ -74,7 +133,7 @@ def splitShip(bow, rear):
 	result = []
 
 	# horizontal orientation
-	if bow.y is rear.y:
+	if bow.y == rear.y:
 		if rear.x > bow.x:
 			for i in range(bow.x, rear.x + 1):
 				result.append(Field(i, bow.y))
@@ -83,7 +142,7 @@ def splitShip(bow, rear):
 				result.append(Field(i, bow.y))
 
 	# vertical orientation
-	if bow.x is rear.x:
+	if bow.x == rear.x:
 		if rear.y > bow.y:
 			for i in range(bow.y, rear.y + 1):
 				result.append(Field(bow.x, i))
@@ -111,11 +170,16 @@ class Ship:
 
 		Args:
 		    part: the part
-		"""
 
+		Returns:
+			True if the part has not been damaged before or False if it has.
+		"""
 
-		# we do need a copy here
-		self.damages.append(Field(part.x, part.y))
+		if part in self.damages:
+			return False
+		self.damages.add(part)
+		self.sunk = len(self.damages) == len(self.parts)
+		return True
 
 	def isDamaged(self, part):
 		"""
@@ -128,10 +192,17 @@ class Ship:
 
 		"""
 
-		for damage in self.damages:
-			if damage.equals(part):
-				return True
-		return False
+		return part in self.damages
+
+	def isSunk(self):
+		"""
+		Validates if all parts of the ship are damaged.
+
+		Returns:
+			True if the ship has been sunken or False if not.
+		"""
+
+		return self.sunk
 
 	def getLength(self):
 		"""
@@ -153,6 +224,19 @@ class Ship:
 		for i in range(1, len(self.parts) - 1):
 			self.middles.append(self.parts[i])
 
+	def copy(self):
+		"""
+		Returns a copy of the ship that can be damaged and moved without changing this one.
+
+		Returns:
+			The copy of the ship.
+		"""
+
+		# fields are immutable and the lists of parts are replaced on every move, only damages change in place
+		ship = copy.copy(self)
+		ship.damages = set(self.damages)
+		return ship
+
 	def move(self, bowNew, rearNew, direction):
 		"""
 		Moves the ship.
@@ -166,19 +250,19 @@ class Ship:
 		self.__initShip(bowNew, rearNew)
 
 		# move damages
-		for damage in self.damages:
-			if direction is Orientation.NORTH:
-				damage.y += 1
-			elif direction is Orientation.WEST:
-				damage.x -= 1
-			elif direction is Orientation.SOUTH:
-				damage.y -= 1
-			elif direction is Orientation.EAST:
-				damage.x += 1
+		if direction is Orientation.NORTH:
+			self.damages = set(Field(d.x, d.y + 1) for d in self.damages)
+		elif direction is Orientation.WEST:
+			self.damages = set(Field(d.x - 1, d.y) for d in self.damages)
+		elif direction is Orientation.SOUTH:
+			self.damages = set(Field(d.x, d.y - 1) for d in self.damages)
+		elif direction is Orientation.EAST:
+			self.damages = set(Field(d.x + 1, d.y) for d in self.damages)
 
 	def __init__(self, bow, rear):
 		self.__initShip(bow, rear)
-		self.damages = []
+		self.damages = set()
+		self.sunk = False
 
 		# calculate orientation
 		if bow.y < rear.y:
@@ -196,6 +280,10 @@ class ShipList:
 
 	Author:
 		Maximilian Hess <mail@maximilianhess.com>
+
+	Args:
+		fieldLength: the length of the field in x and y direction
+		ruleset: the rules of the game, the classic rules on a field of fieldLength if None
 	"""
 
 	def getFieldStatus(self, field):
@@ -209,14 +297,14 @@ class ShipList:
 			The status of the field.
 		"""
 
-		for ship in self.getShips():
-			for part in ship.parts:
-				if field.equals(part):
-					if ship.isDamaged(part):
-						return FieldStatus.DAMAGEDSHIP, ship
-					else:
-						return FieldStatus.SHIP, ship
-		return FieldStatus.WATER, None
+		shipId = self.getShipAtPosition(field)
+		if shipId == -1:
+			return FieldStatus.WATER, None
+
+		ship = self.getShip(shipId)
+		if ship.isDamaged(field):
+			return FieldStatus.DAMAGEDSHIP, ship
+		return FieldStatus.SHIP, ship
 
 	def getShipAtPosition(self, field):
 		"""
@@ -229,51 +317,126 @@ class ShipList:
 			The id of the ship or -1 if there is no ship at this position.
 		"""
 
-		ships = self.getShips()
-		for i in range(0, len(ships)):
-			for damage in ships[i].parts:
-				if damage.equals(field):
-					return i
+		index = self.__getIndex(field)
+		if index == -1:
+			return -1
+		return self.__grid[index]
+
+	def damage(self, field):
+		"""
+		Damages the ship part at a given field.
+
+		Args:
+		    field: the attacked field
+
+		Returns:
+			The status of the field after the attack together with True if an undamaged part has been hit or False if
+			not.
+		"""
+
+		shipId = self.getShipAtPosition(field)
+		if shipId == -1:
+			return FieldStatus.WATER, False
+
+		if self.__ships[shipId].isDamaged(field):
+			return FieldStatus.DAMAGEDSHIP, False
+		ship = self.__ownShip(shipId)
+		ship.addDamage(field)
+
+		self.__intact -= 1
+		if ship.isSunk():
+			self.__sunk.append(shipId)
+		return FieldStatus.DAMAGEDSHIP, True
+
+	def isSunk(self):
+		"""
+		Checks if the whole fleet has been placed and sunken.
+
+		Returns:
+			True if all ships have been sunken or False if not.
+		"""
+
+		return self.__intact == 0 and not self.moreShipsLeftToPlace()
+
+	def getSunkShips(self):
+		"""
+		Returns the ids of all sunken ships in the order they have been sunken.
+
+		Returns:
+			A list of ship ids.
+		"""
+
+		return self.__sunk
+
+	def __getIndex(self, field):
+		"""
+		Returns the position of a field in the index grid.
+
+		Args:
+		    field: the field
+
+		Returns:
+			The position in the grid or -1 if the field is not on the playing field.
+		"""
+
+		if 0 <= field.x < self.__fieldLength and 0 <= field.y < self.__fieldLength:
+			return field.y * self.__fieldLength + field.x
 		return -1
 
-	def __checkForCollisionWithOtherShips(self, ship):
+	def __setShipAtPosition(self, ship, shipId):
+		"""
+		Updates the index grid for all parts of a ship.
+
+		Args:
+		    ship: the ship
+		    shipId: the id of the ship or -1 to remove it
+		"""
+
+		if self.__gridShared:
+			self.__grid = list(self.__grid)
+			self.__gridShared = False
+
+		for part in ship.parts:
+			index = self.__getIndex(part)
+			if index != -1:
+				self.__grid[index] = shipId
+
+	def __checkForCollisionWithOtherShips(self, parts):
 		"""
 		Validates that there is no collision with an existing Ship.
 
 		Args:
-			field: the field to validate
+			parts: the fields of the ship to validate
 
 		Return:
 			Returns true if there is no collision or false if not.
 		"""
 
-		for part in splitShip(ship.bow, ship.rear):
-			for s in self.getShips():
-				parts = splitShip(s.bow, s.rear)
-				for p in parts:
-					if part.equals(p):
-						return False
+		for part in parts:
+			if self.getShipAtPosition(part) != -1:
+				return False
 
 		return True
 
-	def __checkForCollisionsWithBorders(self, ship):
+	def __checkForCollisionsWithBorders(self, bow, rear):
 		"""
 		Validates that the Ship does not collides of any of the game border.
 
 		Args:
-			ship: the ship to validate
+			bow: the bow of the ship to validate
+			rear: the rear of the ship to validate
 
 		Return:
 			Returns true if there is no collision or false if not.
 		"""
 
-		return (0 <= ship.bow.x < self.__fieldLength
-			and  0 <= ship.bow.y < self.__fieldLength
-			and 0 <= ship.rear.x < self.__fieldLength
-			and 0 <= ship.rear.y < self.__fieldLength)
+		return (0 <= bow.x < self.__fieldLength
+			and  0 <= bow.y < self.__fieldLength
+			and 0 <= rear.x < self.__fieldLength
+			and 0 <= rear.y < self.__fieldLength)
 
-	def __checkForDiagonal(self, ship):
-		return not (ship.bow.x == ship.rear.x or ship.bow.y == ship.rear.y)
+	def __checkForDiagonal(self, bow, rear):
+		return not (bow.x == rear.x or bow.y == rear.y)
 
 	def getShips(self):
 		"""
@@ -282,14 +445,8 @@ class ShipList:
 		Return:
 			Returns a list of all Ships.
 		"""
-		result = []
-
-		result.extend(self.__carriers)
-		result.extend(self.__battleships)
-		result.extend(self.__cruisers)
-		result.extend(self.__destroyers)
 
-		return result
+		return [ship for ship in self.__ships if ship is not None]
 
 	def getShip(self, shipId):
 		"""
@@ -302,17 +459,7 @@ class ShipList:
 			Returns a specified ship from the own playing field.
 		"""
 
-		if shipId is 0:
-			return self.__carriers[0]
-		if shipId > 0 and shipId < 3:
-			shipId = shipId - 1
-			return self.__battleships[shipId]
-		if shipId > 2 and shipId < 6:
-			shipId = shipId - 3
-			return self.__cruisers[shipId]
-		else:
-			shipId = shipId - 6
-			return self.__destroyers[shipId]
+		return self.__ships[shipId]
 
 	def movePossible(self, shipId, direction):
 		"""
@@ -326,20 +473,21 @@ class ShipList:
 			True if the move is possible or False if not.
 		"""
 
-		if not (0 <= shipId <= 9):
+		if not (0 <= shipId < len(self.__ships)) or self.__ships[shipId] is None:
 			return False
 
 		ship = self.getShip(shipId)
 		fieldsToCheck = []
+		last = self.__fieldLength - 1
 
-		if ship.getLength() is len(ship.damages):
+		if ship.isSunk():
 			return False
 
 		# if ship is vertical
 		if ship.orientation is Orientation.NORTH or ship.orientation is Orientation.SOUTH:
 			if ship.orientation is Orientation.NORTH:
 				if direction is Orientation.NORTH:
-					if ship.bow.y > 14:
+					if ship.bow.y >= last:
 						return False
 					fieldsToCheck.append(Field(ship.bow.x, ship.bow.y + 1))
 				elif direction is Orientation.SOUTH:
@@ -349,7 +497,7 @@ class ShipList:
 
 			elif ship.orientation is Orientation.SOUTH:
 				if direction is Orientation.NORTH:
-					if ship.rear.y > 14:
+					if ship.rear.y >= last:
 						return False
 					fieldsToCheck.append(Field(ship.rear.x, ship.rear.y + 1))
 				elif direction is Orientation.SOUTH:
@@ -369,7 +517,7 @@ class ShipList:
 			elif direction is Orientation.EAST:
 				for part in ship.parts:
 					field = Field(part.x + 1, part.y)
-					if field.x > 15:
+					if field.x > last:
 						return False
 					fieldsToCheck.append(field)
 
@@ -381,7 +529,7 @@ class ShipList:
 						return False
 					fieldsToCheck.append(Field(ship.bow.x - 1, ship.bow.y))
 				elif direction is Orientation.EAST:
-					if ship.rear.x > 14:
+					if ship.rear.x >= last:
 						return False
 					fieldsToCheck.append(Field(ship.rear.x + 1, ship.rear.y))
 
@@ -391,7 +539,7 @@ class ShipList:
 						return False
 					fieldsToCheck.append(Field(ship.rear.x - 1, ship.rear.y))
 				elif direction is Orientation.EAST:
-					if ship.bow.x > 14:
+					if ship.bow.x >= last:
 						return False
 					fieldsToCheck.append(Field(ship.bow.x + 1, ship.bow.y))
 
@@ -399,7 +547,7 @@ class ShipList:
 			if direction is Orientation.NORTH:
 				for part in ship.parts:
 					field = Field(part.x, part.y + 1)
-					if field.y > 15:
+					if field.y > last:
 						return False
 					fieldsToCheck.append(field)
 
@@ -412,8 +560,7 @@ class ShipList:
 					fieldsToCheck.append(field)
 
 		for f in fieldsToCheck:
-			status, _ = self.getFieldStatus(f)
-			if status is FieldStatus.SHIP or status is FieldStatus.DAMAGEDSHIP:
+			if self.getShipAtPosition(f) != -1:
 				return False
 		return True
 
@@ -425,42 +572,75 @@ class ShipList:
 			Returns True if all ships have been placed or False if not.
 		"""
 
-		return not (self.__maxCarrierCount is len(self.__carriers)
-			and self.__maxBattleshipCount is len(self.__battleships)
-			and self.__maxCruiserCount is len(self.__cruisers)
-			and self.__maxDestroyerCount is len(self.__destroyers))
+		return self.__placed < len(self.__ships)
 
-	def __testShipPlacement(self, bow, rear):
+	def __testShipShape(self, bow, rear):
+		"""
+		Validates a ship on its own, without looking at the other ships.
+
+		Args:
+			bow: the bow of the ship
+			rear: the rear of the ship
+
+		Returns:
+			None if the ship is valid or the PlacementError.
+		"""
 
 		# check if the length of the potential ship is valid
-		if bow.x is rear.x:
+		if bow.x == rear.x:
 			length = abs(bow.y - rear.y) + 1
 		else:
 			length = abs(bow.x - rear.x) + 1
 
-		if length < 2 or length > 5:
+		if not self.__ruleset.getShipIds(length):
 			logging.error("This type of ship does not exist.")
-			return False
-
-		# build ship
-		ship = Ship(bow, rear)
+			return PlacementError.UNKNOWN_SHIP
 
 		# check if the ship is diagonal
-		if self.__checkForDiagonal(ship):
+		if self.__checkForDiagonal(bow, rear):
 			logging.error("Diagonal ship!")
-			return False
+			return PlacementError.DIAGONAL
+
+		# check playing field borders
+		if not self.__checkForCollisionsWithBorders(bow, rear):
+			logging.error("Collision with border!")
+			return PlacementError.BORDER
+
+		return None
+
+	def __testShipPlacement(self, bow, rear):
+		"""
+		Validates a ship that is added to the ships on the field.
+
+		Args:
+			bow: the bow of the ship
+			rear: the rear of the ship
+
+		Returns:
+			None if the ship can be placed or the PlacementError.
+		"""
+
+		error = self.__testShipShape(bow, rear)
+		if error is not None:
+			return error
 
 		# check for collisions with previously placed ships
-		if not self.__checkForCollisionWithOtherShips(ship):
+		if not self.__checkForCollisionWithOtherShips(splitShip(bow, rear)):
 			logging.error("Collision with ship!")
-			return False
+			return PlacementError.COLLISION
 
-		# check playing field borders
-		if not self.__checkForCollisionsWithBorders(ship):
-			logging.error("Collision with border!")
-			return False
+		return None
 
-		return True
+	def __place(self, shipId, bow, rear):
+		ship = Ship(bow, rear)
+		length = ship.getLength()
+		self.__ships[shipId] = ship
+		self.__owned[shipId] = True
+		self.__counts[length] += 1
+		self.__placed += 1
+		self.__intact += length
+		self.__setShipAtPosition(ship, shipId)
+		logging.info("Added a ship of length %s. Count is now %s" % (length, self.__counts[length]))
 
 	def add(self, bow, rear):
 		"""
@@ -475,36 +655,66 @@ class ShipList:
 			the user has to place more ships.
 		"""
 
-		if bow.x is rear.x:
+		if bow.x == rear.x:
 			length = abs(bow.y - rear.y) + 1
 		else:
 			length = abs(bow.x - rear.x) + 1
 
-		if not self.__testShipPlacement(bow, rear):
+		if self.__testShipPlacement(bow, rear) is not None:
 			return -1, True
 
-		# all checks done - add ship to specific list
-		ship = Ship(bow, rear)
-		shipId = -1
-		if length is 5 and len(self.__carriers) < self.__maxCarrierCount:
-			self.__carriers.append(ship)
-			shipId = 0
-			logging.info("Added a carrier. Carrier count is now %s" % (len(self.__carriers)))
-		elif length is 4 and len(self.__battleships) < self.__maxBattleshipCount:
-			self.__battleships.append(ship)
-			shipId = len(self.__battleships)
-			logging.info("Added a battleship. battleship count is now %s" % (len(self.__battleships)))
-		elif length is 3 and len(self.__cruisers) < self.__maxCruiserCount:
-			self.__cruisers.append(ship)
-			shipId = len(self.__cruisers) + 2
-			logging.info("Added a cruiser. Cruiser count is now %s" % (len(self.__cruisers)))
-		elif length is 2 and len(self.__destroyers) < self.__maxDestroyerCount:
-			self.__destroyers.append(ship)
-			shipId = len(self.__destroyers) + 5
-			logging.info("Added a destroyer. Destroyer count is now %s" % (len(self.__destroyers)))
+		# all checks done - take the first free id of this kind of ship
+		for shipId in self.__ruleset.getShipIds(length):
+			if self.__ships[shipId] is None:
+				break
+		else:
+			return -1, self.moreShipsLeftToPlace()
+
+		self.__place(shipId, bow, rear)
 
 		return shipId, self.moreShipsLeftToPlace()
 
+	def placeFleet(self, ships):
+		"""
+		Places the whole fleet at once. Either all ships are placed or none of them.
+
+		Args:
+			ships: bow and rear of every ship, ordered by ship id
+
+		Returns:
+			None if the fleet has been placed or the PlacementError. In addition returns the id of the first ship
+			that violates the rules or -1 if the fleet as a whole is invalid.
+		"""
+
+		if self.__placed:
+			return PlacementError.ALREADY_PLACED, -1
+		if len(ships) != len(self.__ships):
+			return PlacementError.FLEET_SIZE, -1
+
+		# the field is empty, so the ships only have to be checked against each other
+		occupied = bytearray(self.__fieldLength * self.__fieldLength)
+		for shipId, (bow, rear) in enumerate(ships):
+			error = self.__testShipShape(bow, rear)
+			if error is not None:
+				return error, shipId
+
+			parts = splitShip(bow, rear)
+			for part in parts:
+				index = self.__getIndex(part)
+				if occupied[index]:
+					logging.error("Collision with ship!")
+					return PlacementError.COLLISION, shipId
+				occupied[index] = 1
+
+			if len(parts) != self.__ruleset.getShipLength(shipId):
+				logging.error("Ship %s does not have the length of its id." % shipId)
+				return PlacementError.WRONG_LENGTH, shipId
+
+		for shipId, (bow, rear) in enumerate(ships):
+			self.__place(shipId, bow, rear)
+
+		return None, -1
+
 	def getCarrierCount(self):
 		"""
 		Returns the count of carriers currently on the field.
@@ -513,7 +723,7 @@ class ShipList:
 			The count of carriers currently on the field.
 		"""
 
-		return len(self.__carriers)
+		return self.__counts.get(5, 0)
 
 	def getBattleshipCount(self):
 		"""
@@ -523,7 +733,7 @@ class ShipList:
 			The count of carriers currently on the field.
 		"""
 
-		return len(self.__battleships)
+		return self.__counts.get(4, 0)
 
 	def getCruiserCount(self):
 		"""
@@ -533,7 +743,7 @@ class ShipList:
 			The count of cruisers currently on the field.
 		"""
 
-		return len(self.__cruisers)
+		return self.__counts.get(3, 0)
 
 	def getDestroyerCount(self):
 		"""
@@ -543,7 +753,7 @@ class ShipList:
 			The count of destroyers currently on the field.
 		"""
 
-		return len(self.__destroyers)
+		return self.__counts.get(2, 0)
 
 	def getShipCount(self):
 		"""
@@ -553,7 +763,7 @@ class ShipList:
 			The count of ships currently on the field.
 		"""
 
-		return self.getCarrierCount() + self.getBattleshipCount() + self.getCruiserCount() + self.getDestroyerCount()
+		return self.__placed
 
 	def move(self, shipId, direction):
 		"""
@@ -564,7 +774,7 @@ class ShipList:
 		    direction: the direction
 		"""
 
-		ship = self.getShip(shipId)
+		ship = self.__ownShip(shipId)
 		bow = ship.bow
 		rear = ship.rear
 
@@ -581,32 +791,74 @@ class ShipList:
 			bowNew  = Field(bow.x  + 1,  bow.y)
 			rearNew = Field(rear.x + 1, rear.y)
 
+		self.__setShipAtPosition(ship, -1)
 		ship.move(bowNew, rearNew, direction)
+		self.__setShipAtPosition(ship, shipId)
 
-	def __init__(self, fieldLength, maxCarrierCount=1, maxBattleshipCount=2, maxCruiserCount=3, maxDestroyerCount=4):
-		self.__fieldLength = fieldLength
+	def clone(self):
+		"""
+		Returns a copy of the ship list. Both share the index grid and all ships until they change them.
 
-		self.__carriers = []
-		self.__maxCarrierCount = maxCarrierCount
+		Returns:
+			The copy of the ship list.
+		"""
 
-		self.__battleships = []
-		self.__maxBattleshipCount = maxBattleshipCount
+		other = copy.copy(self)
+		other.__ships = list(self.__ships)
+		other.__counts = dict(self.__counts)
+		other.__sunk = list(self.__sunk)
+		self.__gridShared = other.__gridShared = True
+		self.__owned = [False] * len(self.__ships)
+		other.__owned = [False] * len(self.__ships)
+		return other
 
-		self.__cruisers = []
-		self.__maxCruiserCount = maxCruiserCount
+	def __ownShip(self, shipId):
+		"""
+		Copies a ship that is shared with a clone before it is changed.
 
-		self.__destroyers = []
-		self.__maxDestroyerCount = maxDestroyerCount
+		Args:
+		    shipId: the id of the ship
+
+		Returns:
+			The ship that may be changed.
+		"""
+
+		if not self.__owned[shipId]:
+			self.__ships[shipId] = self.__ships[shipId].copy()
+			self.__owned[shipId] = True
+		return self.__ships[shipId]
+
+	def __init__(self, fieldLength, ruleset=None):
+		self.__ruleset = ruleset if ruleset is not None else Ruleset(fieldLength)
+		self.__fieldLength = self.__ruleset.fieldLength
+
+		# id of the ship on every field (row by row) or -1 for water
+		self.__grid = [-1] * (self.__fieldLength * self.__fieldLength)
+
+		# ships by ship id, None until placed
+		self.__ships = [None] * self.__ruleset.shipCount
+		self.__counts = {length: 0 for length, count in self.__ruleset.fleet}
+		self.__placed = 0
+
+		# undamaged parts of all placed ships and the ids of sunken ships
+		self.__intact = 0
+		self.__sunk = []
+
+		# copy-on-write state of clones: the grid and ships that are not owned are shared with another ship list
+		self.__gridShared = False
+		self.__owned = [True] * self.__ruleset.shipCount
 
 class PlayingField:
 	"""
-	A complete playing field that consists of 16x16 fields.
+	A complete playing field of fieldLength x fieldLength fields, the length is taken from the ruleset.
 
 	Author:
 		Maximilian Hess <mail@maximilianhess.com>
 
 	Args:
 		length: the dimension of playing field
+		devmode: developer mode
+		ruleset: the rules of the game, the classic rules on a field of length if None
 	"""
 
 	def __getFieldStatus(self, field):
@@ -634,12 +886,11 @@ class PlayingField:
 			Returns the status of the field after the attack together with True if it changed or False if not.
 		"""
 
-		status, ship = self.__getFieldStatus(field)
-		updated = False
-		if status is FieldStatus.SHIP:
-			status = FieldStatus.DAMAGEDSHIP
-			ship.addDamage(field)
-			updated = True
+		# fields that are not on the board are water and never unfogged
+		if not self.__ruleset.onBoard(field.x, field.y):
+			return FieldStatus.WATER, False
+
+		status, updated = self.__ships.damage(field)
 
 		# unfog field
 		if not self.isUnfogged(field):
@@ -664,13 +915,8 @@ class PlayingField:
 			return False
 		self.__allowed_attacks -= 1
 
-		# calculate all the fields
-		fields = [field, Field(field.x, field.y + 1), Field(field.x, field.y + 2),
-				  Field(field.x + 1, field.y), Field(field.x + 1, field.y + 1), Field(field.x + 1, field.y + 2),
-				  Field(field.x+2, field.y), Field(field.x+2, field.y+1), Field(field.x+2, field.y+2)]
-
 		updates = []
-		for f in fields:
+		for f in self.__specialAttackFields(field):
 			status, updated = self.attack(f)
 			if updated:
 				updates.append({
@@ -706,24 +952,16 @@ class PlayingField:
 		    A dictionary of fields and statuses that have been updated and are unfogged. Keys are 'field' and 'status'.
 		"""
 
-		oldfields = splitShip(self.getShip(shipId).bow, self.getShip(shipId).rear)
+		oldfields = self.getShip(shipId).parts
 		self.__ships.move(shipId, direction)
-		newfields = splitShip(self.getShip(shipId).bow, self.getShip(shipId).rear)
+		newfields = self.getShip(shipId).parts
 
 		# merge old and new fields
-		for f in oldfields:
-			found = False
-			for g in newfields:
-				if f.equals(g):
-					found = True
-					break
-			if not found:
-				newfields.append(f)
+		fields = newfields + [f for f in oldfields if f not in newfields]
 
 		updates = []
-		for f in newfields:
-			logging.debug("Field {} is unfogged = {}".format(f.toString(), self.isUnfogged(f)))
-			if self.isUnfogged(f):
+		for f in fields:
+			if f in self.__unfogged:
 				status, _ = self.__getFieldStatus(f)
 				updates.append({
 					'field': f,
@@ -772,6 +1010,20 @@ class PlayingField:
 
 		return self.__ships.add(bow, rear)
 
+	def placeFleet(self, ships):
+		"""
+		Places the whole fleet at once. Either all ships are placed or none of them.
+
+		Args:
+			ships: bow and rear of every ship, ordered by ship id
+
+		Returns:
+			None if the fleet has been placed or the PlacementError together with the id of the first ship that
+			violates the rules (-1 if the fleet as a whole is invalid).
+		"""
+
+		return self.__ships.placeFleet(ships)
+
 	def moreShipsLeftToPlace(self):
 		"""
 		Checks if the player has to place more ships.
@@ -800,23 +1052,18 @@ class PlayingField:
 
 		# add other fields if special attack
 		if wasSpecialAttack:
-			fields += [Field(field.x, field.y + 1), Field(field.x, field.y + 2),
-				  Field(field.x + 1, field.y), Field(field.x + 1, field.y + 1), Field(field.x + 1, field.y + 2),
-				  Field(field.x+2, field.y), Field(field.x+2, field.y+1), Field(field.x+2, field.y+2)]
+			fields = self.__specialAttackFields(field)
 
 		playSound = False
 		for f in fields:
-			status, ship = self.__getFieldStatus(f)
+			status, hit = self.__ships.damage(f)
 			logging.debug("Updating field '%s' with status '%s'" % (f.toString(), status))
 
-			if status is FieldStatus.SHIP:
+			if hit:
 				playSound = True
-				ship.addDamage(f)
-				logging.error("Added damage at '%s'" % f.toString())
 
 			# unfog field
-			if f not in self.__unfogged:
-				self.__unfogged.append(f)
+			self.unfog(f)
 
 		return playSound
 
@@ -828,8 +1075,12 @@ class PlayingField:
 		    field: the field to unfog
 		"""
 
-		logging.debug("Unfog {}...".format(field.toString()))
-		self.__unfogged.append(field)
+		if not self.__ruleset.onBoard(field.x, field.y):
+			return
+		if self.__unfoggedShared:
+			self.__unfogged = set(self.__unfogged)
+			self.__unfoggedShared = False
+		self.__unfogged.add(field)
 
 	def isUnfogged(self, field):
 		"""
@@ -842,17 +1093,14 @@ class PlayingField:
 			True if the field is unfogged or False if not.
 		"""
 
-		for j in self.__unfogged:
-			if field.equals(j):
-				return True
-		return False
+		return field in self.__unfogged
 
 	def getUnfogged(self):
 		"""
-		Returns all unfogged fields as a list.
+		Returns all unfogged fields as a set.
 
 		Returns:
-			All unfogged fields as a list.
+			All unfogged fields as a set.
 		"""
 
 		return self.__unfogged
@@ -865,17 +1113,88 @@ class PlayingField:
 			True if all ships have been sunken or False if not.
 		"""
 
-		total = 0
-		for s in self.__ships.getShips():
-			total += len(s.damages)
-		return total == 30
+		return self.__ships.isSunk()
 
-	def __init__(self, fieldLength, devmode=False):
-		self.__ships = ShipList(fieldLength)
-		self.__fieldLength = fieldLength
+	def getSunkShips(self):
+		"""
+		Returns the ids of all sunken ships in the order they have been sunken.
+
+		Returns:
+			A list of ship ids.
+		"""
+
+		return self.__ships.getSunkShips()
+
+	def damage(self, field):
+		"""
+		Damages the ship part at a field without unfogging it, e.g. to restore a saved game.
+
+		Args:
+		    field: the field of the part
+
+		Returns:
+			True if an undamaged part has been hit or False if not.
+		"""
+
+		return self.__ships.damage(field)[1]
+
+	def getSpecialAttacksLeft(self):
+		"""
+		Returns the number of special attacks the enemy has left on this playing field.
+
+		Returns:
+			The number of special attacks left.
+		"""
+
+		return self.__allowed_attacks
+
+	def setSpecialAttacksLeft(self, count):
+		"""
+		Sets the number of special attacks the enemy has left on this playing field, e.g. to restore a saved game.
+
+		Args:
+		    count: the number of special attacks left
+		"""
+
+		self.__allowed_attacks = count
+
+	def getRuleset(self):
+		"""
+		Returns the rules of the game.
+
+		Returns:
+			The ruleset of the playing field.
+		"""
+
+		return self.__ruleset
+
+	def clone(self):
+		"""
+		Returns a copy of the playing field, e.g. to try moves and attacks without changing the real one. Both share
+		their state until they change it, so cloning costs O(ships). Ships returned by getShip() must not be changed
+		directly.
+
+		Returns:
+			The copy of the playing field.
+		"""
+
+		other = copy.copy(self)
+		other.__ships = self.__ships.clone()
+		self.__unfoggedShared = other.__unfoggedShared = True
+		return other
+
+	def __specialAttackFields(self, field):
+		return [Field(field.x + dx, field.y + dy) for dx, dy in self.__ruleset.specialAttackArea]
+
+	def __init__(self, fieldLength, devmode=False, ruleset=None):
+		self.__ruleset = ruleset if ruleset is not None else Ruleset(fieldLength)
+		self.__ships = ShipList(fieldLength, self.__ruleset)
+		self.__fieldLength = self.__ruleset.fieldLength
 		self.__devmode = devmode
-		self.__unfogged = []
-		self.__allowed_attacks = 3
+		self.__unfogged = set()
+		# True while the set of unfogged fields is shared with a clone
+		self.__unfoggedShared = False
+		self.__allowed_attacks = self.__ruleset.specialAttackCount
 
 class EnemyPlayingField:
 	"""
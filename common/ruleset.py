@@ -0,0 +1,88 @@
+class Ruleset:
+	"""
+	The rules of a game: size of the board, the fleet every player places and the special attacks.
+
+	Ship ids are handed out in the order of the fleet, e.g. the classic fleet has the carrier as ship 0, the
+	battleships as ships 1 and 2, the cruisers as ships 3 to 5 and the destroyers as ships 6 to 9.
+
+	Args:
+		fieldLength: the length of the field in x and y direction
+		fleet: pairs of ship length and number of ships of this length
+		specialAttackSize: the length of the square a special attack hits, starting at the given field
+		specialAttackCount: the number of special attacks of every player
+	"""
+
+	def getShipLength(self, shipId):
+		"""
+		Returns the length of a ship.
+
+		Args:
+			shipId: the id of the ship
+
+		Returns:
+			The length of the ship or None if there is no ship with this id.
+		"""
+
+		if 0 <= shipId < self.shipCount:
+			return self.shipLengths[shipId]
+		return None
+
+	def getShipIds(self, length):
+		"""
+		Returns the ids of all ships of a given length.
+
+		Args:
+			length: the length of the ships
+
+		Returns:
+			A range of ship ids, empty if there are no ships of this length.
+		"""
+
+		return self.__ids.get(length, range(0))
+
+	def onBoard(self, x, y):
+		"""
+		Validates if a coordinate is on the board.
+
+		Args:
+			x: horizontal coordinate
+			y: vertical coordinate
+
+		Returns:
+			True if the coordinate is on the board or False if not.
+		"""
+
+		return 0 <= x < self.fieldLength and 0 <= y < self.fieldLength
+
+	def __init__(self, fieldLength=16, fleet=((5, 1), (4, 2), (3, 3), (2, 4)), specialAttackSize=3,
+			specialAttackCount=3):
+		self.fieldLength = fieldLength
+		self.fleet = tuple(fleet)
+		self.specialAttackSize = specialAttackSize
+		self.specialAttackCount = specialAttackCount
+
+		# length of every ship by ship id
+		self.shipLengths = tuple(length for length, count in self.fleet for i in range(count))
+		self.shipCount = len(self.shipLengths)
+		# number of parts to hit until the fleet is sunk
+		self.partCount = sum(self.shipLengths)
+		self.maxShipLength = max(self.shipLengths)
+
+		# offsets of the fields a special attack hits from the given field, column by column
+		self.specialAttackArea = tuple((dx, dy) for dx in range(specialAttackSize) for dy in range(specialAttackSize))
+		# highest coordinate a special attack may start at
+		self.specialAttackLimit = fieldLength - specialAttackSize
+
+		self.__ids = {}
+		first = 0
+		for length, count in self.fleet:
+			self.__ids[length] = range(first, first + count)
+			first += count
+
+# the rules of the original game
+CLASSIC = Ruleset()
+
+# a 256x256 board with a fleet sixteen times the classic one
+BIG_BATTLE = Ruleset(256, ((5, 16), (4, 32), (3, 48), (2, 64)), specialAttackSize=5, specialAttackCount=12)
+
+rulesets = {'classic': CLASSIC, 'big': BIG_BATTLE}
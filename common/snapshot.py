@@ -0,0 +1,305 @@
+import struct
+from playingfield import Field, Orientation, PlayingField, splitShip
+from ruleset import Ruleset, rulesets
+
+# version of the snapshot format, stored after the magic bytes
+VERSION = 1
+
+# magic bytes of a snapshot of a single playing field
+FIELD_MAGIC = b"BF"
+
+HEADER = struct.Struct(">2sB")
+RULESET = struct.Struct(">HBBB")
+FLEET_ENTRY = struct.Struct(">BH")
+
+# orientation of a ship by its code in a snapshot
+ORIENTATIONS = (Orientation.NORTH, Orientation.WEST, Orientation.SOUTH, Orientation.EAST)
+
+# positions of the set bits of every byte value, most significant bit first
+BITS = [tuple(bit for bit in range(8) if byte & (0x80 >> bit)) for byte in range(256)]
+
+class SnapshotLayout:
+	"""
+	The binary layout of the playing fields of a ruleset. Layouts are shared by all rulesets with the same rules.
+
+	A playing field is stored as:
+		- the number of special attacks left (1 byte)
+		- a bitmap of the placed ships, bit i for ship i
+		- bow, orientation and a bitmap of the damaged parts of every placed ship, ordered by ship id
+		- the number of sunken ships followed by their ids in the order they have been sunken
+		- a bitmap of the unfogged fields, bit y * length + x for field (x, y)
+
+	Args:
+		ruleset: the rules of the game
+	"""
+
+	__cache = {}
+
+	@classmethod
+	def get(cls, ruleset):
+		"""
+		Returns the layout of a ruleset.
+
+		Args:
+			ruleset: the rules of the game
+
+		Returns:
+			The shared layout of these rules.
+		"""
+
+		key = packRuleset(ruleset)
+		layout = cls.__cache.get(key)
+		if layout is None:
+			layout = cls.__cache[key] = SnapshotLayout(ruleset)
+		return layout
+
+	def __init__(self, ruleset):
+		n = ruleset.fieldLength
+		if n > 0xFFFF or ruleset.maxShipLength > 64 or ruleset.specialAttackCount > 0xFF:
+			raise ValueError("ruleset cannot be stored in a snapshot")
+
+		self.fieldLength = n
+		self.shipsSize = (ruleset.shipCount + 7) // 8
+		self.fogSize = (n * n + 7) // 8
+
+		coordinate = "B" if n <= 0x100 else "H"
+		damages = "B" if ruleset.maxShipLength <= 8 else "H" if ruleset.maxShipLength <= 16 else \
+			"I" if ruleset.maxShipLength <= 32 else "Q"
+		shipId = "B" if ruleset.shipCount <= 0x100 else "H"
+
+		self.ship = struct.Struct(">%s%sB%s" % (coordinate, coordinate, damages))
+		self.sunkCount = struct.Struct(">" + shipId)
+		self.shipId = shipId
+
+		# field of every bit of the fog bitmap
+		self.fields = [Field(i % n, i // n) for i in range(n * n)]
+
+def packRuleset(ruleset):
+	"""
+	Encodes the rules of a game.
+
+	Args:
+		ruleset: the rules of the game
+
+	Returns:
+		The encoded ruleset as bytes.
+	"""
+
+	parts = [RULESET.pack(ruleset.fieldLength, ruleset.specialAttackSize, ruleset.specialAttackCount,
+		len(ruleset.fleet))]
+	for length, count in ruleset.fleet:
+		parts.append(FLEET_ENTRY.pack(length, count))
+	return b"".join(parts)
+
+# decoded rulesets by their encoding, so that snapshots of the same rules share one Ruleset
+knownRulesets = {packRuleset(r): r for r in rulesets.values()}
+
+def unpackRuleset(data, offset=0):
+	"""
+	Decodes the rules of a game.
+
+	Args:
+		data: the snapshot
+		offset: the position of the ruleset in the snapshot
+
+	Returns:
+		The ruleset together with the position behind it.
+	"""
+
+	fieldLength, specialAttackSize, specialAttackCount, entries = RULESET.unpack_from(data, offset)
+	end = offset + RULESET.size + entries * FLEET_ENTRY.size
+	key = bytes(data[offset:end])
+
+	ruleset = knownRulesets.get(key)
+	if ruleset is None:
+		if len(key) != end - offset or not entries:
+			raise ValueError("invalid ruleset in snapshot")
+		fleet = [FLEET_ENTRY.unpack_from(data, offset + RULESET.size + i * FLEET_ENTRY.size) for i in range(entries)]
+		ruleset = knownRulesets[key] = Ruleset(fieldLength, fleet, specialAttackSize, specialAttackCount)
+	return ruleset, end
+
+def packField(field, layout=None):
+	"""
+	Encodes the state of a playing field without its ruleset.
+
+	Args:
+		field: the playing field, PlayingField or any other backend with the same API
+		layout: the layout of the field's ruleset, looked up if None
+
+	Returns:
+		The encoded playing field as bytes.
+	"""
+
+	ruleset = field.getRuleset()
+	if layout is None:
+		layout = SnapshotLayout.get(ruleset)
+	n = layout.fieldLength
+	pack = layout.ship.pack
+
+	parts = [bytes((field.getSpecialAttacksLeft(),)), None]
+	placed = 0
+	for shipId in range(ruleset.shipCount):
+		ship = field.getShip(shipId)
+		if ship is None:
+			continue
+		placed |= 1 << shipId
+		damages = 0
+		for i, part in enumerate(ship.parts):
+			if part in ship.damages:
+				damages |= 1 << i
+		parts.append(pack(ship.bow.x, ship.bow.y, ORIENTATIONS.index(ship.orientation), damages))
+	parts[1] = placed.to_bytes(layout.shipsSize, "big")
+
+	sunk = field.getSunkShips()
+	parts.append(struct.pack(">%s%d%s" % (layout.shipId, len(sunk), layout.shipId), len(sunk), *sunk))
+
+	fog = bytearray(layout.fogSize)
+	for f in field.getUnfogged():
+		if 0 <= f.x < n and 0 <= f.y < n:
+			i = f.y * n + f.x
+			fog[i >> 3] |= 0x80 >> (i & 7)
+	parts.append(bytes(fog))
+
+	return b"".join(parts)
+
+def unpackField(data, offset, ruleset, board=PlayingField, layout=None):
+	"""
+	Decodes the state of a playing field. The ships are placed through the usual game rules, so broken snapshots are
+	rejected instead of producing an impossible playing field.
+
+	Args:
+		data: the snapshot
+		offset: the position of the playing field in the snapshot
+		ruleset: the rules of the game
+		board: the playing field implementation to create
+		layout: the layout of the ruleset, looked up if None
+
+	Returns:
+		The playing field together with the position behind it.
+	"""
+
+	if layout is None:
+		layout = SnapshotLayout.get(ruleset)
+	n = layout.fieldLength
+	field = board(n, ruleset=ruleset)
+
+	specialAttacksLeft = data[offset]
+	offset += 1
+	placed = int.from_bytes(data[offset:offset + layout.shipsSize], "big")
+	offset += layout.shipsSize
+
+	# place the ships in the order of their ids, so that every ship gets its id back
+	ids = []
+	ships = []
+	damaged = {}
+	for shipId in range(ruleset.shipCount):
+		if not placed >> shipId & 1:
+			continue
+		x, y, orientation, damages = layout.ship.unpack_from(data, offset)
+		offset += layout.ship.size
+
+		length = ruleset.shipLengths[shipId] - 1
+		orientation = ORIENTATIONS[orientation]
+		if orientation is Orientation.NORTH:
+			rear = Field(x, y - length)
+		elif orientation is Orientation.WEST:
+			rear = Field(x + length, y)
+		elif orientation is Orientation.SOUTH:
+			rear = Field(x, y + length)
+		else:
+			rear = Field(x - length, y)
+		bow = Field(x, y)
+		ids.append(shipId)
+		ships.append((bow, rear))
+		if damages:
+			damaged[shipId] = [part for i, part in enumerate(splitShip(bow, rear)) if damages >> i & 1]
+
+	if len(ships) == ruleset.shipCount:
+		if field.placeFleet(ships)[0] is not None:
+			raise ValueError("invalid fleet in snapshot")
+	else:
+		# a player who is still placing ships
+		for shipId, (bow, rear) in zip(ids, ships):
+			if field.placeShip(bow, rear)[0] != shipId:
+				raise ValueError("invalid ship %s in snapshot" % shipId)
+
+	sunkCount = layout.sunkCount.unpack_from(data, offset)[0]
+	offset += layout.sunkCount.size
+	sunk = list(struct.unpack_from(">%d%s" % (sunkCount, layout.shipId), data, offset))
+	offset += sunkCount * layout.sunkCount.size
+
+	# sunken ships are damaged first and in the same order, then all others
+	for shipId in sunk + [shipId for shipId in damaged if shipId not in sunk]:
+		for part in damaged.get(shipId, ()):
+			field.damage(part)
+	if field.getSunkShips() != sunk:
+		raise ValueError("sunken ships do not match the damages in snapshot")
+
+	fog = data[offset:offset + layout.fogSize]
+	if len(fog) != layout.fogSize:
+		raise ValueError("truncated snapshot")
+	offset += layout.fogSize
+	fields = layout.fields
+	for index, byte in enumerate(fog):
+		if byte:
+			for bit in BITS[byte]:
+				field.unfog(fields[index * 8 + bit])
+
+	field.setSpecialAttacksLeft(specialAttacksLeft)
+	return field, offset
+
+def dumpField(field):
+	"""
+	Creates a versioned snapshot of a playing field including its ruleset.
+
+	Args:
+		field: the playing field
+
+	Returns:
+		The snapshot as bytes.
+	"""
+
+	ruleset = field.getRuleset()
+	return HEADER.pack(FIELD_MAGIC, VERSION) + packRuleset(ruleset) + packField(field, SnapshotLayout.get(ruleset))
+
+def loadField(data, board=PlayingField):
+	"""
+	Restores a playing field from a snapshot of dumpField.
+
+	Args:
+		data: the snapshot
+		board: the playing field implementation to create
+
+	Returns:
+		The playing field.
+	"""
+
+	try:
+		offset = checkHeader(data, FIELD_MAGIC)
+		ruleset, offset = unpackRuleset(data, offset)
+		field, offset = unpackField(data, offset, ruleset, board)
+	except (struct.error, IndexError) as e:
+		raise ValueError("truncated snapshot") from e
+
+	if offset != len(data):
+		raise ValueError("trailing bytes in snapshot")
+	return field
+
+def checkHeader(data, magic):
+	"""
+	Validates the magic bytes and the version of a snapshot.
+
+	Args:
+		data: the snapshot
+		magic: the expected magic bytes
+
+	Returns:
+		The position behind the header.
+	"""
+
+	found, version = HEADER.unpack_from(data, 0)
+	if found != magic:
+		raise ValueError("not a snapshot")
+	if version != VERSION:
+		raise ValueError("unsupported snapshot version %s" % version)
+	return HEADER.size
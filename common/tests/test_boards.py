@@ -0,0 +1,328 @@
+import sys
+sys.path.append("..")
+
+import random
+import unittest
+from playingfield import *
+from bitboard import *
+from ruleset import *
+from snapshot import dumpField
+
+try:
+	from numpyboard import *
+except ImportError:
+	NumpyPlayingField = None
+
+# the list backend is the reference, every other backend has to behave exactly like it
+BACKENDS = [(BitBoardPlayingField, BitBoardShipList)]
+if NumpyPlayingField is not None:
+	BACKENDS.append((NumpyPlayingField, NumpyShipList))
+
+# one fleet that fits on the board: ship i vertically in column 2 * i
+FLEET = [(Field(0, 0), Field(0, 4)), (Field(2, 0), Field(2, 3)), (Field(4, 0), Field(4, 3)),
+	(Field(6, 0), Field(6, 2)), (Field(8, 0), Field(8, 2)), (Field(10, 0), Field(10, 2)),
+	(Field(12, 0), Field(12, 1)), (Field(14, 0), Field(14, 1)), (Field(3, 10), Field(4, 10)), (Field(7, 12), Field(7, 13))]
+
+def updates(result):
+	if result is False:
+		return False
+	return [(u['field'].x, u['field'].y, u['status'].value) for u in result]
+
+def board(field):
+	return [[field.getShipAtPosition(Field(x, y)) for y in range(16)] for x in range(16)]
+
+class TestBoards(unittest.TestCase):
+	"""
+	Every test runs on each backend of BACKENDS.
+	"""
+
+	FIELDLENGTH = 16
+
+	def test_placement(self):
+		"""
+		Placement rules are the same as the ones of ShipList.
+		"""
+		for ships in [ShipList(self.FIELDLENGTH)] + [shipList(self.FIELDLENGTH) for board, shipList in BACKENDS]:
+			with self.subTest(backend=type(ships).__name__):
+				self.assertEqual(ships.add(Field(-1, 3), Field(2, 3)), (-1, True))
+				self.assertEqual(ships.add(Field(2, 3), Field(3, 4)), (-1, True))
+				self.assertEqual(ships.add(Field(2, 3), Field(2, 8)), (-1, True))
+				self.assertEqual(ships.add(Field(2, 3), Field(2, 3)), (-1, True))
+				self.assertEqual(ships.add(Field(2, 3), Field(2, 7)), (0, True))
+				self.assertEqual(ships.add(Field(0, 5), Field(3, 5)), (-1, True))
+				self.assertEqual(ships.add(Field(5, 5), Field(5, 9)), (-1, True))
+				self.assertEqual(ships.add(Field(5, 5), Field(8, 5)), (1, True))
+				self.assertEqual(ships.getShipCount(), 2)
+				self.assertEqual(ships.getCarrierCount(), 1)
+				self.assertEqual(ships.getBattleshipCount(), 1)
+
+	def test_randomGames(self):
+		"""
+		Plays random games on the list backend and every other one and compares every result.
+		"""
+		directions = list(Orientation)
+		for backend, shipList in BACKENDS:
+			for seed in range(20):
+				with self.subTest(backend=backend.__name__, seed=seed):
+					self.playRandomGame(backend, seed, directions)
+
+	def playRandomGame(self, backend, seed, directions):
+		rnd = random.Random(seed)
+		fields = [PlayingField(self.FIELDLENGTH), backend(self.FIELDLENGTH)]
+		for bow, rear in FLEET:
+			results = [f.placeShip(Field(bow.x, bow.y), Field(rear.x, rear.y)) for f in fields]
+			self.assertEqual(results[0], results[1])
+
+		for turn in range(400):
+			action = rnd.random()
+			# some attacks are (partly) off the board
+			if action < 0.6:
+				x, y = rnd.randrange(-1, 17), rnd.randrange(-1, 17)
+				results = [f.attack(Field(x, y)) for f in fields]
+			elif action < 0.7:
+				params = {"was_special_attack": "true" if rnd.random() < 0.2 else "false",
+					"coordinate_x": str(rnd.randrange(-3, 17)), "coordinate_y": str(rnd.randrange(-3, 17))}
+				results = [f.onAttack(params) for f in fields]
+			elif action < 0.75:
+				x, y = rnd.randrange(-3, 17), rnd.randrange(-3, 17)
+				results = [updates(f.specialAttack(Field(x, y))) for f in fields]
+			else:
+				shipId, direction = rnd.randrange(10), rnd.choice(directions)
+				results = [f.movePossible(shipId, direction) for f in fields]
+				self.assertEqual(results[0], results[1])
+				if results[0]:
+					results = [updates(f.move(shipId, direction)) for f in fields]
+
+			self.assertEqual(results[0], results[1])
+			if turn % 25 == 0:
+				self.assertEqual(board(fields[0]), board(fields[1]))
+			self.assertEqual(fields[0].isGameOver(), fields[1].isGameOver())
+			if fields[0].isGameOver():
+				break
+
+		self.assertEqual(fields[0].getSunkShips(), fields[1].getSunkShips())
+		self.assertEqual(set(fields[0].getUnfogged()), set(fields[1].getUnfogged()))
+		for a, b in zip(fields[0].getShips(), fields[1].getShips()):
+			self.assertEqual((a.bow, a.rear), (b.bow, b.rear))
+			self.assertEqual(a.damages, b.damages)
+
+	def test_offBoard(self):
+		"""
+		Attacks ignore fields that are not on the board, special attacks hit the part of their area on the board.
+		"""
+		for backend, shipList in BACKENDS:
+			with self.subTest(backend=backend.__name__):
+				fields = [PlayingField(self.FIELDLENGTH), backend(self.FIELDLENGTH)]
+				for f in fields:
+					f.placeFleet(FLEET)
+					self.assertEqual(f.attack(Field(16, 0)), (FieldStatus.WATER, False))
+					self.assertEqual(f.attack(Field(-1, 3)), (FieldStatus.WATER, False))
+					self.assertFalse(f.isUnfogged(Field(-1, 3)))
+					self.assertEqual(f.getUnfogged(), type(f.getUnfogged())())
+				self.assertEqual(updates(fields[1].specialAttack(Field(-1, -1))), [(0, 0, "damagedship"),
+					(0, 1, "damagedship"), (1, 0, "water"), (1, 1, "water")])
+				self.assertEqual(updates(fields[1].specialAttack(Field(15, 15))), [(15, 15, "water")])
+				self.assertEqual(updates(fields[1].specialAttack(Field(-3, 0))), [])
+				self.assertEqual(fields[1].getSpecialAttacksLeft(), 0)
+
+	def test_sunkOrder(self):
+		"""
+		Ships sunken by the same special attack are reported in the order their fields are attacked.
+		"""
+		for backend in [PlayingField] + [board for board, shipList in BACKENDS]:
+			with self.subTest(backend=backend.__name__):
+				field = backend(self.FIELDLENGTH)
+				field.placeFleet(FLEET)
+				field.attack(Field(14, 1))
+
+				# ship 6 sinks in the first column of the area, ship 7 in the last one but on a lower row
+				field.specialAttack(Field(12, 0))
+				self.assertEqual(field.getSunkShips(), [6, 7])
+
+	def test_clone(self):
+		"""
+		Clones and the original playing field do not see each other's changes.
+		"""
+		directions = list(Orientation)
+		rnd = random.Random(5)
+		def play(field):
+			for turn in range(60):
+				action = rnd.random()
+				if action < 0.7:
+					field.attack(Field(rnd.randrange(16), rnd.randrange(16)))
+				elif action < 0.75:
+					field.specialAttack(Field(rnd.randrange(14), rnd.randrange(14)))
+				else:
+					shipId, direction = rnd.randrange(10), rnd.choice(directions)
+					if field.movePossible(shipId, direction):
+						field.move(shipId, direction)
+
+		for backend, shipList in BACKENDS:
+			with self.subTest(backend=backend.__name__):
+				field = backend(self.FIELDLENGTH)
+				field.placeFleet(FLEET)
+				for i in range(10):
+					before = dumpField(field)
+					clone = field.clone()
+					play(clone)
+					self.assertEqual(dumpField(field), before)
+
+					during = dumpField(clone)
+					play(field)
+					self.assertEqual(dumpField(clone), during)
+					self.assertEqual(board(clone.clone()), board(clone))
+
+	def test_placeFleet(self):
+		"""
+		Random fleets are accepted or rejected for the same reason as by PlayingField.
+		"""
+		for backend, shipList in BACKENDS:
+			rnd = random.Random(1)
+			lengths = [5, 4, 4, 3, 3, 3, 2, 2, 2, 2]
+			for i in range(200):
+				# a valid fleet in random columns, then one ship is moved anywhere every other time
+				fleet = []
+				for x, length in zip(rnd.sample(range(16), 10), lengths):
+					y = rnd.randrange(17 - length)
+					fleet.append((Field(x, y), Field(x, y + length - 1)))
+				if i % 2:
+					shipId = rnd.randrange(10)
+					x, y = rnd.randrange(17), rnd.randrange(17)
+					dx, dy = rnd.choice([(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1)])
+					length = lengths[shipId] + rnd.choice([0, 0, 0, 1])
+					fleet[shipId] = (Field(x, y), Field(x + dx * (length - 1), y + dy * (length - 1)))
+				with self.subTest(backend=backend.__name__, fleet=i):
+					fields = [PlayingField(self.FIELDLENGTH), backend(self.FIELDLENGTH)]
+					results = [f.placeFleet(fleet) for f in fields]
+					self.assertEqual(results[0], results[1])
+					self.assertEqual(board(fields[0]), board(fields[1]))
+
+	def test_gameOver(self):
+		"""
+		The game is over once every part of the fleet is damaged.
+		"""
+		parts = [p for bow, rear in FLEET for p in splitShip(bow, rear)]
+		for backend, shipList in BACKENDS:
+			with self.subTest(backend=backend.__name__):
+				field = backend(self.FIELDLENGTH)
+				for bow, rear in FLEET:
+					field.placeShip(bow, rear)
+
+				for p in parts[:-1]:
+					field.attack(Field(p.x, p.y))
+				self.assertFalse(field.isGameOver())
+				field.attack(parts[-1])
+				self.assertTrue(field.isGameOver())
+
+	def test_bigBattle(self):
+		"""
+		Every backend follows the ruleset of a big battle.
+		"""
+		for backend in [PlayingField] + [board for board, shipList in BACKENDS]:
+			with self.subTest(backend=backend.__name__):
+				field = backend(BIG_BATTLE.fieldLength, ruleset=BIG_BATTLE)
+				parts = []
+				for shipId, length in enumerate(BIG_BATTLE.shipLengths):
+					x, y = 2 * (shipId % 128), 0 if shipId < 128 else 10
+					self.assertEqual(field.placeShip(Field(x, y), Field(x, y + length - 1))[0], shipId)
+					parts += splitShip(Field(x, y), Field(x, y + length - 1))
+				self.assertFalse(field.moreShipsLeftToPlace())
+				self.assertEqual(field.placeShip(Field(1, 200), Field(1, 201)), (-1, False))
+
+				self.assertTrue(field.movePossible(159, Orientation.EAST))
+				self.assertFalse(field.movePossible(160, Orientation.EAST))
+				self.assertEqual(field.getShipAtPosition(Field(62, 10)), 159)
+
+				# a special attack covers a 5x5 square
+				self.assertEqual(len(updates(field.specialAttack(Field(250, 20)))), 25)
+				for i in range(BIG_BATTLE.specialAttackCount - 1):
+					field.specialAttack(Field(0, 100))
+				self.assertFalse(field.specialAttack(Field(0, 100)))
+
+				for p in parts[:-1]:
+					field.attack(p)
+				self.assertFalse(field.isGameOver())
+				field.attack(parts[-1])
+				self.assertTrue(field.isGameOver())
+
+	def test_customFleet(self):
+		"""
+		Fleets without some kind of ship reject that kind of ship.
+		"""
+		rules = Ruleset(8, ((3, 1), (2, 2)))
+		for backend in [PlayingField] + [board for board, shipList in BACKENDS]:
+			with self.subTest(backend=backend.__name__):
+				field = backend(8, ruleset=rules)
+				self.assertEqual(field.placeShip(Field(0, 0), Field(0, 4)), (-1, True))
+				self.assertEqual(field.placeShip(Field(0, 0), Field(0, 1)), (1, True))
+				self.assertEqual(field.placeShip(Field(2, 0), Field(2, 2)), (0, True))
+				self.assertEqual(field.placeShip(Field(7, 6), Field(7, 7)), (2, False))
+				self.assertFalse(field.movePossible(2, Orientation.NORTH))
+				self.assertTrue(field.movePossible(2, Orientation.SOUTH))
+				for x, y in ((0, 0), (0, 1), (2, 0), (2, 1), (2, 2), (7, 6)):
+					field.attack(Field(x, y))
+				self.assertFalse(field.isGameOver())
+				field.attack(Field(7, 7))
+				self.assertTrue(field.isGameOver())
+
+@unittest.skipIf(NumpyPlayingField is None, "numpy is not installed")
+class TestNumpyBoard(unittest.TestCase):
+	"""
+	What only the NumPy backend has: the enemy's playing field as a grid and batched attacks.
+	"""
+
+	FIELDLENGTH = 16
+
+	def test_enemyPlayingField(self):
+		"""
+		Updates of the enemy's playing field are the same as the ones of EnemyPlayingField.
+		"""
+		params = {"number_of_updated_fields": "3",
+			"field_0_x": "3", "field_0_y": "4", "field_0_condition": "free",
+			"field_1_x": "3", "field_1_y": "5", "field_1_condition": "damaged",
+			"field_2_x": "15", "field_2_y": "0", "field_2_condition": "undamaged"}
+		fields = [EnemyPlayingField(self.FIELDLENGTH), NumpyEnemyPlayingField(self.FIELDLENGTH)]
+		for f in fields:
+			f.onAttack(params)
+		self.assertEqual(fields[0].getField(), fields[1].getField())
+		self.assertIs(fields[1].getField()[3][5], FieldStatus.DAMAGEDSHIP)
+
+	def test_boardBatch(self):
+		"""
+		Batched attacks on copies of the grids of many playing fields.
+		"""
+		fields = []
+		for i in range(3):
+			field = NumpyPlayingField(self.FIELDLENGTH)
+			for bow, rear in FLEET:
+				field.placeShip(bow, rear)
+			fields.append(field)
+
+		batch = BoardBatch(fields)
+		statuses = batch.attack([0, 1, 2, 2], [0, 1, 0, 16], [0, 0, 4, 0])
+		self.assertEqual(list(statuses), [DAMAGEDSHIP, WATER, DAMAGEDSHIP, WATER])
+		self.assertEqual(list(batch.specialAttack([1, 2], [2, 14], [0, 0])), [6, 2])
+		self.assertEqual(list(batch.isGameOver()), [False, False, False])
+
+		# the stacked grids are copies
+		self.assertEqual(fields[0].attack(Field(0, 0)), (FieldStatus.DAMAGEDSHIP, True))
+
+		parts = [p for bow, rear in FLEET for p in splitShip(bow, rear)]
+		batch.attack([0] * len(parts), [p.x for p in parts], [p.y for p in parts])
+		self.assertEqual(list(batch.isGameOver()), [True, False, False])
+
+	def test_bigBattleBatch(self):
+		"""
+		Batched special attacks follow the ruleset of a big battle.
+		"""
+		field = NumpyPlayingField(BIG_BATTLE.fieldLength, ruleset=BIG_BATTLE)
+		for shipId, length in enumerate(BIG_BATTLE.shipLengths):
+			x, y = 2 * (shipId % 128), 0 if shipId < 128 else 10
+			field.placeShip(Field(x, y), Field(x, y + length - 1))
+
+		batch = BoardBatch([field])
+		self.assertEqual(list(batch.specialAttack([0], [0], [0])), [15])
+		self.assertEqual(list(batch.isGameOver()), [False])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,64 @@
+import sys
+sys.path.append("..")
+
+import unittest
+from playingfield import *
+from bitboard import *
+from ruleset import *
+from fleetgenerator import *
+
+ORIENTATION_CODES = {Orientation.NORTH: "N", Orientation.WEST: "W", Orientation.SOUTH: "S", Orientation.EAST: "E"}
+
+class TestFleetGenerator(unittest.TestCase):
+
+	def test_validFleets(self):
+		"""
+		Every generated fleet is accepted by the playing field and sent back in the form of board_init.
+		"""
+		generator = FleetGenerator(seed=1)
+		directions = set()
+		for fleet in generator.fleets(500):
+			self.assertEqual(len(fleet), CLASSIC.shipCount)
+			field = PlayingField(CLASSIC.fieldLength)
+			self.assertEqual(field.placeFleet(generator.toFields(fleet)), (None, -1))
+
+			# the client sends the rear and orientation of every ship
+			sent = [(ship.rear.x, ship.rear.y, ORIENTATION_CODES[ship.orientation]) for ship in field.getShips()]
+			self.assertEqual(sent, fleet)
+			directions.update(direction for x, y, direction in fleet)
+		self.assertEqual(directions, {"N", "W", "S", "E"})
+
+	def test_seed(self):
+		"""
+		Generators with the same seed produce the same fleets.
+		"""
+		self.assertEqual(list(FleetGenerator(seed=7).fleets(20)), list(FleetGenerator(seed=7).fleets(20)))
+		self.assertNotEqual(FleetGenerator(seed=7).next(), FleetGenerator(seed=8).next())
+
+	def test_params(self):
+		"""
+		Fleets are converted to the parameters of board_init.
+		"""
+		generator = FleetGenerator(seed=3)
+		fleet = generator.next()
+		params = generator.toParams(fleet)
+		self.assertEqual(len(params), 3 * CLASSIC.shipCount)
+		self.assertEqual((params["ship_9_x"], params["ship_9_y"], params["ship_9_direction"]),
+			(str(fleet[9][0]), str(fleet[9][1]), fleet[9][2]))
+
+	def test_rulesets(self):
+		"""
+		Fleets follow the ruleset, also on boards too large for precomputed placements.
+		"""
+		custom = Ruleset(8, ((4, 2), (3, 3), (2, 4)))
+		generator = FleetGenerator(custom, seed=4)
+		for fleet in generator.fleets(100):
+			field = BitBoardPlayingField(custom.fieldLength, ruleset=custom)
+			self.assertEqual(field.placeFleet(generator.toFields(fleet)), (None, -1))
+
+		generator = FleetGenerator(BIG_BATTLE, seed=5)
+		field = BitBoardPlayingField(BIG_BATTLE.fieldLength, ruleset=BIG_BATTLE)
+		self.assertEqual(field.placeFleet(generator.toFields(generator.next())), (None, -1))
+
+if __name__ == "__main__":
+	unittest.main()
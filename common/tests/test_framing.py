@@ -0,0 +1,131 @@
+import sys
+sys.path.append("..")
+
+import socket
+import struct
+import threading
+import unittest
+from framing import *
+
+def frame(body):
+	return struct.pack(">H", len(body)) + body
+
+class TestFrameReader(unittest.TestCase):
+
+	def setUp(self):
+		self.sender, self.receiver = socket.socketpair()
+
+	def tearDown(self):
+		self.sender.close()
+		self.receiver.close()
+
+	def test_severalFramesInOneRecv(self):
+		"""
+		All frames that arrive together are handed out after a single recv.
+		"""
+		reader = FrameReader(self.receiver)
+		frames = reader.frames()
+		self.sender.sendall(frame(b"type:report;status:11;") + frame(b"type:report;status:22;") + frame(b""))
+
+		self.assertEqual(bytes(next(frames)), b"type:report;status:11;")
+		self.assertEqual(bytes(next(frames)), b"type:report;status:22;")
+		self.assertEqual(bytes(next(frames)), b"")
+		self.assertEqual(reader.syscalls, 1)
+
+	def test_splitFrame(self):
+		"""
+		A frame split up by TCP is completed by the next recv, even within the size header.
+		"""
+		reader = FrameReader(self.receiver)
+		frames = reader.frames()
+		data = frame(b"type:board_init;ship_0_x:1;")
+
+		self.sender.sendall(data[:1])
+		t = threading.Timer(0.05, lambda: self.sender.sendall(data[1:5]))
+		u = threading.Timer(0.1, lambda: self.sender.sendall(data[5:]))
+		t.start()
+		u.start()
+
+		self.assertEqual(bytes(next(frames)), b"type:board_init;ship_0_x:1;")
+		self.assertEqual(reader.syscalls, 3)
+		t.join()
+		u.join()
+
+	def test_frameLargerThanBuffer(self):
+		"""
+		Frames that do not fit into the initial buffer grow it.
+		"""
+		reader = FrameReader(self.receiver, bufferSize=16)
+		frames = reader.frames()
+		body = b"x" * 60000
+		self.sender.sendall(frame(b"small") + frame(body) + frame(b"after"))
+
+		self.assertEqual(bytes(next(frames)), b"small")
+		self.assertEqual(bytes(next(frames)), body)
+		self.assertEqual(bytes(next(frames)), b"after")
+
+	def test_closedConnection(self):
+		"""
+		The generator ends when the peer closes the connection.
+		"""
+		reader = FrameReader(self.receiver)
+		self.sender.sendall(frame(b"last"))
+		self.sender.close()
+
+		self.assertEqual([bytes(f) for f in reader.frames()], [b"last"])
+
+	def test_pending(self):
+		"""
+		Bytes after the current frame are returned by pending() and can be passed on to another reader.
+		"""
+		reader = FrameReader(self.receiver)
+		frames = reader.frames()
+		third = frame(b"third")
+		self.sender.sendall(frame(b"first") + frame(b"second") + third[:4])
+
+		self.assertEqual(bytes(next(frames)), b"first")
+		pending = reader.pending()
+		self.assertEqual(pending, frame(b"second") + third[:4])
+
+		self.sender.sendall(third[4:])
+		self.sender.close()
+		other = FrameReader(self.receiver, pending=pending)
+		self.assertEqual([bytes(f) for f in other.frames()], [b"second", b"third"])
+
+	def test_chunkedMessage(self):
+		"""
+		In large frame mode chunks are joined with the regular frame that ends the message.
+		"""
+		reader = FrameReader(self.receiver, bufferSize=16, extended=True)
+		frames = reader.frames()
+		chunk = struct.pack(">HI", 0xFFFF, 70000) + b"a" * 70000
+		self.sender.sendall(chunk + struct.pack(">HI", 0xFFFF, 3) + b"bcd" + frame(b"end") + frame(b"next"))
+
+		self.assertEqual(bytes(next(frames)), b"a" * 70000 + b"bcdend")
+		self.assertEqual(bytes(next(frames)), b"next")
+
+	def test_bufferShrinksAfterChunkedMessage(self):
+		"""
+		The buffer grown for a chunked message goes back to its normal size afterwards.
+		"""
+		reader = FrameReader(self.receiver, bufferSize=16, extended=True)
+		frames = reader.frames()
+		chunk = struct.pack(">HI", 0xFFFF, 70000) + b"a" * 70000
+		self.sender.sendall(chunk + frame(b"end") + frame(b"next"))
+
+		self.assertEqual(len(next(frames)), 70003)
+		self.assertEqual(bytes(next(frames)), b"next")
+		self.sender.sendall(frame(b"last"))
+		self.assertEqual(bytes(next(frames)), b"last")
+		self.assertEqual(reader.bufferSize(), 16)
+
+	def test_chunkHeaderWithoutLargeFrames(self):
+		"""
+		Without large frame mode a size of 0xFFFF is just a regular frame.
+		"""
+		reader = FrameReader(self.receiver)
+		frames = reader.frames()
+		body = b"x" * 0xFFFF
+		self.sender.sendall(frame(body))
+
+		self.assertEqual(bytes(next(frames)), body)
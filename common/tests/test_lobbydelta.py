@@ -0,0 +1,179 @@
+import sys
+sys.path.append("..")
+# ahead of the server package of the repository root
+sys.path.insert(0, "../../server")
+
+import unittest
+import lobby
+from eventbus import EventBus
+from messageparser import MessageParser
+from outbound import OutboundQueue
+from ruleset import CLASSIC
+from server import ClientHandler
+
+class FakeSocket:
+
+	def __init__(self, port):
+		self.port = port
+
+	def getpeername(self):
+		return ("127.0.0.1", self.port)
+
+class HeldQueue(OutboundQueue):
+	"""
+	Outbound queue that only sends when the test tells it to.
+	"""
+
+	def deliver(self):
+		messages = []
+		with self._lock:
+			while self._queue:
+				messages.append(self._pop())
+		return messages
+
+	def _wakeup(self):
+		pass
+
+	def _join(self):
+		pass
+
+	def _disconnect(self):
+		pass
+
+class Client:
+	"""
+	Keeps the lobby like the client does, a delta only applies to the version it is based on.
+	"""
+
+	def __init__(self):
+		self.parser = MessageParser()
+		self.version = None
+		self.games = {}
+		self.rejected = 0
+
+	def receive(self, report):
+		self.assertSingleFrame(report)
+		msgtype, params = self.parser.decodeFrame(report[0][2:])
+		if params.get("delta") == "true":
+			if int(params["base_version"]) != self.version:
+				self.rejected += 1
+				return
+		else:
+			self.games = {}
+		for param, value in params.items():
+			if param.startswith("game_name_"):
+				self.games[value] = params["game_players_count_" + param[10:]]
+			elif param.startswith("removed_game_"):
+				del self.games[value]
+		self.version = int(params["version"])
+
+	def assertSingleFrame(self, report):
+		if len(report) != 1:
+			raise AssertionError("unexpected large frame")
+
+class TestLobbyDelta(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		ClientHandler.configure(CLASSIC)
+		lobby.broadcaster.window = 0
+		# events are never delivered, the test triggers every update itself
+		lobby.bus = EventBus()
+		lobby.bus.set_scheduler(lambda callback: None)
+
+	def setUp(self):
+		self.model = lobby.LobbyModel()
+		self.outbound = HeldQueue()
+		self.handler = ClientHandler(FakeSocket(id(self)), self.outbound)
+		self.client = Client()
+		self.model.add_player("host")
+
+		# full snapshot, the ack switches to deltas
+		self.handler.on_update_lobby()
+		self.deliver()
+		self.handler.handle_message(b"type:lobby_ack;version:" + str(self.client.version).encode() + b";")
+
+	def tearDown(self):
+		self.handler.finish()
+		self.model.delete_player("host")
+
+	def deliver(self):
+		for report in self.outbound.deliver():
+			self.client.receive(report)
+
+	def update(self):
+		self.handler.on_update_lobby()
+
+	def test_removalAfterTwoDeltas(self):
+		"""
+		A game created and deleted while the client did not acknowledge anything is gone on the client.
+		"""
+		self.model.add_lobby("ghost", "host")
+		self.update()
+		self.deliver()
+		self.model.delete_game("ghost")
+		self.update()
+		self.deliver()
+
+		self.assertNotIn("ghost", self.client.games)
+		self.assertEqual(self.client.version, self.model.get_version())
+		self.assertEqual(self.client.rejected, 0)
+
+	def test_removalOfSupersededDelta(self):
+		"""
+		A delta that replaces one that was not sent yet applies to the version the client has.
+		"""
+		self.model.add_lobby("ghost", "host")
+		self.update()
+		self.model.delete_game("ghost")
+		self.model.add_lobby("other", "host")
+		self.update()
+		self.assertEqual(self.outbound.get_depth(), 1)
+		self.deliver()
+
+		self.assertEqual(set(self.client.games), {"other"})
+		self.assertEqual(self.client.rejected, 0)
+		self.model.delete_game("other")
+
+	def test_fullSnapshotOnRequest(self):
+		"""
+		A negative ack gets a full snapshot that later deltas apply to.
+		"""
+		self.model.add_lobby("ghost", "host")
+		self.update()
+		self.handler.handle_message(b"type:lobby_ack;version:-1;")
+		self.deliver()
+		self.model.delete_game("ghost")
+		self.update()
+		self.deliver()
+
+		self.assertNotIn("ghost", self.client.games)
+		self.assertEqual(self.client.rejected, 0)
+
+	def test_failedUpdateReleasesLock(self):
+		"""
+		A report that fails to build does not keep the other lobby readers out.
+		"""
+		base = self.model.get_version()
+		self.model.add_lobby("ghost", "host")
+
+		def fail(*args):
+			raise RuntimeError("build failed")
+
+		build = lobby.LobbyModel._LobbyModel__build_delta_report
+		lobby.LobbyModel._LobbyModel__build_delta_report = fail
+		try:
+			self.assertRaises(RuntimeError, self.model.get_lobby_update, base)
+		finally:
+			lobby.LobbyModel._LobbyModel__build_delta_report = build
+
+		locked = lobby.snapshot_lock.locked()
+		if locked:
+			# do not hang the tests that follow
+			lobby.snapshot_lock.release()
+		self.assertFalse(locked)
+		self.assertIsNotNone(self.model.get_lobby_update(base)[1])
+		self.model.delete_game("ghost")
+
+if __name__ == "__main__":
+	unittest.main()
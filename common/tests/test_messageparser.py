@@ -1001,6 +1001,33 @@ class TestMessageParser(unittest.TestCase):
 		self.assertEqual(messageType, "chat_send")
 		self.assertEqual(len(params), 1)
 		self.assertEqual(params["text"], "Hello, How are you?")		# integers are strings at this step
+
+	def test_chunkedEncoding(self):
+		"""
+		Checks that encodeChunks only splits messages that do not fit into a regular frame.
+		"""
+		params = {"status": "16"}
+		for i in range(5000):
+			params["player_identifier_%d" % i] = "%040x" % i
+
+		chunks = list(MessageParser().encodeChunks("report", {"status": "16"}))
+		self.assertEqual(chunks, [MessageParser().encode("report", {"status": "16"})])
+
+		chunks = list(MessageParser().encodeChunks("report", params))
+		self.assertTrue(len(chunks) > 1)
+		body = b""
+		for chunk in chunks[:-1]:
+			self.assertEqual(chunk[:2], b"\xff\xff")
+			size = struct.unpack(">I", chunk[2:6])[0]
+			self.assertEqual(len(chunk), size + 6)
+			self.assertTrue(size < 0xFFFF)
+			body += chunk[6:]
+		self.assertEqual(struct.unpack(">H", chunks[-1][:2])[0], len(chunks[-1]) - 2)
+		body += chunks[-1][2:]
+
+		messageType, decoded = MessageParser().decodeFrame(body)
+		self.assertEqual(messageType, "report")
+		self.assertEqual(decoded, params)
 		
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+import sys
+sys.path.append("..")
+# ahead of the server package of the repository root
+sys.path.insert(0, "../../server")
+
+import threading
+import unittest
+import lobby
+from eventbus import EventBus
+
+class TestRegistry(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		lobby.broadcaster.window = 0
+		# nobody listens, the events are never delivered
+		lobby.bus = EventBus()
+		lobby.bus.set_scheduler(lambda callback: None)
+
+	def test_deletePlayerInGame(self):
+		"""
+		Readers without locks never see the game of a player that is already gone: delete_player(), get_games_info()
+		"""
+		model = lobby.LobbyModel()
+		done = threading.Event()
+		errors = []
+
+		def read():
+			try:
+				while not done.is_set():
+					model.get_games_info()
+			except Exception as e:
+				errors.append(e)
+
+		# switch threads often to hit the window between two versions
+		interval = sys.getswitchinterval()
+		sys.setswitchinterval(1e-5)
+		reader = threading.Thread(target=read)
+		reader.start()
+		try:
+			for i in range(3000):
+				host, guest, name = "h{}".format(i), "g{}".format(i), "registry{}".format(i)
+				model.add_player(host)
+				model.add_player(guest)
+				model.add_lobby(name, host)
+				model.join_lobby(name, guest)
+				model.delete_player(host if i % 2 else guest)
+				model.delete_player(guest if i % 2 else host)
+				if errors:
+					break
+		finally:
+			done.set()
+			reader.join()
+			sys.setswitchinterval(interval)
+
+		self.assertEqual(errors, [])
+		self.assertEqual(model.get_games_info(), [])
+
+if __name__ == "__main__":
+	unittest.main()
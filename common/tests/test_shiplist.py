@@ -7,6 +7,8 @@ from playingfield import *
 class TestShipList(unittest.TestCase):
 
 	FIELDLENGTH = 16
+	# a complete fleet, ship i vertically in column i
+	FLEET = [(Field(i, 0), Field(i, length - 1)) for i, length in enumerate([5, 4, 4, 3, 3, 3, 2, 2, 2, 2])]
 
 	def test_borderCollisionWhilePlacingShip(self):
 		"""
@@ -125,7 +127,127 @@ class TestShipList(unittest.TestCase):
 		self.assertEqual(ships.getDestroyerCount(), 4)
 
 		ships.add(Field(4, 0), Field(4, 1))
-		self.assertEqual(ships.getDestroyerCount(), 4)		
+		self.assertEqual(ships.getDestroyerCount(), 4)
+
+	def test_shipAtPosition(self):
+		"""
+		Checks that the index grid follows placed and moved ships: getShipAtPosition()
+		"""
+		ships = ShipList(self.FIELDLENGTH)
+
+		ships.add(Field(2, 2), Field(2, 6))
+		ships.add(Field(5, 5), Field(8, 5))
+		self.assertEqual(ships.getShipAtPosition(Field(2, 4)), 0)
+		self.assertEqual(ships.getShipAtPosition(Field(8, 5)), 1)
+		self.assertEqual(ships.getShipAtPosition(Field(9, 5)), -1)
+		self.assertEqual(ships.getShipAtPosition(Field(16, 5)), -1)
+
+		ships.move(1, Orientation.EAST)
+		self.assertEqual(ships.getShipAtPosition(Field(5, 5)), -1)
+		self.assertEqual(ships.getShipAtPosition(Field(9, 5)), 1)
+		self.assertEqual(ships.getFieldStatus(Field(9, 5))[0], FieldStatus.SHIP)
+		self.assertTrue(ships.movePossible(1, Orientation.WEST))
+
+		ships.add(Field(3, 0), Field(3, 3))
+		self.assertFalse(ships.movePossible(0, Orientation.EAST))
+
+	def test_fieldValue(self):
+		"""
+		Fields are immutable values: equal coordinates compare and hash equal
+		"""
+		self.assertIs(Field(3, 4), Field(3, 4))
+		self.assertIs(Field(255, 200), Field(255, 200))
+		self.assertEqual(Field(3, 4), Field(3, 4))
+		self.assertNotEqual(Field(3, 4), Field(4, 3))
+		self.assertEqual(Field(-1, 70), Field(-1, 70))
+		self.assertEqual(len({Field(3, 4), Field(3, 4), Field(-1, 70), Field(-1, 70)}), 2)
+		with self.assertRaises(AttributeError):
+			Field(3, 4).x = 5
+
+		ship = Ship(Field(2, 2), Field(2, 5))
+		ship.addDamage(Field(2, 3))
+		ship.move(Field(3, 2), Field(3, 5), Orientation.EAST)
+		self.assertTrue(ship.isDamaged(Field(3, 3)))
+		self.assertFalse(ship.isDamaged(Field(2, 3)))
+
+	def test_placeFleet(self):
+		"""
+		The fleet is placed at once or not at all: placeFleet()
+		"""
+		ships = ShipList(self.FIELDLENGTH)
+
+		self.assertEqual(ships.placeFleet(self.FLEET[:9]), (PlacementError.FLEET_SIZE, -1))
+
+		collision = list(self.FLEET)
+		collision[7] = (Field(6, 1), Field(7, 1))
+		self.assertEqual(ships.placeFleet(collision), (PlacementError.COLLISION, 7))
+		self.assertEqual(ships.getShipCount(), 0)
+		self.assertEqual(ships.getShipAtPosition(Field(0, 0)), -1)
+
+		wrongLength = list(self.FLEET)
+		wrongLength[1], wrongLength[3] = self.FLEET[3], self.FLEET[1]
+		self.assertEqual(ships.placeFleet(wrongLength), (PlacementError.WRONG_LENGTH, 1))
+
+		border = list(self.FLEET)
+		border[9] = (Field(15, 0), Field(16, 0))
+		self.assertEqual(ships.placeFleet(border), (PlacementError.BORDER, 9))
+
+		self.assertEqual(ships.placeFleet(self.FLEET), (None, -1))
+		self.assertEqual(ships.getShipCount(), 10)
+		self.assertFalse(ships.moreShipsLeftToPlace())
+		self.assertEqual(ships.getShipAtPosition(Field(9, 1)), 9)
+		self.assertEqual(ships.placeFleet(self.FLEET), (PlacementError.ALREADY_PLACED, -1))
+
+	def test_sunkShips(self):
+		"""
+		Sunken ships and the end of the game are tracked while attacking: getSunkShips(), isGameOver()
+		"""
+		field = PlayingField(self.FIELDLENGTH)
+		self.assertEqual(field.placeFleet(self.FLEET), (None, -1))
+
+		self.assertEqual(field.attack(Field(6, 0)), (FieldStatus.DAMAGEDSHIP, True))
+		self.assertEqual(field.attack(Field(6, 0)), (FieldStatus.DAMAGEDSHIP, False))
+		self.assertFalse(field.getShip(6).isSunk())
+		self.assertEqual(field.attack(Field(6, 1)), (FieldStatus.DAMAGEDSHIP, True))
+		self.assertTrue(field.getShip(6).isSunk())
+		self.assertEqual(field.getSunkShips(), [6])
+		self.assertFalse(field.movePossible(6, Orientation.NORTH))
+
+		for bow, rear in self.FLEET:
+			for part in splitShip(bow, rear):
+				self.assertFalse(field.isGameOver())
+				field.attack(part)
+		self.assertTrue(field.isGameOver())
+		self.assertEqual(field.getSunkShips(), [6, 0, 1, 2, 3, 4, 5, 7, 8, 9])
+
+	def test_clone(self):
+		"""
+		Clones and the original playing field do not see each other's changes: clone()
+		"""
+		field = PlayingField(self.FIELDLENGTH)
+		field.placeFleet(self.FLEET)
+		field.attack(Field(0, 0))
+
+		clone = field.clone()
+		clone.attack(Field(0, 1))
+		clone.move(9, Orientation.NORTH)
+		clone.specialAttack(Field(6, 0))
+		self.assertEqual(field.getShip(0).damages, {Field(0, 0)})
+		self.assertEqual(field.getShipAtPosition(Field(9, 2)), -1)
+		self.assertEqual(field.getUnfogged(), {Field(0, 0)})
+		self.assertEqual(field.getSunkShips(), [])
+		self.assertEqual(field.getSpecialAttacksLeft(), 3)
+
+		self.assertEqual(clone.getShip(0).damages, {Field(0, 0), Field(0, 1)})
+		self.assertEqual(clone.getShipAtPosition(Field(9, 2)), 9)
+		self.assertEqual(clone.getSunkShips(), [6, 7, 8])
+		self.assertEqual(clone.getSpecialAttacksLeft(), 2)
+
+		field.attack(Field(9, 0))
+		self.assertEqual(clone.getShipAtPosition(Field(9, 0)), -1)
+		self.assertFalse(clone.getShip(9).isDamaged(Field(9, 0)))
+		self.assertFalse(clone.isUnfogged(Field(9, 0)))
+
 #Easy Test#
 #---------#
 #if __name__ == "__main__":
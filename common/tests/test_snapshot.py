@@ -0,0 +1,143 @@
+import sys
+sys.path.append("..")
+
+import random
+import unittest
+from playingfield import *
+from bitboard import *
+from ruleset import *
+from snapshot import *
+
+try:
+	from numpyboard import NumpyPlayingField
+except ImportError:
+	NumpyPlayingField = None
+
+FLEET = [(Field(0, 0), Field(0, 4)), (Field(2, 0), Field(2, 3)), (Field(4, 0), Field(4, 3)),
+	(Field(6, 0), Field(6, 2)), (Field(8, 0), Field(8, 2)), (Field(10, 0), Field(10, 2)),
+	(Field(12, 0), Field(12, 1)), (Field(14, 0), Field(14, 1)), (Field(3, 10), Field(4, 10)), (Field(7, 12), Field(7, 13))]
+
+def play(field, seed, turns=300):
+	rnd = random.Random(seed)
+	directions = list(Orientation)
+	for turn in range(turns):
+		action = rnd.random()
+		if action < 0.7:
+			field.attack(Field(rnd.randrange(16), rnd.randrange(16)))
+		elif action < 0.75:
+			field.specialAttack(Field(rnd.randrange(14), rnd.randrange(14)))
+		else:
+			shipId, direction = rnd.randrange(10), rnd.choice(directions)
+			if field.movePossible(shipId, direction):
+				field.move(shipId, direction)
+
+class TestSnapshot(unittest.TestCase):
+
+	FIELDLENGTH = 16
+
+	def assertSameField(self, a, b):
+		self.assertEqual(len(a.getShips()), len(b.getShips()))
+		for shipA, shipB in zip(a.getShips(), b.getShips()):
+			self.assertEqual((shipA.bow, shipA.rear, shipA.orientation), (shipB.bow, shipB.rear, shipB.orientation))
+			self.assertEqual(shipA.damages, shipB.damages)
+		self.assertEqual(set(a.getUnfogged()), set(b.getUnfogged()))
+		self.assertEqual(a.getSunkShips(), b.getSunkShips())
+		self.assertEqual(a.getSpecialAttacksLeft(), b.getSpecialAttacksLeft())
+		self.assertEqual(a.isGameOver(), b.isGameOver())
+		self.assertEqual(a.moreShipsLeftToPlace(), b.moreShipsLeftToPlace())
+
+	def test_roundTrip(self):
+		"""
+		Random games are restored exactly: dumpField(), loadField()
+		"""
+		for seed in range(20):
+			field = PlayingField(self.FIELDLENGTH)
+			field.placeFleet(FLEET)
+			play(field, seed, 100 + seed * 20)
+
+			data = dumpField(field)
+			self.assertLess(len(data), 128)
+			restored = loadField(data)
+			self.assertSameField(field, restored)
+			self.assertEqual(dumpField(restored), data)
+
+			# the restored field goes on like the original one
+			play(field, seed + 100)
+			play(restored, seed + 100)
+			self.assertSameField(field, restored)
+
+	def test_backends(self):
+		"""
+		Snapshots are the same for all playing field implementations.
+		"""
+		boards = [BitBoardPlayingField]
+		if NumpyPlayingField is not None:
+			boards.append(NumpyPlayingField)
+
+		field = PlayingField(self.FIELDLENGTH)
+		field.placeFleet(FLEET)
+		play(field, 7)
+		data = dumpField(field)
+		self.assertTrue(field.getSunkShips())
+
+		for board in boards:
+			restored = loadField(data, board)
+			self.assertSameField(field, restored)
+			self.assertEqual(dumpField(restored), data)
+
+	def test_placement(self):
+		"""
+		Playing fields of players who are still placing ships keep the ids of their ships.
+		"""
+		field = PlayingField(self.FIELDLENGTH)
+		for i in [0, 3, 6, 7]:
+			field.placeShip(*FLEET[i])
+		field.attack(Field(6, 1))
+
+		restored = loadField(dumpField(field))
+		self.assertSameField(field, restored)
+		self.assertEqual(restored.getShipAtPosition(Field(12, 0)), 6)
+		self.assertEqual(restored.placeShip(*FLEET[1]), (1, True))
+
+	def test_bigBattle(self):
+		"""
+		Snapshots contain the ruleset of the playing field.
+		"""
+		field = PlayingField(BIG_BATTLE.fieldLength, ruleset=BIG_BATTLE)
+		for shipId, length in enumerate(BIG_BATTLE.shipLengths):
+			x, y = 2 * (shipId % 128), 0 if shipId < 128 else 10
+			field.placeShip(Field(x, y), Field(x, y + length - 1))
+		field.specialAttack(Field(0, 0))
+		field.attack(Field(255, 255))
+
+		restored = loadField(dumpField(field))
+		self.assertIs(restored.getRuleset(), BIG_BATTLE)
+		self.assertSameField(field, restored)
+
+		custom = Ruleset(10, ((3, 2), (2, 1)), specialAttackSize=2, specialAttackCount=1)
+		field = PlayingField(custom.fieldLength, ruleset=custom)
+		restored = loadField(dumpField(field))
+		self.assertEqual(restored.getRuleset().fleet, custom.fleet)
+		self.assertEqual(restored.getSpecialAttacksLeft(), 1)
+
+	def test_brokenSnapshots(self):
+		"""
+		Broken snapshots are rejected with a ValueError.
+		"""
+		field = PlayingField(self.FIELDLENGTH)
+		field.placeFleet(FLEET)
+		data = dumpField(field)
+
+		for broken in [b"", b"XX\x01" + data[3:], data[:2] + b"\x63" + data[3:], data[:-1], data + b"\x00"]:
+			with self.assertRaises(ValueError):
+				loadField(broken)
+
+		# ship 1 on top of ship 0
+		layout = SnapshotLayout.get(CLASSIC)
+		offset = 3 + len(packRuleset(CLASSIC)) + 1 + layout.shipsSize + layout.ship.size
+		broken = data[:offset] + layout.ship.pack(0, 0, 2, 0) + data[offset + layout.ship.size:]
+		with self.assertRaises(ValueError):
+			loadField(broken)
+
+if __name__ == "__main__":
+	unittest.main()
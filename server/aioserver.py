@@ -0,0 +1,101 @@
+#
+# asyncio based server engine.
+#
+# Runs the very same ClientHandler dispatch and LobbyModel/Game logic as the
+# ThreadingMixIn TCPServer, but all clients share one event loop instead of
+# owning one OS thread each.
+#
+
+import asyncio
+import logging
+import struct
+from server import ClientHandler
+from outbound import AsyncOutboundQueue
+import lobby
+
+
+class StreamConnection:
+    """
+    Socket-like adapter around an asyncio StreamWriter so that ClientHandler
+    does not have to know which engine it is running on. Writes go through
+    an AsyncOutboundQueue.
+    """
+
+    def __init__(self, writer):
+        self.__writer = writer
+
+    def getpeername(self):
+        return self.__writer.get_extra_info('peername')
+
+    def close(self):
+        self.__writer.close()
+
+
+class AsyncServer:
+    """
+    Drop-in replacement for TCPServer with the same serve_forever(),
+    shutdown() and server_close() life cycle.
+    """
+
+    def __init__(self, server_address):
+        self.server_address = server_address
+        self.loop = None
+        self.__server = None
+        self.__stopped = None
+
+    def serve_forever(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.__serve())
+        finally:
+            self.loop.close()
+
+    def shutdown(self):
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.__stopped.set)
+        except RuntimeError:
+            # loop already gone
+            pass
+
+    def server_close(self):
+        pass
+
+    async def __serve(self):
+        host, port = self.server_address
+        self.__stopped = asyncio.Event()
+
+        # delayed lobby broadcasts and event deliveries have to run on the loop as well
+        loop = asyncio.get_running_loop()
+        lobby.broadcaster.set_scheduler(lambda delay, callback:
+                                        loop.call_soon_threadsafe(loop.call_later, delay, callback))
+        lobby.bus.set_scheduler(loop.call_soon_threadsafe)
+        self.__server = await asyncio.start_server(self.__handle_client, host, port)
+        logging.debug("asyncio engine serving on {}".format(self.__server.sockets[0].getsockname()))
+        async with self.__server:
+            await self.__stopped.wait()
+
+    async def __handle_client(self, reader, writer):
+        client = ClientHandler(StreamConnection(writer), AsyncOutboundQueue(writer))
+        logging.info("Client {} connected.".format(writer.get_extra_info('peername')))
+        try:
+            while True:
+                # receive 2 bytes size header
+                size = struct.unpack('>H', await reader.readexactly(2))[0]
+                logging.debug("Size: " + str(size))
+
+                # receive message body
+                msg = await reader.readexactly(size)
+                client.handle_message(msg)
+        except asyncio.IncompleteReadError:
+            logging.debug("Client closed the connection.")
+        except ConnectionError as e:
+            logging.debug("Client already dead: {}".format(repr(e)))
+        finally:
+            client.finish()
+            writer.close()
+            # the reader keeps the exception it failed with and thereby this
+            # frame, which must not keep the handler alive as well
+            client = None
@@ -0,0 +1,148 @@
+#
+# Table-driven message dispatch.
+#
+# Every message type from messages.py is routed to a handler together with a
+# schema of its parameters. Schemas are built once when the module defining
+# the routes is imported and check a message in a single pass, converting
+# integers on the way, so handlers only ever see valid parameters.
+#
+
+import time
+import threading
+
+
+class Text:
+    """
+    String parameter with an optional length range.
+    """
+
+    def __init__(self, min_length=0, max_length=None, status='40'):
+        self.min_length = min_length
+        self.max_length = max_length
+        # report status a violation is answered with
+        self.status = status
+
+    def parse(self, value):
+        if len(value) < self.min_length or (self.max_length is not None and len(value) > self.max_length):
+            raise ValueError(value)
+        return value
+
+
+class Int:
+    """
+    Integer parameter with an optional inclusive range.
+    """
+
+    def __init__(self, low=None, high=None, status='40'):
+        self.low = low
+        self.high = high
+        self.status = status
+
+    def parse(self, value):
+        value = int(value)
+        if (self.low is not None and value < self.low) or (self.high is not None and value > self.high):
+            raise ValueError(value)
+        return value
+
+
+class Choice:
+    """
+    Parameter that has to be one of a fixed set of strings.
+    """
+
+    def __init__(self, values, status='40'):
+        self.values = frozenset(values)
+        self.status = status
+
+    def parse(self, value):
+        if value not in self.values:
+            raise ValueError(value)
+        return value
+
+
+class Schema:
+    """
+    Required parameters of a message type and how to check them.
+
+    Args:
+        fields: dict of parameter name -> Text, Int or Choice
+        missing: report status if a parameter is missing
+    """
+
+    def __init__(self, fields=None, missing='40'):
+        self.__fields = tuple((fields or {}).items())
+        self.__missing = missing
+
+    def validate(self, params):
+        """
+        Check and convert the parameters in place.
+        Return the report status to reject the message with or None if it is valid.
+        """
+        for key, field in self.__fields:
+            value = params.get(key)
+            if value is None:
+                return self.__missing
+            try:
+                params[key] = field.parse(value)
+            except ValueError:
+                return field.status
+        return None
+
+
+class Dispatcher:
+    """
+    Maps message types to handlers and keeps per-type timing.
+    """
+
+    def __init__(self, unknown='40'):
+        self.__routes = {}
+        self.__unknown = unknown
+        self.__stats_lock = threading.Lock()
+        # message type -> [handled, rejected, total seconds, max seconds]
+        self.__stats = {}
+
+    def route(self, msgtype, handler, schema=None):
+        """
+        Register the handler of a message type. It is called with the
+        receiving object and the validated parameters.
+        """
+        self.__routes[msgtype] = (handler, schema or Schema())
+        self.__stats[msgtype] = [0, 0, 0.0, 0.0]
+
+    def dispatch(self, target, msgtype, params):
+        """
+        Validate a message and run its handler.
+        Return the report status to reject the message with or None.
+        """
+        route = self.__routes.get(msgtype)
+        if route is None:
+            return self.__unknown
+
+        handler, schema = route
+        start = time.perf_counter()
+        status = schema.validate(params)
+        if status is None:
+            handler(target, params)
+        elapsed = time.perf_counter() - start
+
+        with self.__stats_lock:
+            stats = self.__stats[msgtype]
+            if status is None:
+                stats[0] += 1
+            else:
+                stats[1] += 1
+            stats[2] += elapsed
+            if elapsed > stats[3]:
+                stats[3] = elapsed
+        return status
+
+    def get_stats(self):
+        """
+        Return count, rejections, mean and max dispatch time in milliseconds
+        of every message type that was received at least once.
+        """
+        with self.__stats_lock:
+            stats = {t: list(s) for t, s in self.__stats.items() if s[0] or s[1]}
+        return {t: {'handled': s[0], 'rejected': s[1],
+                    'mean_ms': s[2] * 1000 / (s[0] + s[1]), 'max_ms': s[3] * 1000}
+                for t, s in stats.items()}
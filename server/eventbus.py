@@ -0,0 +1,225 @@
+#
+# Typed publish/subscribe for lobby events.
+#
+# Publishers append the event to the queue of the bus and return right away.
+# A single delivery worker hands every event to the subscribers of its type,
+# which only enqueue reports for their client (see outbound.py), so neither
+# the number nor the speed of the subscribers is paid for by the publisher.
+#
+# The bus and the games keep their subscribers in WeakCallbacks, which do not
+# keep handlers of closed connections alive.
+#
+
+import time
+import inspect
+import logging
+import threading
+import weakref
+from collections import deque
+
+
+class WeakCallbacks:
+    """
+    Callbacks by event type that do not keep their owners alive. Bound
+    methods are referenced through their object, so a ClientHandler that is
+    gone drops out of every registry it did not leave. Other callables are
+    referenced weakly as well and have to be kept alive by whoever registered
+    them. Dead callbacks are skipped and pruned on the next lookup.
+    """
+
+    def __init__(self):
+        # event -> tuple of weak references, replaced on every change
+        self.__callbacks = {}
+        self.__lock = threading.Lock()
+        self.__pruned = 0
+
+    def add(self, event, callback):
+        """
+        Register a callback for an event type.
+        """
+        ref = weakref.WeakMethod(callback) if inspect.ismethod(callback) else weakref.ref(callback)
+        with self.__lock:
+            self.__callbacks[event] = self.__live(event) + (ref,)
+
+    def remove(self, event, callback):
+        """
+        Remove a callback, raises ValueError if it is not registered.
+        """
+        with self.__lock:
+            refs = list(self.__live(event))
+            for i, ref in enumerate(refs):
+                if ref() == callback:
+                    del refs[i]
+                    break
+            else:
+                raise ValueError("callback not registered for {}".format(event))
+            self.__callbacks[event] = tuple(refs)
+
+    def get(self, event):
+        """
+        Return the live callbacks of an event type.
+        """
+        callbacks = []
+        for ref in self.__callbacks.get(event, ()):
+            callback = ref()
+            if callback is not None:
+                callbacks.append(callback)
+        if len(callbacks) < len(self.__callbacks.get(event, ())):
+            with self.__lock:
+                self.__callbacks[event] = self.__live(event)
+        return callbacks
+
+    def count(self):
+        """
+        Return the number of live callbacks and of dead ones pruned so far.
+        """
+        with self.__lock:
+            live = sum(1 for refs in self.__callbacks.values() for ref in refs if ref() is not None)
+            return live, self.__pruned
+
+    def __live(self, event):
+        # must be called with the lock held
+        refs = self.__callbacks.get(event, ())
+        live = tuple(ref for ref in refs if ref() is not None)
+        self.__pruned += len(refs) - len(live)
+        return live
+
+
+class EventBus:
+    """
+    Delivers events, members of an Enum such as LobbyEvent, to the callbacks
+    subscribed to their type in the order they were published. Delivery runs
+    on a thread of the bus unless set_scheduler() provides another place,
+    e.g. the asyncio event loop. Subscribers are held weakly, see
+    WeakCallbacks.
+    """
+
+    def __init__(self):
+        self.__queue = deque()
+        self.__subscribers = WeakCallbacks()
+        self.__worker_lock = threading.Lock()
+        # guards the queue, the pending flag and the metrics
+        self.__lock = threading.Lock()
+        self.__pending = False
+        self.__schedule = self.__schedule_thread
+        self.__worker = None
+        self.__published = {}
+        self.__delivered = 0
+        self.__failed = 0
+        self.__max_depth = 0
+        self.__latency = 0.0
+        self.__max_latency = 0.0
+
+    def set_scheduler(self, schedule):
+        """
+        Replace the delivery thread, schedule(callback) has to run the
+        callback once as soon as possible.
+        """
+        self.__schedule = schedule
+
+    def subscribe(self, event, callback):
+        """
+        Call callback(**params) for every event of the given type from now on.
+        """
+        self.__subscribers.add(event, callback)
+
+    def unsubscribe(self, event, callback):
+        """
+        Stop calling a callback. Events published before may still reach it.
+        """
+        self.__subscribers.remove(event, callback)
+
+    def publish(self, event, params={}):
+        """
+        Queue an event for delivery and return immediately.
+        """
+        with self.__lock:
+            self.__queue.append((event, params, time.perf_counter()))
+            self.__published[event] = self.__published.get(event, 0) + 1
+            if len(self.__queue) > self.__max_depth:
+                self.__max_depth = len(self.__queue)
+            if self.__pending:
+                return
+            self.__pending = True
+        self.__schedule(self.__deliver)
+
+    def get_stats(self):
+        """
+        Return number of published events (in total and by event name),
+        delivered callbacks, failed callbacks, queued events, maximum queue
+        depth, the mean and maximum time from publishing an event to the end
+        of its delivery and the number of live and pruned subscribers.
+        """
+        subscribers, pruned = self.__subscribers.count()
+        with self.__lock:
+            published = sum(self.__published.values())
+            events = published - len(self.__queue)
+            return {
+                'published': published,
+                'by_event': {e.name: n for e, n in self.__published.items()},
+                'delivered': self.__delivered,
+                'failed': self.__failed,
+                'queued': len(self.__queue),
+                'max_depth': self.__max_depth,
+                'mean_ms': self.__latency / events * 1000 if events else 0.0,
+                'max_ms': self.__max_latency * 1000,
+                'subscribers': subscribers,
+                'pruned': pruned
+            }
+
+    def __deliver(self):
+        while True:
+            with self.__lock:
+                if not self.__queue:
+                    self.__pending = False
+                    return
+                event, params, published = self.__queue.popleft()
+
+            delivered = failed = 0
+            for callback in self.__subscribers.get(event):
+                try:
+                    callback(**params)
+                    delivered += 1
+                except Exception:
+                    # one broken subscriber must not keep the event from the others
+                    logging.exception("Delivery of {} failed.".format(event))
+                    failed += 1
+
+            latency = time.perf_counter() - published
+            with self.__lock:
+                self.__delivered += delivered
+                self.__failed += failed
+                self.__latency += latency
+                if latency > self.__max_latency:
+                    self.__max_latency = latency
+
+    def __schedule_thread(self, callback):
+        with self.__worker_lock:
+            if self.__worker is None:
+                self.__worker = DeliveryThread()
+                self.__worker.start()
+        self.__worker.put(callback)
+
+
+class DeliveryThread(threading.Thread):
+    """
+    Daemon thread running the deliveries of an EventBus one after another.
+    """
+
+    def __init__(self):
+        super().__init__(name='EventBus', daemon=True)
+        self.__callbacks = deque()
+        self.__wakeup = threading.Condition()
+
+    def put(self, callback):
+        with self.__wakeup:
+            self.__callbacks.append(callback)
+            self.__wakeup.notify()
+
+    def run(self):
+        while True:
+            with self.__wakeup:
+                while not self.__callbacks:
+                    self.__wakeup.wait()
+                callback = self.__callbacks.popleft()
+            callback()
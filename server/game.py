@@ -3,10 +3,29 @@
 #
 
 import playingfield
+import bitboard
+import snapshot
+from eventbus import WeakCallbacks
+from ruleset import CLASSIC
 import logging
+import struct
 from enum import Enum
+import functools
 import threading
 
+# Playing field implementations selectable with --board
+boards = {'list': playingfield.PlayingField, 'bitboard': bitboard.BitBoardPlayingField}
+
+# the NumPy backend is optional
+try:
+    import numpyboard
+    boards['numpy'] = numpyboard.NumpyPlayingField
+except ImportError:
+    pass
+
+# Playing field implementation of new games, set by main.py
+board = playingfield.PlayingField
+
 # all the callback shit
 class GameEvent(Enum):
     on_ship_edit = 1,
@@ -25,36 +44,55 @@ class GameStatus(Enum):
     ongoing = 3
 
 
+def serialized(method):
+    """
+    Run a method of a game while holding the lock of that game, so commands
+    of the two players never interleave. Other games are not affected.
+    """
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.get_lock():
+            return method(self, *args, **kwargs)
+    return locked
+
+
 class Game:
 
-    def __init__(self, name, id):
+    # snapshot header after magic and version: status, turn and start timestamp
+    SNAPSHOT_MAGIC = b'BG'
+    SNAPSHOT_STATE = struct.Struct('>BBQ')
+    SNAPSHOT_STATUSES = (GameStatus.waiting, GameStatus.ready, GameStatus.ongoing)
+
+    def __init__(self, name, id, ruleset=CLASSIC):
         """
-        Create a new game.
+        Create a new game played by the given rules.
         """
         self.__name = name
-        self.__first_field = playingfield.PlayingField(16)
-        self.__second_field = playingfield.PlayingField(16)
+        self.__ruleset = ruleset
+        self.__first_field = board(ruleset.fieldLength, ruleset=ruleset)
+        self.__second_field = board(ruleset.fieldLength, ruleset=ruleset)
         self.__first_player = id
         self.__second_player = None
         self.__status = GameStatus.waiting
         # turn is either 1 or 2
         from random import randint
         self.__turn = randint(1,2)
+        # set by start()
+        self.__timestamp = None
 
-        # callbacks and sutff
-        self.__callbacks = {}
+        # callbacks and sutff, held weakly
+        self.__callbacks = WeakCallbacks()
 
-        self.__callbacks[GameEvent.on_ship_edit] = []
-        self.__callbacks[GameEvent.on_game_start] = []
-        self.__callbacks[GameEvent.on_host_begins] = []
-        self.__callbacks[GameEvent.on_guest_begins] = []
-        self.__callbacks[GameEvent.on_attack] = []
-        self.__callbacks[GameEvent.on_special_attack] = []
-        self.__callbacks[GameEvent.on_move] = []
-        self.__callbacks[GameEvent.on_game_ended] = []
-        self.__callbacks[GameEvent.on_game_abort] = []
+        # serializes turn, status and fields, reentrant for callbacks that
+        # query the game while it notifies them
+        self.__lock = threading.RLock()
 
-        self.__callbacks_lock = threading.Lock()
+    def get_lock(self):
+        """
+        Return the lock of this game. Hold it to check the turn and play it
+        as a single step.
+        """
+        return self.__lock
 
     def set_second_player(self, id):
         self.__second_player = id
@@ -70,6 +108,9 @@ class Game:
     def get_name(self):
         return self.__name
 
+    def get_ruleset(self):
+        return self.__ruleset
+
     def get_status(self):
         return self.__status
 
@@ -82,6 +123,7 @@ class Game:
     def is_ready(self):
         return self.__status == GameStatus.ready
 
+    @serialized
     def start(self):
         if self.__status is not GameStatus.ongoing:
             return
@@ -95,6 +137,7 @@ class Game:
         else:
             self.__notify_all(GameEvent.on_guest_begins)
 
+    @serialized
     def abort(self):
         self.__notify_all(GameEvent.on_game_abort)
 
@@ -105,20 +148,86 @@ class Game:
             return self.__second_player
         return False
 
-    def place_ship(self, player, x, y, direction, id):
-        bow, rear = self.__x_y_direction_id_to_bow_rear(x, y, direction, id)
-
-        logging.debug('place_ship x:{} y:{} dir:{} id:{} --> bow.x:{} bow.y:{} rear.x:{} rear.y:{}'.format(x, y, direction, id, bow.x, bow.y, rear.x, rear.y))
-
-        suc, left = self.__get_field_by_player(player).placeShip(bow, rear)
+    @serialized
+    def place_fleet(self, player, ships):
+        """
+        Place all ships of a player at once, ships is a list of (x, y, direction) by ship id.
+        Return None on success or the PlacementError and the id of the offending ship.
+        """
+        fleet = [self.__x_y_direction_id_to_bow_rear(x, y, direction, id)
+                 for id, (x, y, direction) in enumerate(ships)]
+        error, id = self.__get_field_by_player(player).placeFleet(fleet)
+        if error is not None:
+            return error, id
 
         # trigger on_game_start if ship placement is done
         if self.__is_game_preparation_done():
             self.__status = GameStatus.ongoing
             self.__notify_all(GameEvent.on_game_start)
 
-        return suc, left
+        return None, -1
 
+    @serialized
+    def snapshot(self):
+        """
+        Encode the game as a compact versioned binary snapshot: ruleset, status,
+        turn, timestamp, name, player ids and both playing fields. Callbacks are
+        not part of the snapshot.
+        """
+        ruleset = self.__ruleset
+        layout = snapshot.SnapshotLayout.get(ruleset)
+        parts = [snapshot.HEADER.pack(self.SNAPSHOT_MAGIC, snapshot.VERSION), snapshot.packRuleset(ruleset),
+                 self.SNAPSHOT_STATE.pack(self.SNAPSHOT_STATUSES.index(self.__status), self.__turn,
+                                          int(self.__timestamp) if self.__timestamp else 0)]
+        for text, size in ((self.__name, '>H'), (self.__first_player, '>B'), (self.__second_player, '>B')):
+            # None is stored as an empty string
+            encoded = text.encode('utf-8') if text else b''
+            parts.append(struct.pack(size, len(encoded)) + encoded)
+        parts.append(snapshot.packField(self.__first_field, layout))
+        parts.append(snapshot.packField(self.__second_field, layout))
+        return b''.join(parts)
+
+    @staticmethod
+    def restore(data, board_class=None):
+        """
+        Create a game from a snapshot of Game.snapshot(), the playing fields are
+        created with board_class or the configured board. Raises ValueError if
+        the snapshot is broken.
+        """
+        board_class = board_class or board
+        try:
+            offset = snapshot.checkHeader(data, Game.SNAPSHOT_MAGIC)
+            ruleset, offset = snapshot.unpackRuleset(data, offset)
+            status, turn, timestamp = Game.SNAPSHOT_STATE.unpack_from(data, offset)
+            offset += Game.SNAPSHOT_STATE.size
+
+            texts = []
+            for size in (struct.Struct('>H'), struct.Struct('>B'), struct.Struct('>B')):
+                length = size.unpack_from(data, offset)[0]
+                offset += size.size
+                texts.append(bytes(data[offset:offset + length]).decode('utf-8') or None)
+                offset += length
+            name, first_player, second_player = texts
+
+            layout = snapshot.SnapshotLayout.get(ruleset)
+            first_field, offset = snapshot.unpackField(data, offset, ruleset, board_class, layout)
+            second_field, offset = snapshot.unpackField(data, offset, ruleset, board_class, layout)
+            status = Game.SNAPSHOT_STATUSES[status]
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError("broken game snapshot") from e
+        if offset != len(data) or turn not in (1, 2):
+            raise ValueError("broken game snapshot")
+
+        game = Game(name, first_player, ruleset)
+        game.__second_player = second_player
+        game.__status = status
+        game.__turn = turn
+        game.__timestamp = str(timestamp) if timestamp else None
+        game.__first_field = first_field
+        game.__second_field = second_field
+        return game
+
+    @serialized
     def check_if_game_over(self, player):
         logging.debug("check_if_game_over()")
         if self.__get_field_by_player(3 - player).isGameOver():
@@ -132,6 +241,7 @@ class Game:
             }
             self.__notify_all(GameEvent.on_game_ended, params)
 
+    @serialized
     def move_ship(self, player, id, direction):
         logging.debug('move_ship()')
         if direction == 'N':
@@ -172,9 +282,12 @@ class Game:
 
         return True
 
+    @serialized
     def fire(self, player, x, y):
         logging.debug('fire()')
-        result, updated = self.__get_field_by_player(3 - player).attack(playingfield.Field(x, y))
+        field = self.__get_field_by_player(3 - player)
+        sunk = len(field.getSunkShips())
+        result, updated = field.attack(playingfield.Field(x, y))
         if result == playingfield.FieldStatus.WATER:
             condition = 'free'
         elif result == playingfield.FieldStatus.DAMAGEDSHIP:
@@ -188,14 +301,19 @@ class Game:
         params = {
             'x': x,
             'y': y,
-            'condition': condition
+            'condition': condition,
+            # ids of the ships sunken by this attack
+            'sunk': field.getSunkShips()[sunk:]
         }
         self.__notify_all(GameEvent.on_attack, params)
         return condition, updated
 
+    @serialized
     def nuke(self, player, x, y):
         logging.debug('nuke()')
-        updates = self.__get_field_by_player(3 - player).specialAttack(playingfield.Field(x, y))
+        field = self.__get_field_by_player(3 - player)
+        sunk = len(field.getSunkShips())
+        updates = field.specialAttack(playingfield.Field(x, y))
 
         # special attack failed
         if updates is False:
@@ -215,7 +333,8 @@ class Game:
         params = {
             'x': x,
             'y': y,
-            'updates': updates
+            'updates': updates,
+            'sunk': field.getSunkShips()[sunk:]
         }
         self.__notify_all(GameEvent.on_special_attack, params)
         return updates
@@ -224,6 +343,7 @@ class Game:
         # this is bullshit
         self.__notify_all(GameEvent.on_ship_edit)
 
+    @serialized
     def surrender(self, player):
         params = {
             'winner': 3 - player,
@@ -237,12 +357,11 @@ class Game:
     def register_callback(self, event, callback):
         """
         Register a callback that will be triggered as a given event occurs.
+        The game does not keep the owner of the callback alive.
         """
         logging.debug("Game register_callback({})".format(event))
 
-        self.__callbacks_lock.acquire()
-        self.__callbacks[event].append(callback)
-        self.__callbacks_lock.release()
+        self.__callbacks.add(event, callback)
 
     def remove_callback(self, event, callback):
         """
@@ -250,9 +369,7 @@ class Game:
         """
         logging.debug("Game remove_callback({})".format(event))
 
-        self.__callbacks_lock.acquire()
-        self.__callbacks[event].remove(callback)
-        self.__callbacks_lock.release()
+        self.__callbacks.remove(event, callback)
 
     def __next_turn(self):
         # toggle between 1 and 2
@@ -269,14 +386,7 @@ class Game:
         return not (self.__first_field.moreShipsLeftToPlace() or self.__second_field.moreShipsLeftToPlace())
 
     def __x_y_direction_id_to_bow_rear(self, x, y, direction, id):
-        if id == 0:
-            length = 5
-        elif 1 <= id <= 2:
-            length = 4
-        elif 3 <= id <= 5:
-            length = 3
-        elif 6 <= id <= 9:
-            length = 2
+        length = self.__ruleset.getShipLength(id)
 
         bow = playingfield.Field(x, y)
         rear = None
@@ -297,10 +407,10 @@ class Game:
     def __notify_all(self, event, params = {}):
         logging.debug("Game __notify_all({})".format(event))
 
-        self.__callbacks_lock.acquire()
-        for cb in self.__callbacks[event]:
+        # called right away, the game lock keeps the reports of both players
+        # in the order of the turns
+        for cb in self.__callbacks.get(event):
             cb(**params)
-        self.__callbacks_lock.release()
 
 
 class Player:
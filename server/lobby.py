@@ -4,179 +4,263 @@
 
 import threading
 import logging
+import collections
 from enum import Enum
 from game import *
+from ruleset import CLASSIC
+from messageparser import MessageParser
+from eventbus import EventBus
 
 class LobbyError(Enum):
     game_is_full = 1,
-    game_does_not_exist = 2
+    game_does_not_exist = 2,
+    game_on_other_worker = 3
 
 class LobbyEvent(Enum):
-    # do not forget to init the event callback list as well
     on_update = 1,
     on_chat = 2
 
-# Map of games by name
-games = {}
-
-# Set of waiting games
-waiting_games = set()
-
-# Map of connected players by id
-players = {}
+class Registry(collections.namedtuple('Registry', ['games', 'waiting_games', 'players', 'player_games'])):
+    """
+    One version of the lobby: games by name, names of the waiting games,
+    players by id and games by player id. A version is never changed once it
+    is published, every change publishes a new one with copies of the maps it
+    touches. Readers take the current version and never lock.
+    """
+    __slots__ = ()
+
+# Current version of the lobby
+registry = Registry({}, frozenset(), {}, {})
+
+# Lock only taken by writers
+registry_lock = threading.Lock()
+
+# Delivers lobby events to the subscribed clients
+bus = EventBus()
+
+
+class LobbyBroadcaster:
+    """
+    Merges lobby updates that happen within a short window, so that every
+    client receives at most one Update_Lobby report per window no matter how
+    many players connect, create games or change their nicknames meanwhile.
+    A window of 0 broadcasts every single update right away.
+    """
+
+    def __init__(self, window=0.05):
+        self.window = window
+        self.__lock = threading.Lock()
+        self.__pending = False
+        self.__requested = 0
+        self.__broadcasts = 0
+        self.__schedule = self.__schedule_timer
+
+    def set_scheduler(self, schedule):
+        """
+        Replace the timer used to delay broadcasts, schedule(delay, callback)
+        has to run the callback once after the given delay in seconds.
+        """
+        self.__schedule = schedule
 
-# Map of callback lists by event type
-callbacks = {}
-# Initialize an empty list for each event
-callbacks[LobbyEvent.on_update] = []
-callbacks[LobbyEvent.on_chat] = []
+    def request(self, broadcast):
+        """
+        Ask for an update broadcast. Returns immediately if one is already pending.
+        """
+        with self.__lock:
+            self.__requested += 1
+            if self.__pending:
+                return
+            self.__pending = True
+
+        if self.window > 0:
+            self.__schedule(self.window, lambda: self.__flush(broadcast))
+        else:
+            self.__flush(broadcast)
 
-# Locks
-games_lock = threading.Lock()
-players_lock = threading.Lock()
-callbacks_lock = threading.Lock()
+    def get_stats(self):
+        """
+        Return number of requested updates, number of broadcasts and number of merged updates.
+        """
+        with self.__lock:
+            return {
+                'requested': self.__requested,
+                'broadcasts': self.__broadcasts,
+                'merged': self.__requested - self.__broadcasts
+            }
+
+    def __flush(self, broadcast):
+        with self.__lock:
+            self.__pending = False
+            self.__broadcasts += 1
+            merged = self.__requested - self.__broadcasts
+        logging.debug("Lobby broadcast, {} updates merged so far.".format(merged))
+        broadcast()
+
+    def __schedule_timer(self, delay, callback):
+        t = threading.Timer(delay, callback)
+        t.daemon = True
+        t.start()
+
+# Coalesces on_update events
+broadcaster = LobbyBroadcaster()
+
+# Lobby version, bumped on every change
+version = 0
+version_lock = threading.Lock()
+
+# Encoded Update_Lobby report of the lobby version it was built for
+snapshot = None
+snapshot_version = -1
+snapshot_lock = threading.Lock()
+# the snapshot and its version as a single value, read without the lock
+published = (-1, None)
+
+# Lobby states of the most recent snapshots by version, used to compute delta
+# updates. Clients that acknowledged an older version get a full snapshot.
+history = collections.OrderedDict()
+history_size = 32
+
+# Encoded delta reports from a base version to the current snapshot
+deltas = {}
+
+# Federation with the other worker processes (see workers.py), None in single process mode
+federation = None
 
 
 class LobbyModel:
 
     def add_player(self, id):
-        global players
-        global players_lock
+        global registry_lock
 
         # add client as player
-        players_lock.acquire()
-        players[id] = Player(id=id)
-        players_lock.release()
+        with registry_lock:
+            players = dict(registry.players)
+            players[id] = Player(id=id)
+            self.__publish(players=players)
+
+        if federation:
+            federation.add_player(id)
 
         # trigger on_update event
         self.__notify_all(LobbyEvent.on_update)
 
-    def add_lobby(self, name, playerid):
+    def add_lobby(self, name, playerid, ruleset=CLASSIC):
         """
-        Create a new lobby and make sure that the name is unique.
-        Return True on success and False on failure (i.e., lobby name was already taken).
+        Create a new lobby played by the given rules and make sure that the name is unique.
+        Return the game on success and None on failure (i.e., lobby name was already taken).
         """
-        global games
-        global waiting_games
-        global players
-        global games_lock
-        global players_lock
+        global registry_lock
 
-        # make sure that game name does not exist yet
-        games_lock.acquire()
-        if name in games:
-            games_lock.release()
-            return False
+        with registry_lock:
+            # make sure that game name does not exist yet
+            if name in registry.games:
+                return None
 
-        # add new game to list of games
-        games[name] = Game(name, playerid)
+            # the name has to be unique across all workers as well
+            if federation and not federation.reserve_game(name, playerid):
+                return None
 
-        # add game to list of waiting games
-        waiting_games.add(name)
-
-        games_lock.release()
+            # add new game to list of games and to the list of waiting games
+            game = Game(name, playerid, ruleset)
+            games = dict(registry.games)
+            games[name] = game
+            player_games = dict(registry.player_games)
+            player_games[playerid] = game
+            self.__publish(games=games, waiting_games=registry.waiting_games | {name}, player_games=player_games)
 
         # trigger on_update event
         self.__notify_all(LobbyEvent.on_update)
 
-        return True
+        return game
 
     def join_lobby(self, name, playerid):
         """
         Join an existing lobby.
-        Return True on success and False on failure as first return parameter.
-        Return the joined game on success and an error type on failure as second return parameter.
-        """
-        global games
-        global waiting_games
-        global players
-        global games_lock
-        global players_lock
-
-        # make sure game name exists
-        games_lock.acquire()
-        if name not in games:
-            games_lock.release()
-            return False, LobbyError.game_does_not_exist
-
-        # make sure the game is not full
-        if name not in waiting_games:
-            games_lock.release()
-            return False, LobbyError.game_is_full
-
-        # set second player id in the game and add the id to the list of players
-        games[name].set_second_player(playerid)
-        players_lock.acquire()
-        players[playerid].set_id(playerid)
-        players_lock.release()
-
-        # remove game from the list of waiting games
-        waiting_games.remove(name)
-        games_lock.release()
+        Return the joined game on success and False on failure as first return parameter.
+        Return None on success and an error type on failure as second return parameter.
+        """
+        global registry_lock
+
+        with registry_lock:
+            # make sure game name exists
+            game = registry.games.get(name)
+            if game is None:
+                if federation and federation.get_owner(name) is not None:
+                    return False, LobbyError.game_on_other_worker
+                return False, LobbyError.game_does_not_exist
+
+            # make sure the game is not full
+            if name not in registry.waiting_games:
+                return False, LobbyError.game_is_full
+
+            # set second player id in the game and remove the game from the list of waiting games
+            game.set_second_player(playerid)
+            player_games = dict(registry.player_games)
+            player_games[playerid] = game
+            self.__publish(waiting_games=registry.waiting_games - {name}, player_games=player_games)
+
+        if federation:
+            federation.join_game(name, playerid)
 
         # trigger on_update event
         self.__notify_all(LobbyEvent.on_update)
 
-        return True, None
+        return game, None
 
     def get_number_of_games(self):
         """
         Return number of games, number of waiting games
         """
-        global games
-        global waiting_games
-        return len(games), len(waiting_games)
+        if federation:
+            return federation.get_number_of_games()
+        current = registry
+        return len(current.games), len(current.waiting_games)
 
     def get_number_of_players(self):
         """
         Return number of connected clients.
         """
-        global players
-        return len(players)
+        if federation:
+            return federation.get_number_of_players()
+        return len(registry.players)
 
     def get_players_info(self):
-        global players
-        global players_lock
-        players_lock.acquire()
+        if federation:
+            return federation.get_players_info()
 
         result = []
-        for _, p in players.items():
+        for _, p in registry.players.items():
             info = {}
             info['nickname'] = p.get_nick()
             info['id'] = p.get_id()
 
             result.append(info)
 
-        players_lock.release()
         return result
 
     def delete_player(self, id):
         """
         Delete a player and make sure that a joined game is aborted as well.
         """
-        global games
-        global waiting_games
-        global players
-        global players_lock
-        global games_lock
-
-        # remove player
-        players_lock.acquire()
-        players.pop(id, None)
-        players_lock.release()
-
-        # remove game if joined
-        games_lock.acquire()
-        for k, g in games.items():
-            # id for each first and second player
-            id1 = g.get_player(1)
-            id2 = g.get_player(2)
-            if id == id1 or id == id2:
-                games.pop(k, None)
-                if k in waiting_games:
-                    waiting_games.remove(k)
-                break
-        games_lock.release()
+        global registry_lock
+
+        with registry_lock:
+            # remove player
+            players = dict(registry.players)
+            players.pop(id, None)
+
+            # remove game if joined, in the same version so that readers
+            # never see a game of a player that is gone
+            game = registry.player_games.get(id)
+            if game is not None:
+                self.__remove_game(game.get_name(), players=players)
+            else:
+                self.__publish(players=players)
+
+        if federation:
+            federation.remove_player(id)
+            if game is not None:
+                federation.release_game(game.get_name())
 
         # trigger on_game_deleted and on_update
         self.__notify_all(LobbyEvent.on_update)
@@ -195,34 +279,33 @@ class LobbyModel:
         """
         Destroy the whole game.
         """
-        global games
-        global waiting_games
-        global games_lock
+        global registry_lock
 
-        games_lock.acquire()
-        # delete game
-        games.pop(game, None)
-        if game in waiting_games:
-            waiting_games.remove(game)
-        games_lock.release()
+        with registry_lock:
+            self.__remove_game(game)
+
+        if federation:
+            federation.release_game(game)
 
         # trigger on_update
         self.__notify_all(LobbyEvent.on_update)
 
     def set_nickname(self, player, nick):
-        global players
-        global players_lock
-        players_lock.acquire()
+        global registry_lock
 
-        if player not in players:
-            logging.debug("This should never happen.")
-            logging.debug(player)
-            players_lock.release()
-            return False
+        with registry_lock:
+            if player not in registry.players:
+                logging.debug("This should never happen.")
+                logging.debug(player)
+                return False
 
-        players[player].set_nick(nick)
+            # players are replaced like everything else readers might look at
+            players = dict(registry.players)
+            players[player] = Player(nick, player)
+            self.__publish(players=players)
 
-        players_lock.release()
+        if federation:
+            federation.set_nickname(player, nick)
 
         # trigger on_update event
         self.__notify_all(LobbyEvent.on_update)
@@ -230,18 +313,18 @@ class LobbyModel:
         return True
 
     def get_games_info(self):
-        global games
-        global waiting_games
-        global games_lock
-        global players_lock
-        games_lock.acquire()
-        players_lock.acquire()
+        if federation:
+            return federation.get_games_info()
+        # games and players of the very same version
+        current = registry
+        players = current.players
 
         result = []
-        for _, g in games.items():
+        for name, g in current.games.items():
             info = {}
-            number_of_players = 1 if g.is_waiting() else 2
-            if g.is_waiting():
+            waiting = name in current.waiting_games
+            number_of_players = 1 if waiting else 2
+            if waiting:
                 info['nicknames'] = [ players[g.get_player(1)].get_nick() ]
                 info['ids'] = [ g.get_player(1) ]
             else:
@@ -253,52 +336,260 @@ class LobbyModel:
 
             result.append(info)
 
-        players_lock.release()
-        games_lock.release()
         return result
 
-    def get_game(self, name):
-        global games
-        global games_lock
+    def get_player_game(self, id):
+        """
+        Return the game a player is in or None.
+        """
+        return registry.player_games.get(id)
 
-        games_lock.acquire()
-        if name in games:
-            g = games[name]
-        else:
-            g = None
-        games_lock.release()
-        return g
+    def get_game(self, name):
+        return registry.games.get(name)
 
     def register_callback(self, event, callback):
         """
         Register a callback that will be triggered as a given event occurs.
+        The lobby does not keep the owner of the callback alive.
         """
         logging.debug("Lobby register_callback({})".format(event))
-
-        global callbacks
-        global callbacks_lock
-
-        callbacks_lock.acquire()
-        callbacks[event].append(callback)
-        callbacks_lock.release()
+        bus.subscribe(event, callback)
 
     def remove_callback(self, event, callback):
         """
-        Remove a callback.
+        Remove a callback, events that are already on their way may still reach it.
         """
         logging.debug("Lobby remove_callback({})".format(event))
+        bus.unsubscribe(event, callback)
+
+    def hand_off(self, name, sock, state):
+        """
+        Move a client connection to the worker that hosts the given game.
+        Return True if the worker took over the socket.
+        """
+        return federation is not None and federation.hand_off(name, sock, state)
+
+    def take_handoff(self, id):
+        """
+        Return the state a player brought along from another worker or None.
+        """
+        if federation:
+            return federation.take_adopted(id)
+        return None
 
-        global callbacks
-        global callbacks_lock
+    def get_version(self):
+        """
+        Return the current lobby version.
+        """
+        global version
+        return version
 
-        callbacks_lock.acquire()
-        callbacks[event].remove(callback)
-        callbacks_lock.release()
+    def get_lobby_report(self):
+        """
+        Return the encoded Update_Lobby report for the current lobby version
+        as a tuple of chunks (see MessageParser.encodeChunks). A single chunk
+        is a regular frame, more than one need the large frame mode.
+        The report is built once per version and the very same tuple is
+        handed out to every caller until the lobby changes again.
+        """
+        global snapshot
+        global snapshot_lock
+
+        # only the first reader of a new version builds the report
+        built, report = published
+        if built == version:
+            return report
+
+        with snapshot_lock:
+            self.__refresh_snapshot()
+            return snapshot
+
+    def get_lobby_update(self, base):
+        """
+        Return the current lobby version and an encoded Update_Lobby report
+        that only contains the games and players that were added, changed or
+        removed since the given base version, chunked like the full report.
+        The report is a full one if the base version is None or unknown (i.e.
+        too old) and None if nothing changed at all.
+        """
+        global snapshot
+        global snapshot_version
+        global snapshot_lock
+        global history
+        global deltas
+
+        with snapshot_lock:
+            self.__refresh_snapshot()
+            if base == snapshot_version:
+                report = None
+            elif base in deltas:
+                report = deltas[base]
+            elif base in history:
+                report = self.__build_delta_report(base, history[base], snapshot_version, history[snapshot_version])
+                deltas[base] = report
+            else:
+                report = snapshot
+            return snapshot_version, report
+
+    def get_broadcast_stats(self):
+        """
+        Return how many lobby updates were requested, broadcasted and merged.
+        """
+        global broadcaster
+        return broadcaster.get_stats()
+
+    def get_event_stats(self):
+        """
+        Return the publish and delivery metrics of lobby events.
+        """
+        return bus.get_stats()
+
+    def dispatch_remote_event(self, event, params):
+        """
+        Deliver an event that happened on another worker to the local subscribers.
+        """
+        self.__dispatch(event, params)
+
+    def __publish(self, **changes):
+        # must be called with the registry lock held
+        global registry
+        registry = registry._replace(**changes)
+
+    def __remove_game(self, name, **changes):
+        # must be called with the registry lock held, further changes are
+        # published in the same version
+        game = registry.games.get(name)
+        if game is not None:
+            # delete game and forget which players were in it
+            games = dict(registry.games)
+            del games[name]
+            player_games = dict(registry.player_games)
+            for player in (game.get_player(1), game.get_player(2)):
+                if player_games.get(player) is game:
+                    del player_games[player]
+            changes.update(games=games, waiting_games=registry.waiting_games - {name}, player_games=player_games)
+
+        if changes:
+            self.__publish(**changes)
 
     def __notify_all(self, event, params = {}):
+        self.__dispatch(event, params)
+        if federation:
+            federation.publish(event, params)
+
+    def __dispatch(self, event, params):
+        global broadcaster
+        global version
+        if event is LobbyEvent.on_update:
+            with version_lock:
+                version += 1
+            broadcaster.request(lambda: self.__notify_local(event, params))
+        else:
+            self.__notify_local(event, params)
+
+    def __refresh_snapshot(self):
+        # must be called with the snapshot lock held
+        global snapshot
+        global snapshot_version
+        global published
+        global history
+        global deltas
+
+        current = version
+        if snapshot_version == current:
+            return
+
+        state = self.__get_lobby_state()
+        snapshot = self.__build_lobby_report(current, state)
+        snapshot_version = current
+        published = (current, snapshot)
+
+        history[current] = state
+        while len(history) > history_size:
+            history.popitem(last=False)
+        deltas = {}
+
+    def __get_lobby_state(self):
+        # Get required data for update lobby msg
+        number_of_games = self.get_number_of_games()
+        games = collections.OrderedDict()
+        for game in self.get_games_info():
+            games[game['game_name']] = tuple(game['ids'])
+        players = collections.OrderedDict()
+        for player in self.get_players_info():
+            players[player['id']] = player['nickname']
+
+        return {
+            'number_of_clients': self.get_number_of_players(),
+            'number_of_games': number_of_games[0],
+            'games': games,
+            'players': players
+        }
+
+    def __build_lobby_report(self, version, state):
+        # Update_Lobby
+        data = {
+            'status': 16,
+            'version': version,
+            'number_of_clients': state['number_of_clients'],
+            'number_of_games': state['number_of_games']
+        }
+        self.__add_games(data, state['games'].items())
+        self.__add_players(data, state['players'].items())
+
+        return tuple(MessageParser().encodeChunks('report', data))
+
+    def __build_delta_report(self, base, old, version, new):
+        # Update_Lobby with changes only
+        data = {
+            'status': 16,
+            'delta': 'true',
+            'base_version': base,
+            'version': version,
+            'number_of_clients': new['number_of_clients'],
+            'number_of_games': new['number_of_games']
+        }
+
+        oldgames, newgames = old['games'], new['games']
+        self.__add_games(data, [(k, v) for k, v in newgames.items() if oldgames.get(k) != v])
+        for i, name in enumerate([k for k in oldgames if k not in newgames]):
+            data['removed_game_{}'.format(i)] = name
+
+        oldplayers, newplayers = old['players'], new['players']
+        self.__add_players(data, [(k, v) for k, v in newplayers.items() if k not in oldplayers or oldplayers[k] != v])
+        for i, id in enumerate([k for k in oldplayers if k not in newplayers]):
+            data['removed_player_{}'.format(i)] = id
+
+        return tuple(MessageParser().encodeChunks('report', data))
+
+    def __add_games(self, data, games):
+        i = 0
+        weirdkey = 'game_name_{}'
+        moreweirdkeys = 'game_players_count_{}'
+        whatevenisthis = 'game_player_{}_{}'
+
+        for name, ids in games:
+            # game stuff
+            data[weirdkey.format(i)] = name
+            data[moreweirdkeys.format(i)] = len(ids)
+            # player 1 stuff
+            data[whatevenisthis.format(i, 0)] = ids[0]
+            # player 2 stuff
+            if len(ids) == 2:
+                data[whatevenisthis.format(i, 1)] = ids[1]
+            i += 1
+
+    def __add_players(self, data, players):
+        i = 0
+        waitwhat = 'player_name_{}'
+        yetanotherkey = 'player_identifier_{}'
+
+        for id, nickname in players:
+            # player stuff
+            data[yetanotherkey.format(i)] = id
+            data[waitwhat.format(i)] = nickname
+            i += 1
+
+    def __notify_local(self, event, params):
         logging.debug("Lobby __notify_all({})".format(event))
-        global callbacks
-        callbacks_lock.acquire()
-        for cb in callbacks[event]:
-            cb(**params)
-        callbacks_lock.release()
+        bus.publish(event, params)
@@ -6,11 +6,19 @@
 
 import os
 import sys
+import time
+import signal
 import logging
 import threading
 import argparse
 sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../common'))
 from server import *
+from aioserver import AsyncServer
+from workers import WorkerPool
+import lobby
+import outbound
+import game
+from ruleset import rulesets
 from socketserver import UDPServer, BaseRequestHandler
 
 
@@ -21,15 +29,80 @@ class UDPDiscoveryHandler(BaseRequestHandler):
             socket = self.request[1]
             socket.sendto("I_AM_A_BATTLESHIP_PLUS_PLUS_SERVER".encode("UTF-8"), self.client_address)
 
-def main():
-    logging.basicConfig(format="%(asctime)s - SERVER - %(levelname)s - %(message)s", level=logging.DEBUG)
+def log_dispatch_stats():
+    for msgtype, stats in sorted(ClientHandler.dispatcher.get_stats().items()):
+        logging.info("Dispatch {}: {handled} handled, {rejected} rejected, {mean_ms:.3f} ms mean, "
+                     "{max_ms:.3f} ms max.".format(msgtype, **stats))
+
+def log_event_stats(published=None, interval=None):
+    stats = lobby.bus.get_stats()
+    rate = "" if interval is None else ", {:.1f}/s".format((stats['published'] - published) / interval)
+    logging.info("Lobby events: {published} published{rate}, {delivered} delivered, {failed} failed, {queued} queued, "
+                 "max depth {max_depth}, {mean_ms:.3f} ms mean, {max_ms:.3f} ms max delivery, "
+                 "{subscribers} subscribers, {pruned} dead ones pruned.".format(
+                     rate=rate, **stats))
+    return stats['published']
+
+def log_stats(interval):
+    published = 0
+    while True:
+        time.sleep(interval)
+        logging.info("Outbound queues: {clients} clients, {queued} queued, max depth {max_depth}, {sent} sent, "
+                     "{superseded} superseded, {disconnected} disconnected.".format(**outbound.get_stats()))
+        logging.info("Lobby updates: {requested} requested, {broadcasts} broadcasted, {merged} merged.".format(
+            **lobby.broadcaster.get_stats()))
+        published = log_event_stats(published, interval)
+        log_dispatch_stats()
 
+def main():
     # parse host and port args
     parser = argparse.ArgumentParser(description="battleship++ dedicated server")
     parser.add_argument('host')
     parser.add_argument('port', type=int)
+    parser.add_argument('--engine', choices=['threading', 'asyncio'], default='threading',
+                        help="one thread per client or a single asyncio event loop (default: threading)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes sharing the port (threading engine only, default: 1)")
+    parser.add_argument('--lobby-window', type=int, default=50, metavar='MS',
+                        help="merge lobby updates within this many milliseconds, 0 disables merging (default: 50)")
+    parser.add_argument('--outbound-limit', type=int, default=256, metavar='N',
+                        help="maximum number of queued reports per client (default: 256)")
+    parser.add_argument('--overflow-policy', choices=[p.name for p in outbound.OverflowPolicy], default='supersede',
+                        help="supersede queued lobby snapshots or disconnect clients as soon as their queue "
+                             "is full (default: supersede)")
+    parser.add_argument('--board', choices=sorted(game.boards), default='list',
+                        help="playing field implementation: lists of fields, bitboards or NumPy grids (default: list)")
+    parser.add_argument('--ruleset', choices=sorted(rulesets), default='classic',
+                        help="board size and fleet: 16x16 with 10 ships or a 256x256 big battle with 160 ships "
+                             "(default: classic)")
+    parser.add_argument('--stats-interval', type=int, default=0, metavar='SECONDS',
+                        help="log queue-depth, broadcast, event and dispatch metrics periodically, 0 disables "
+                             "(default: 0)")
+    parser.add_argument('--log-level', default='DEBUG', help="logging level (default: DEBUG)")
     args = parser.parse_args()
 
+    if args.workers > 1 and args.engine != 'threading':
+        parser.error("--workers requires the threading engine")
+
+    logging.basicConfig(format="%(asctime)s - SERVER - %(levelname)s - %(message)s", level=args.log_level.upper())
+
+    # shut down gracefully on SIGTERM as well, otherwise worker processes are left behind
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    lobby.broadcaster.window = args.lobby_window / 1000.0
+    outbound.limit = args.outbound_limit
+    outbound.policy = outbound.OverflowPolicy[args.overflow_policy]
+    game.board = game.boards[args.board]
+    ClientHandler.configure(rulesets[args.ruleset])
+
+    if args.workers > 1:
+        server = WorkerPool((args.host, args.port), args.workers)
+    elif args.engine == 'asyncio':
+        server = AsyncServer((args.host, args.port))
+    else:
+        server = TCPServer((args.host, args.port), RequestHandler)
+    logging.info("Listening on {}:{} ({} engine, {} worker(s))".format(args.host, args.port, args.engine, args.workers))
+
     # start UPD discovery service
     udpdiscovery_server = UDPServer(("", 12345), UDPDiscoveryHandler)
     udpdiscovery_server_thread = threading.Thread(target=udpdiscovery_server.serve_forever)
@@ -37,8 +110,10 @@ def main():
     udpdiscovery_server_thread.start()
     logging.debug("UDP discovery server running in thread: " + udpdiscovery_server_thread.name)
 
-    server = TCPServer((args.host, args.port), RequestHandler)
-    logging.info("Listening on {}:{}".format(args.host, args.port))
+    if args.stats_interval > 0:
+        stats_thread = threading.Thread(target=log_stats, args=(args.stats_interval,))
+        stats_thread.daemon = True
+        stats_thread.start()
 
     server_thread = threading.Thread(target=server.serve_forever)
     server_thread.daemon = True
@@ -58,6 +133,10 @@ def main():
     server.server_close()
     udpdiscovery_server.shutdown()
     udpdiscovery_server.server_close()
+    logging.info("Lobby updates: {requested} requested, {broadcasts} broadcasted, {merged} merged.".format(
+        **lobby.broadcaster.get_stats()))
+    log_event_stats()
+    log_dispatch_stats()
     logging.info("Bye!")
 
 if __name__ == '__main__':
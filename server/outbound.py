@@ -0,0 +1,272 @@
+#
+# Per-client outbound queues.
+#
+# Callbacks only enqueue the encoded reports, a writer per client drains the
+# queue. A slow or stalled client therefore can no longer block the lobby or
+# game events that are delivered to every subscriber one after another.
+#
+
+import socket
+import logging
+import asyncio
+import threading
+import weakref
+from collections import deque
+from enum import Enum
+
+
+class OverflowPolicy(Enum):
+    # a new lobby snapshot replaces the one still waiting in the queue
+    supersede = 1,
+    # every report is queued, the client is dropped once the queue is full
+    disconnect = 2
+
+
+# Defaults for new queues, set by main.py
+limit = 256
+policy = OverflowPolicy.supersede
+
+# All live queues for the queue-depth metrics
+queues = weakref.WeakSet()
+queues_lock = threading.Lock()
+
+# Counters of queues that are gone already
+totals = {'sent': 0, 'superseded': 0, 'disconnected': 0}
+
+
+def get_stats():
+    """
+    Return queue-depth metrics over all connected clients.
+    """
+    with queues_lock:
+        live = list(queues)
+        stats = dict(totals)
+    depths = [q.get_depth() for q in live]
+    stats['clients'] = len(live)
+    stats['queued'] = sum(depths)
+    stats['max_depth'] = max(depths) if depths else 0
+    for q in live:
+        for k, v in q.get_counters().items():
+            stats[k] += v
+    return stats
+
+
+class OutboundQueue:
+    """
+    Bounded queue of encoded messages for one client.
+    Subclasses implement the actual writer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._closed = False
+        self.__limit = limit
+        self.__policy = policy
+        # queue entry of the lobby snapshot that has not been sent yet
+        self.__lobby_entry = None
+        self.__counters = {'sent': 0, 'superseded': 0, 'disconnected': 0}
+        with queues_lock:
+            queues.add(self)
+
+    def put(self, msg, lobby=False):
+        """
+        Queue a message. Never blocks.
+
+        Args:
+            msg: the encoded message or a tuple of chunks sent back to back
+            lobby: True if the message is a lobby snapshot a newer one may replace
+        """
+        with self._lock:
+            overflow = self.__put(msg, lobby)
+        self.__notify(overflow)
+
+    def put_lobby(self, build):
+        """
+        Queue a lobby report built by build(pending) with the queue locked,
+        so the report cannot be sent while it is being replaced. pending is
+        True if the previous lobby report has not been sent yet and the new
+        one replaces it. Nothing is queued if build returns None.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            pending = self.__policy is OverflowPolicy.supersede and self.__lobby_entry is not None
+            msg = build(pending)
+            if msg is None:
+                return
+            overflow = self.__put(msg, True)
+        self.__notify(overflow)
+
+    def close(self, flush=False):
+        """
+        Stop the writer. Pending messages are sent first and the writer is
+        waited for if flush is set.
+        """
+        with self._lock:
+            self._closed = True
+            if not flush:
+                self._queue.clear()
+        self._wakeup()
+        if flush:
+            self._join()
+
+        with queues_lock:
+            if self in queues:
+                for k, v in self.get_counters().items():
+                    totals[k] += v
+                queues.discard(self)
+
+    def __put(self, msg, lobby):
+        # must be called with the lock held, returns True if the queue overflowed
+        if self._closed:
+            return None
+
+        if lobby and self.__policy is OverflowPolicy.supersede and self.__lobby_entry is not None:
+            self.__lobby_entry[0] = msg
+            self.__counters['superseded'] += 1
+            return None
+
+        if len(self._queue) >= self.__limit:
+            logging.info("Outbound queue full ({} messages), dropping slow client.".format(len(self._queue)))
+            self.__counters['disconnected'] += 1
+            self._closed = True
+            self._queue.clear()
+            return True
+
+        entry = [msg]
+        self._queue.append(entry)
+        if lobby:
+            self.__lobby_entry = entry
+        return False
+
+    def __notify(self, overflow):
+        # None if nothing was queued
+        if overflow:
+            self._disconnect()
+        elif overflow is not None:
+            self._wakeup()
+
+    def get_depth(self):
+        return len(self._queue)
+
+    def get_counters(self):
+        return dict(self.__counters)
+
+    def _pop(self):
+        # must be called with the lock held
+        entry = self._queue.popleft()
+        if entry is self.__lobby_entry:
+            self.__lobby_entry = None
+        self.__counters['sent'] += 1
+        return entry[0]
+
+    def _chunks(self, msg):
+        return (msg,) if isinstance(msg, bytes) else msg
+
+    def _wakeup(self):
+        raise NotImplementedError
+
+    def _join(self):
+        raise NotImplementedError
+
+    def _disconnect(self):
+        raise NotImplementedError
+
+
+class ThreadedOutboundQueue(OutboundQueue):
+    """
+    Outbound queue drained by a writer thread doing blocking sendall calls.
+    """
+
+    def __init__(self, sock):
+        super().__init__()
+        self.__socket = sock
+        self.__cond = threading.Condition(self._lock)
+        self.__writer = threading.Thread(target=self.__drain)
+        self.__writer.daemon = True
+        self.__writer.start()
+
+    def _wakeup(self):
+        with self.__cond:
+            self.__cond.notify()
+
+    def _join(self):
+        if threading.current_thread() is not self.__writer:
+            self.__writer.join()
+
+    def _disconnect(self):
+        try:
+            # wakes up the blocking recv of the handler as well
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._wakeup()
+
+    def __drain(self):
+        while True:
+            with self.__cond:
+                while not self._queue and not self._closed:
+                    self.__cond.wait()
+                if not self._queue:
+                    return
+                msg = self._pop()
+
+            try:
+                for chunk in self._chunks(msg):
+                    self.__socket.sendall(chunk)
+                    logging.debug(b"Raw out: " + chunk)
+            except socket.error as e:
+                logging.debug("Client already dead: {}".format(repr(e)))
+                with self._lock:
+                    self._closed = True
+                    self._queue.clear()
+                return
+
+
+class AsyncOutboundQueue(OutboundQueue):
+    """
+    Outbound queue drained by a writer task on the event loop.
+    Must only be used from the loop thread.
+    """
+
+    def __init__(self, writer):
+        super().__init__()
+        self.__writer = writer
+        self.__ready = asyncio.Event()
+        self.__task = asyncio.ensure_future(self.__drain())
+
+    def _wakeup(self):
+        self.__ready.set()
+
+    def _join(self):
+        # the task finishes on its own once the queue is empty
+        pass
+
+    def _disconnect(self):
+        self.__writer.transport.abort()
+        self.__task.cancel()
+
+    async def __drain(self):
+        while True:
+            await self.__ready.wait()
+            with self._lock:
+                if not self._queue:
+                    self.__ready.clear()
+                    if self._closed:
+                        return
+                    continue
+                msg = self._pop()
+
+            try:
+                for chunk in self._chunks(msg):
+                    self.__writer.write(chunk)
+                    logging.debug(b"Raw out: " + chunk)
+                # wait for the kernel buffer if the client does not keep up
+                await self.__writer.drain()
+            except ConnectionError as e:
+                logging.debug("Client already dead: {}".format(repr(e)))
+                with self._lock:
+                    self._closed = True
+                    self._queue.clear()
+                return
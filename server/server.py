@@ -6,7 +6,6 @@ import sys
 import logging
 import socketserver
 import socket
-import struct
 import threading
 import hashlib
 from messageparser import MessageParser
@@ -14,15 +13,23 @@ import messages
 from lobby import *
 from game import *
 from helpers import *
+from outbound import ThreadedOutboundQueue
+from framing import FrameReader
+from dispatch import Dispatcher, Schema, Text, Int, Choice
+from ruleset import CLASSIC
 
 
 class TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
-    pass
+    # the default backlog of 5 drops connects that come in bursts
+    request_queue_size = 128
 
 
 class RequestHandler(socketserver.BaseRequestHandler):
 
     def setup(self):
+        # reports are small and sent one by one, do not wait for more data
+        # (the asyncio engine does the same)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         self.__client = ClientHandler(self.request)
 
     def handle(self):
@@ -30,73 +37,72 @@ class RequestHandler(socketserver.BaseRequestHandler):
 
     def finish(self):
         self.__client.finish()
+        if self.__client.is_handed_off():
+            self.server.detach(self.request)
 
 
 class ClientHandler:
 
-    def __init__(self, sock):
+    def __init__(self, sock, outbound=None):
         self.__socket = sock
+        # reports are queued and sent by a writer of their own
+        self.__outbound = outbound if outbound is not None else ThreadedOutboundQueue(sock)
         self.__message_parser = MessageParser()
         self.__lobby_model = LobbyModel()
-        # name of the game
+        # the game the client is in
         self.__game = None
         # player number (1 or 2)
         self.__player = None
         # player id lol
         self.__id = self.__get_own_player_id()
-        # add client as player
-        self.__lobby_model.add_player(self.__id)
-
-        # register callbacks
-        self.__lobby_model.register_callback(LobbyEvent.on_update, self.on_update_lobby)
-        self.__lobby_model.register_callback(LobbyEvent.on_chat, self.on_chat)
+        self.__nickname = None
+        # set once the connection moved to another worker process
+        self.__handed_off = False
+        # whether the client acknowledged a lobby version and gets delta updates
+        self.__lobby_deltas = False
+        # lobby version of the last queued report and the version that report
+        # is based on, None for a full report
+        self.__lobby_version = None
+        self.__lobby_base = None
+        # whether the client understands chunked reports beyond 64 KiB
+        self.__large_frames = False
+        # buffered frame reader of the threading engine
+        self.__reader = None
+        self.__enter_lobby()
 
     def handle(self):
         logging.info("Client {} connected.".format(self.__socket.getpeername()))
-        while True:
-            logging.debug("handle({}) loop.".format(self.__socket.getpeername()))
-            # receive 2 bytes size header
-            size = self.__recv(2)
-            if not size:
-                logging.debug("Did not receive 2 bytes header.")
-                break
-            size = struct.unpack('>H', size)[0]
-            logging.debug("Size: " + str(size))
-
-            # receive message body
-            msg = self.__recv(size)
-            if not msg:
-                logging.debug("Did not receive {} bytes body.".format(str(size)))
-                break
-
-            # explode received data into message type and parameters
-            msgtype, msgparams = self.__message_parser.decode(msg.decode())
-            logging.debug("Msg type: " + msgtype)
-            logging.debug("Msg parameters: " + repr(msgparams))
-
-            # dispatch message type
-            if msgtype == messages.CREATE_GAME:
-                self.__create_game(msgparams)
-            elif msgtype == messages.JOIN_GAME:
-                self.__join_game(msgparams)
-            elif msgtype == messages.SET_NICK:
-                self.__set_nickname(msgparams)
-            elif msgtype == messages.LEAVE_GAME:
-                self.__leave_game()
-            elif msgtype == messages.INIT_BOARD:
-                self.__init_board(msgparams)
-            elif msgtype == messages.FIRE:
-                self.__fire(msgparams)
-            elif msgtype == messages.NUKE:
-                self.__nuke(msgparams)
-            elif msgtype == messages.MOVE:
-                self.__move(msgparams)
-            elif msgtype == messages.SURRENDER:
-                self.__surrender()
-            elif msgtype == messages.CHAT_SEND:
-                self.__chat(msgparams)
-            else:
-                self.__unknown_msg()
+
+        # pick up where we left off if another worker handed us over
+        handoff = self.__lobby_model.take_handoff(self.__id)
+        pending = bytes.fromhex(handoff['pending']) if handoff else b''
+        self.__reader = FrameReader(self.__socket, pending=pending)
+        if handoff:
+            self.__resume(handoff)
+
+        try:
+            for msg in self.__reader.frames():
+                logging.debug(b"Raw in: " + msg)
+                self.handle_message(msg)
+                if self.__handed_off:
+                    break
+        except socket.error as e:
+            logging.debug("Client already dead: {}".format(repr(e)))
+
+    def handle_message(self, msg):
+        """
+        Decode and dispatch a single message body (without the size header).
+        This is the entry point for every server engine.
+        """
+        # explode received data into message type and parameters
+        msgtype, msgparams = self.__message_parser.decodeFrame(msg)
+        logging.debug("Msg type: " + repr(msgtype))
+        logging.debug("Msg parameters: " + repr(msgparams))
+
+        # validate and dispatch, see the routes at the end of the class
+        status = self.dispatcher.dispatch(self, msgtype, msgparams)
+        if status is not None:
+            self.__send(self.__message_parser.encode('report', {'status': status}))
 
     #
     # Callbacks
@@ -104,51 +110,11 @@ class ClientHandler:
 
     def on_update_lobby(self):
         logging.debug("on_update_lobby()")
-
-        # Get required data for update lobby msg
-        number_of_clients = self.__lobby_model.get_number_of_players()
-        number_of_games = self.__lobby_model.get_number_of_games()
-        games_info = self.__lobby_model.get_games_info()
-        players_info = self.__lobby_model.get_players_info()
-
-        # Update_Lobby
-        data = {
-            'status': 16,
-            'number_of_clients': number_of_clients,
-            'number_of_games': number_of_games[0]
-        }
-
-        i = 0
-        weirdkey = 'game_name_{}'
-        moreweirdkeys = 'game_players_count_{}'
-        whatevenisthis = 'game_player_{}_{}'
-        waitwhat = 'player_name_{}'
-        yetanotherkey = 'player_identifier_{}'
-
-        for game in games_info:
-            # game stuff
-            data[weirdkey.format(i)] = game['game_name']
-            data[moreweirdkeys.format(i)] = game['number_of_players']
-            # player 1 stuff
-            data[whatevenisthis.format(i, 0)] = game['ids'][0]
-            # player 2 stuff
-            if game['number_of_players'] == 2:
-                data[whatevenisthis.format(i, 1)] = game['ids'][1]
-            i += 1
-
-        i = 0
-        for player in players_info:
-            # player stuff
-            data[yetanotherkey.format(i)] = player['id']
-            data[waitwhat.format(i)] = player['nickname']
-            i += 1
-
-        msg = self.__message_parser.encode('report', data)
-        self.__send(msg)
+        self.__outbound.put_lobby(self.__build_lobby_update)
 
     def on_game_abort(self):
         # delete game
-        self.__lobby_model.delete_game(self.__game)
+        self.__lobby_model.delete_game(self.__game.get_name())
         self.__game = None
 
         self.__send(self.__message_parser.encode('report', {'status': '19'}))
@@ -157,7 +123,7 @@ class ClientHandler:
         msg = {
             'status': '17',
             'winner': winner - 1,
-            'name_of_game': self.__game,
+            'name_of_game': self.__game.get_name(),
             'timestamp': timestamp,
             'identifier_0': id0,
             'identifier_1': id1,
@@ -165,7 +131,7 @@ class ClientHandler:
         }
 
         # delete game
-        self.__lobby_model.delete_game(self.__game)
+        self.__lobby_model.delete_game(self.__game.get_name())
         self.__game = None
 
         self.__send(self.__message_parser.encode('report', msg))
@@ -186,11 +152,14 @@ class ClientHandler:
         logging.debug('on_guest_begins()')
         self.__begin_turn()
 
-    def on_attack(self, x, y, condition):
+    def on_attack(self, x, y, condition, sunk=()):
         logging.debug('on_attack()')
+        if sunk:
+            # the protocol has no report of sunken ships yet
+            logging.debug("Sunk ships {}.".format(sunk))
         msg = None
         # if player is enemy
-        if self.__lobby_model.get_game(self.__game).get_turn() == self.__player:
+        if self.__game.get_turn() == self.__player:
             # update own field
             msg = {
                 'status': 13,
@@ -212,10 +181,12 @@ class ClientHandler:
             }
             self.__send(self.__message_parser.encode('report', msg))
 
-    def on_special_attack(self, x, y, updates):
+    def on_special_attack(self, x, y, updates, sunk=()):
         logging.debug('on_special_attack()')
+        if sunk:
+            logging.debug("Sunk ships {}.".format(sunk))
         msg = None
-        if self.__lobby_model.get_game(self.__game).get_turn() == self.__player:
+        if self.__game.get_turn() == self.__player:
             # update own field
             msg = {
                 'status': 13,
@@ -243,7 +214,7 @@ class ClientHandler:
     def on_move(self, updates):
         logging.debug('on_move()')
         msg = None
-        if self.__lobby_model.get_game(self.__game).get_turn() == self.__player:
+        if self.__game.get_turn() == self.__player:
             # update enemy field
             if len(updates) > 0:
                 msg = {
@@ -273,84 +244,81 @@ class ClientHandler:
     def get_socket(self):
         return self.__socket
 
+    def is_handed_off(self):
+        return self.__handed_off
+
     def finish(self):
+        if self.__handed_off:
+            return
+
         logging.info("Client disconnected.")
 
+        # drop whatever is still queued
+        self.__outbound.close()
+
         # remove any left callbacks
         self.__lobby_model.remove_callback(LobbyEvent.on_update, self.on_update_lobby)
         self.__lobby_model.remove_callback(LobbyEvent.on_chat, self.on_chat)
 
         # end running game if any
-        if self.__game and self.__lobby_model.get_game(self.__game) is not None:
+        if self.__game is not None and self.__lobby_model.get_player_game(self.__id) is self.__game:
             # remove callbacks of disconnected player
-            self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_ship_edit, self.on_ship_edit)
-            self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_game_start, self.on_game_start)
-            self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_attack, self.on_attack)
-            self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_special_attack, self.on_special_attack)
-            self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_move, self.on_move)
-            #self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_host_begins, self.on_host_begins)
-            #self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_guest_begins, self.on_guest_begins)
-            self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_game_ended, self.on_game_ended)
-            self.__lobby_model.get_game(self.__game).remove_callback(GameEvent.on_game_abort, self.on_game_abort)
+            self.__game.remove_callback(GameEvent.on_ship_edit, self.on_ship_edit)
+            self.__game.remove_callback(GameEvent.on_game_start, self.on_game_start)
+            self.__game.remove_callback(GameEvent.on_attack, self.on_attack)
+            self.__game.remove_callback(GameEvent.on_special_attack, self.on_special_attack)
+            self.__game.remove_callback(GameEvent.on_move, self.on_move)
+            if self.__player == 1:
+                self.__game.remove_callback(GameEvent.on_host_begins, self.on_host_begins)
+            else:
+                self.__game.remove_callback(GameEvent.on_guest_begins, self.on_guest_begins)
+            self.__game.remove_callback(GameEvent.on_game_ended, self.on_game_ended)
+            self.__game.remove_callback(GameEvent.on_game_abort, self.on_game_abort)
 
             # surrender
-            if self.__lobby_model.get_game(self.__game).is_ongoing():
+            if self.__game.is_ongoing():
                 logging.debug("Surrender by disconnect.")
-                self.__lobby_model.get_game(self.__game).surrender(self.__player)
+                self.__game.surrender(self.__player)
             # abort
-            elif self.__lobby_model.get_game(self.__game).is_ready():
+            elif self.__game.is_ready():
                 logging.debug("Abort by disconnect.")
-                self.__lobby_model.get_game(self.__game).abort()
+                self.__game.abort()
 
         # remove player from lobby
         self.__lobby_model.delete_player(self.__id)
 
     def __create_game(self, params):
-        # make sure parameter list is complete
-        if not self.__expect_parameter(['name'], params):
-            return
-
         # check if client is already in a game
-        if self.__game:
+        if self.__game is not None:
             logging.debug("Client already in some game.")
             # 31 is the new 42
             self.__send(self.__message_parser.encode('report', {'status': '31'}))
             return
 
-        # check game name length
-        if 1 > len(params['name']) or len(params['name']) > 64:
-            logging.debug("Game name too long.")
-            self.__send(self.__message_parser.encode('report', {'status': '37'}))
-            return
-
         # create the game
-        game = self.__lobby_model.add_lobby(params['name'], self.__id)
+        game = self.__lobby_model.add_lobby(params['name'], self.__id, self.ruleset)
 
         if not game:
             self.__send(self.__message_parser.encode('report', {'status': '37'}))
             return
 
-        self.__game = params['name']
+        self.__game = game
         self.__player = 1
         self.__send(self.__message_parser.encode('report', {'status': '28'}))
 
         # register game callbacks
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_ship_edit, self.on_ship_edit)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_game_start, self.on_game_start)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_attack, self.on_attack)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_special_attack, self.on_special_attack)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_move, self.on_move)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_host_begins, self.on_host_begins)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_game_ended, self.on_game_ended)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_game_abort, self.on_game_abort)
+        self.__game.register_callback(GameEvent.on_ship_edit, self.on_ship_edit)
+        self.__game.register_callback(GameEvent.on_game_start, self.on_game_start)
+        self.__game.register_callback(GameEvent.on_attack, self.on_attack)
+        self.__game.register_callback(GameEvent.on_special_attack, self.on_special_attack)
+        self.__game.register_callback(GameEvent.on_move, self.on_move)
+        self.__game.register_callback(GameEvent.on_host_begins, self.on_host_begins)
+        self.__game.register_callback(GameEvent.on_game_ended, self.on_game_ended)
+        self.__game.register_callback(GameEvent.on_game_abort, self.on_game_abort)
 
     def __join_game(self, params):
-        # make sure parameter list is complete
-        if not self.__expect_parameter(['name'], params):
-            return
-
         # check if client is already in a game
-        if self.__game:
+        if self.__game is not None:
             logging.debug("Client already in some game.")
             self.__send(self.__message_parser.encode('report', {'status': '31'}))
             return
@@ -360,7 +328,10 @@ class ClientHandler:
 
         # handle game join errors
         if e:
-            if e == LobbyError.game_is_full:
+            if e == LobbyError.game_on_other_worker:
+                self.__hand_off(params['name'])
+                return
+            elif e == LobbyError.game_is_full:
                 self.__send(self.__message_parser.encode('report', {'status': '47'}))
                 return
             elif e == LobbyError.game_does_not_exist:
@@ -370,35 +341,65 @@ class ClientHandler:
         # ack game join
         self.__send(self.__message_parser.encode('report', {'status': '27'}))
 
-        self.__game = params['name']
+        self.__game = game
         self.__player = 2
 
         # register game callbacks
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_ship_edit, self.on_ship_edit)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_game_start, self.on_game_start)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_attack, self.on_attack)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_special_attack, self.on_special_attack)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_move, self.on_move)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_guest_begins, self.on_guest_begins)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_game_ended, self.on_game_ended)
-        self.__lobby_model.get_game(self.__game).register_callback(GameEvent.on_game_abort, self.on_game_abort)
+        self.__game.register_callback(GameEvent.on_ship_edit, self.on_ship_edit)
+        self.__game.register_callback(GameEvent.on_game_start, self.on_game_start)
+        self.__game.register_callback(GameEvent.on_attack, self.on_attack)
+        self.__game.register_callback(GameEvent.on_special_attack, self.on_special_attack)
+        self.__game.register_callback(GameEvent.on_move, self.on_move)
+        self.__game.register_callback(GameEvent.on_guest_begins, self.on_guest_begins)
+        self.__game.register_callback(GameEvent.on_game_ended, self.on_game_ended)
+        self.__game.register_callback(GameEvent.on_game_abort, self.on_game_abort)
 
-        self.__lobby_model.get_game(self.__game).just_begin_ship_placement_already()
+        self.__game.just_begin_ship_placement_already()
 
     def __set_nickname(self, params):
-        if not self.__expect_parameter(['name'], params):
-            return
-
-        if len(params['name']) > 64:
-            logging.debug("Nickname too long.")
-            self.__send(self.__message_parser.encode('report', {'status': '36'}))
-            return
-
         # tell lobby to set nickname and hope for the best
         self.__lobby_model.set_nickname(self.__id, params['name'])
+        self.__nickname = params['name']
+
+    def __enter_lobby(self):
+        # add client as player
+        self.__lobby_model.add_player(self.__id)
+
+        # register callbacks
+        self.__lobby_model.register_callback(LobbyEvent.on_update, self.on_update_lobby)
+        self.__lobby_model.register_callback(LobbyEvent.on_chat, self.on_chat)
+
+    def __hand_off(self, name):
+        logging.debug("Game {} lives on another worker, handing off.".format(name))
+
+        # everything queued so far still has to go out from here
+        self.__outbound.close(flush=True)
+
+        # leave this worker like a disconnect, but keep the socket open
+        self.finish()
+        self.__handed_off = True
+
+        # bytes the client already sent after game_join belong to the new worker
+        state = {'id': self.__id, 'nickname': self.__nickname, 'game': name, 'pending': self.__reader.pending().hex(),
+                 'large_frames': self.__large_frames}
+        if not self.__lobby_model.hand_off(name, self.__socket, state):
+            # the game vanished in the meantime, nobody is left to answer
+            logging.error("Handoff of {} failed.".format(self.__id))
+            self.__handed_off = False
+            self.__outbound = ThreadedOutboundQueue(self.__socket)
+            self.__enter_lobby()
+            if self.__nickname is not None:
+                self.__lobby_model.set_nickname(self.__id, self.__nickname)
+            self.__send(self.__message_parser.encode('report', {'status': '37'}))
+
+    def __resume(self, state):
+        self.__large_frames = state['large_frames']
+        if state['nickname'] is not None:
+            self.__set_nickname({'name': state['nickname']})
+        self.__join_game({'name': state['game']})
 
     def __get_own_player_id(self):
-        addr, port = self.__socket.getpeername()
+        addr, port = self.__socket.getpeername()[:2]
         playerid = hashlib.sha1(b(addr + str(port))).hexdigest()
         return playerid
 
@@ -410,44 +411,24 @@ class ClientHandler:
             self.__send(self.__message_parser.encode('report', {'status': '43'}))
             return
 
-        shipx = 'ship_{}_x'
-        shipy = 'ship_{}_y'
-        shipdir = 'ship_{}_direction'
-
-        # make sure that all parameters exist
-        if not self.__expect_parameter(
-            [shipx.format(i) for i in range(0, 10)] +
-            [shipy.format(i) for i in range(0, 10)] +
-            [shipdir.format(i) for i in range(0, 10)], params):
-            return
-
-        # init board
-        left = True
-        for id in range(0, 10):
-            x = int(params[shipx.format(id)])
-            y = int(params[shipy.format(id)])
-            dir = params[shipdir.format(id)]
-            logging.debug('self.__lobby_model :: {}'.format(repr(self.__lobby_model)))
-            logging.debug('self.__lobby_model.get_game(self.__game) :: {}'.format(repr(self.__lobby_model.get_game(self.__game))))
-            logging.debug('self.__game :: {}'.format(repr(self.__game)))
-            suc, left = self.__lobby_model.get_game(self.__game).place_ship(self.__player, x, y, dir, id)
+        # init board, the whole fleet is placed or none of it
+        ships = [(params[x], params[y], params[dir]) for x, y, dir in self.__ship_params]
+        game = self.__game
+        # the game starts once, after whichever fleet is placed last
+        with game.get_lock():
+            error, id = game.place_fleet(self.__player, ships)
 
             # catch illegal placement
-            if suc == -1:
-                logging.debug("Nonsense ship placement.")
+            if error is not None:
+                logging.debug("Nonsense placement of ship {}: {}.".format(id, error.value))
                 self.__send(self.__message_parser.encode('report', {'status': '38'}))
                 return
 
-        if left:
-            logging.debug("Something is still wrong with ship placement.")
-            self.__send(self.__message_parser.encode('report', {'status': '38'}))
-            return
-
-        # ack init board
-        self.__send(self.__message_parser.encode('report', {'status': '29'}))
+            # ack init board
+            self.__send(self.__message_parser.encode('report', {'status': '29'}))
 
-        # trigger random begin return message
-        self.__lobby_model.get_game(self.__game).start()
+            # trigger random begin return message
+            game.start()
 
     def __leave_game(self):
         # not in any game
@@ -456,106 +437,94 @@ class ClientHandler:
             return
 
         # make sure the game has not started yet
-        if self.__lobby_model.get_game(self.__game).is_ongoing():
+        if self.__game.is_ongoing():
             self.__send(self.__message_parser.encode('report', {'status': '43'}))
             logging.debug("Too late to leave the game.")
             return
 
         # abort
-        self.__lobby_model.get_game(self.__game).abort()
+        self.__game.abort()
 
     def __fire(self, params):
-        if not self.__expect_parameter(['coordinate_x', 'coordinate_y'], params):
-            return
-
         # not in any game
         if self.__game is None:
             self.__send(self.__message_parser.encode('report', {'status': '43'}))
             return
 
-        # check if it's actually your turn
-        if self.__lobby_model.get_game(self.__game).get_turn() != self.__player:
-            self.__send(self.__message_parser.encode('report', {'status': '41'}))
-            return
-
-        # check if coordinates are valid
-        if not ((0 <= int(params['coordinate_x']) <= 15) and (0 <= int(params['coordinate_y']) <= 15)):
-            self.__send(self.__message_parser.encode('report', {'status': '39'}))
-            return
+        game = self.__game
+        # the opponent cannot play before this turn is over
+        with game.get_lock():
+            # check if it's actually your turn
+            if game.get_turn() != self.__player:
+                self.__send(self.__message_parser.encode('report', {'status': '41'}))
+                return
 
-        # save move
-        _, updated = self.__lobby_model.get_game(self.__game).fire(self.__player, params['coordinate_x'], params['coordinate_y'])
-        logging.debug("Fire: updated is {}.".format(updated))
-        #if not updated:
-        #    self.__send(self.__message_parser.encode('report', {'status': '39'}))
-        #    return
+            # save move
+            _, updated = game.fire(self.__player, params['coordinate_x'], params['coordinate_y'])
+            logging.debug("Fire: updated is {}.".format(updated))
+            #if not updated:
+            #    self.__send(self.__message_parser.encode('report', {'status': '39'}))
+            #    return
 
-        # successful attack
-        self.__send(self.__message_parser.encode('report', {'status': '22'}))
+            # successful attack
+            self.__send(self.__message_parser.encode('report', {'status': '22'}))
 
-        # check if game over
-        self.__lobby_model.get_game(self.__game).check_if_game_over(self.__player)
+            # check if game over
+            game.check_if_game_over(self.__player)
 
     def __nuke(self, params):
-        if not self.__expect_parameter(['coordinate_x', 'coordinate_y'], params):
-            return
-
-        # check if coordinates are valid
-        if not ((0 <= int(params['coordinate_x']) <= 13) and (0 <= int(params['coordinate_y']) <= 13)):
-            self.__send(self.__message_parser.encode('report', {'status': '32'}))
-            return
-
         # not in any game
         if self.__game is None:
             self.__send(self.__message_parser.encode('report', {'status': '43'}))
             return
 
-        # check if it's actually your turn
-        if self.__lobby_model.get_game(self.__game).get_turn() != self.__player:
-            self.__send(self.__message_parser.encode('report', {'status': '41'}))
-            return
+        game = self.__game
+        with game.get_lock():
+            # check if it's actually your turn
+            if game.get_turn() != self.__player:
+                self.__send(self.__message_parser.encode('report', {'status': '41'}))
+                return
 
-        # save move
-        updated = self.__lobby_model.get_game(self.__game).nuke(self.__player, params['coordinate_x'], params['coordinate_y'])
+            # save move
+            updated = game.nuke(self.__player, params['coordinate_x'], params['coordinate_y'])
 
-        # special attack failed
-        if updated is False:
-            self.__send(self.__message_parser.encode('report', {'status': '32'}))
-            return
+            # special attack failed
+            if updated is False:
+                self.__send(self.__message_parser.encode('report', {'status': '32'}))
+                return
 
-        logging.debug("Nuke: updated {} fields.".format(len(updated)))
-        #if len(updated) == 0:
-        #    self.__send(self.__message_parser.encode('report', {'status': '32'}))
-        #    return
+            logging.debug("Nuke: updated {} fields.".format(len(updated)))
+            #if len(updated) == 0:
+            #    self.__send(self.__message_parser.encode('report', {'status': '32'}))
+            #    return
 
-        # successful special attack
-        self.__send(self.__message_parser.encode('report', {'status': '24'}))
+            # successful special attack
+            self.__send(self.__message_parser.encode('report', {'status': '24'}))
 
-        # check if game over
-        self.__lobby_model.get_game(self.__game).check_if_game_over(self.__player)
+            # check if game over
+            game.check_if_game_over(self.__player)
 
     def __move(self, params):
-        if not self.__expect_parameter(['ship_id', 'direction'], params):
-            return
-
         # not in any game
         if self.__game is None:
             self.__send(self.__message_parser.encode('report', {'status': '43'}))
             return
 
-        # check if it's actually your turn
-        if self.__lobby_model.get_game(self.__game).get_turn() != self.__player:
-            self.__send(self.__message_parser.encode('report', {'status': '41'}))
-            return
+        game = self.__game
+        with game.get_lock():
+            # check if it's actually your turn
+            if game.get_turn() != self.__player:
+                self.__send(self.__message_parser.encode('report', {'status': '41'}))
+                return
 
-        # save move
-        result = self.__lobby_model.get_game(self.__game).move_ship(self.__player, int(params['ship_id']), params['direction'])
-        if result is False:
-            self.__send(self.__message_parser.encode('report', {'status': '31'}))
-            return
+            # save move
+            result = game.move_ship(self.__player, params['ship_id'], params['direction'])
+            if result is False:
+                self.__send(self.__message_parser.encode('report', {'status': '31'}))
+                return
 
-        # successful move
-        self.__send(self.__message_parser.encode('report', {'status': '21'}))
+            # successful move
+            self.__send(self.__message_parser.encode('report', {'status': '21'}))
 
     def __surrender(self):
         # not in any game
@@ -563,49 +532,106 @@ class ClientHandler:
             self.__send(self.__message_parser.encode('report', {'status': '43'}))
             return
 
-        # make sure the game is ongoing
-        if not self.__lobby_model.get_game(self.__game).is_ongoing():
-            self.__send(self.__message_parser.encode('report', {'status': '43'}))
-            return
+        game = self.__game
+        with game.get_lock():
+            # make sure the game is ongoing
+            if not game.is_ongoing():
+                self.__send(self.__message_parser.encode('report', {'status': '43'}))
+                return
 
-        # surrender
-        self.__lobby_model.get_game(self.__game).surrender(self.__player)
+            # surrender
+            game.surrender(self.__player)
 
-        # surrender accepted lol
-        self.__send(self.__message_parser.encode('report', {'status': '23'}))
+            # surrender accepted lol
+            self.__send(self.__message_parser.encode('report', {'status': '23'}))
 
     def __begin_turn(self):
         self.__send(self.__message_parser.encode('report', {'status': '11'}))
 
     def __chat(self, params):
-        if not self.__expect_parameter(['text'], params):
-            return
         self.__lobby_model.chat(self.__id, params['text'])
 
-    def __unknown_msg(self):
-        self.__send(self.__message_parser.encode('report', {'status': '40'}))
+    def __ack_lobby(self, params):
+        # the first ack switches the client to delta updates
+        self.__lobby_deltas = True
+
+        # a negative version asks for a fresh full snapshot
+        if params['version'] < 0:
+            self.__outbound.put_lobby(lambda pending: self.__build_lobby_update(pending, full=True))
+
+    def __build_lobby_update(self, pending, full=False):
+        # called with the outbound queue locked, see OutboundQueue.put_lobby
+
+        # A report that replaces a pending one has to apply to the version the
+        # client has, which is the base of the replaced report. Otherwise the
+        # client ends up with the last queued version, whether it acknowledged
+        # that already or not.
+        if full or not self.__lobby_deltas:
+            base = None
+        elif pending:
+            base = self.__lobby_base
+        else:
+            base = self.__lobby_version
 
-    def __expect_parameter(self, expected, actual):
-        keys = list(actual.keys())
-        for p in expected:
-            if p not in keys:
-                self.__unknown_msg()
-                return False
-        return True
+        # the report is encoded once per lobby version and base and shared by all clients
+        version, report = self.__lobby_model.get_lobby_update(base)
+        if report is None:
+            return None
+        if len(report) > 1 and not self.__large_frames:
+            logging.debug("Lobby report too large for client {} without large frames.".format(self.__id))
+            return None
 
-    def __recv(self, count):
-        try:
-            msg = self.__socket.recv(count)
-        except socket.error as e:
-            logging.debug("Client already dead: ".format(repr(e)))
-            return
-        logging.debug(b"Raw in: " + msg)
-        return msg
+        self.__lobby_base = base
+        self.__lobby_version = version
+        return report
+
+    def __enable_large_frames(self):
+        # no reply, the client reads chunked frames from the moment it asked for them
+        self.__large_frames = True
 
     def __send(self, msg):
-        try:
-            self.__socket.sendall(msg)
-        except socket.error as e:
-            logging.debug("Client already dead: ".format(repr(e)))
-            return
-        logging.debug(b"Raw out: " + msg)
+        self.__outbound.put(msg)
+
+    #
+    # Routes
+    #
+
+    @classmethod
+    def configure(cls, ruleset):
+        """
+        Set the rules of all games created from now on and build the routes,
+        the parameter ranges depend on the size of the board and the fleet.
+        """
+        cls.ruleset = ruleset
+        last = ruleset.fieldLength - 1
+
+        # board_init parameter names by ship id
+        cls.__ship_params = [('ship_{}_x'.format(i), 'ship_{}_y'.format(i), 'ship_{}_direction'.format(i))
+                             for i in range(ruleset.shipCount)]
+        ship_fields = {}
+        for x, y, direction in cls.__ship_params:
+            ship_fields[x] = Int(0, last, status='38')
+            ship_fields[y] = Int(0, last, status='38')
+            ship_fields[direction] = Choice('NSEW', status='38')
+
+        dispatcher = Dispatcher()
+        dispatcher.route(messages.CREATE_GAME, cls.__create_game, Schema({'name': Text(1, 64, status='37')}))
+        dispatcher.route(messages.JOIN_GAME, cls.__join_game, Schema({'name': Text()}))
+        dispatcher.route(messages.SET_NICK, cls.__set_nickname, Schema({'name': Text(0, 64, status='36')}))
+        dispatcher.route(messages.LEAVE_GAME, lambda self, params: self.__leave_game())
+        dispatcher.route(messages.INIT_BOARD, cls.__init_board, Schema(ship_fields))
+        dispatcher.route(messages.FIRE, cls.__fire, Schema({'coordinate_x': Int(0, last, status='39'),
+                                                            'coordinate_y': Int(0, last, status='39')}))
+        limit = ruleset.specialAttackLimit
+        dispatcher.route(messages.NUKE, cls.__nuke, Schema({'coordinate_x': Int(0, limit, status='32'),
+                                                            'coordinate_y': Int(0, limit, status='32')}))
+        dispatcher.route(messages.MOVE, cls.__move, Schema({'ship_id': Int(0, ruleset.shipCount - 1, status='31'),
+                                                            'direction': Choice('NSEW', status='31')}))
+        dispatcher.route(messages.SURRENDER, lambda self, params: self.__surrender())
+        dispatcher.route(messages.CHAT_SEND, cls.__chat, Schema({'text': Text()}))
+        dispatcher.route(messages.LOBBY_ACK, cls.__ack_lobby, Schema({'version': Int()}))
+        dispatcher.route(messages.LARGE_FRAMES, lambda self, params: self.__enable_large_frames())
+        cls.dispatcher = dispatcher
+
+
+ClientHandler.configure(CLASSIC)
@@ -0,0 +1,282 @@
+#
+# Multi-process server mode.
+#
+# N forked workers all listen on the same port (SO_REUSEPORT) and the kernel
+# spreads new connections over them. The lobby is federated through a
+# Federation object living in a multiprocessing manager: game names, players
+# and nicknames are visible to every worker, lobby events are forwarded to
+# the other workers' inboxes, and a player joining a game hosted by another
+# worker is handed over to that worker together with its socket, so both
+# players of a game always end up in the same process.
+#
+
+import os
+import json
+import array
+import socket
+import logging
+import tempfile
+import threading
+import multiprocessing
+from server import TCPServer, RequestHandler
+import lobby
+
+
+class Federation:
+    """
+    Lobby state shared by all workers.
+    """
+
+    def __init__(self, manager, workers, handoff_dir):
+        self.__lock = manager.Lock()
+        # game name -> [worker, host id, guest id]
+        self.__games = manager.dict()
+        # player id -> [worker, nickname]
+        self.__players = manager.dict()
+        self.__inboxes = [manager.Queue() for _ in range(workers)]
+        self.__handoff_dir = handoff_dir
+        # set in the worker process after the fork
+        self.worker = None
+        self.__adopted = {}
+        self.__adopted_lock = threading.Lock()
+
+    def handoff_path(self, worker):
+        return os.path.join(self.__handoff_dir, 'worker-{}.sock'.format(worker))
+
+    #
+    # Players
+    #
+
+    def add_player(self, id):
+        self.__players[id] = [self.worker, None]
+
+    def remove_player(self, id):
+        self.__players.pop(id, None)
+
+    def set_nickname(self, id, nick):
+        with self.__lock:
+            if id in self.__players:
+                self.__players[id] = [self.worker, nick]
+
+    def get_number_of_players(self):
+        return len(self.__players)
+
+    def get_players_info(self):
+        return [{'id': id, 'nickname': p[1]} for id, p in self.__players.items()]
+
+    #
+    # Games
+    #
+
+    def reserve_game(self, name, host):
+        """
+        Claim a game name for this worker. Return False if the name is taken anywhere.
+        """
+        with self.__lock:
+            if name in self.__games:
+                return False
+            self.__games[name] = [self.worker, host, None]
+            return True
+
+    def join_game(self, name, guest):
+        with self.__lock:
+            if name in self.__games:
+                g = self.__games[name]
+                self.__games[name] = [g[0], g[1], guest]
+
+    def release_game(self, name):
+        self.__games.pop(name, None)
+
+    def get_owner(self, name):
+        """
+        Return the worker hosting a game or None if the game does not exist.
+        """
+        g = self.__games.get(name)
+        return None if g is None else g[0]
+
+    def get_number_of_games(self):
+        games = self.__games.copy()
+        return len(games), sum(1 for g in games.values() if g[2] is None)
+
+    def get_games_info(self):
+        games = self.__games.copy()
+        players = self.__players.copy()
+
+        result = []
+        for name, g in games.items():
+            ids = [g[1]] if g[2] is None else [g[1], g[2]]
+            result.append({
+                'game_name': name,
+                'number_of_players': len(ids),
+                'ids': ids,
+                'nicknames': [players[id][1] if id in players else None for id in ids]
+            })
+        return result
+
+    #
+    # Events
+    #
+
+    def publish(self, event, params):
+        """
+        Forward a lobby event to every other worker.
+        """
+        for i, inbox in enumerate(self.__inboxes):
+            if i != self.worker:
+                inbox.put((event.name, params))
+
+    def serve_inbox(self):
+        model = lobby.LobbyModel()
+        inbox = self.__inboxes[self.worker]
+        while True:
+            try:
+                item = inbox.get()
+            except (EOFError, ConnectionError):
+                # the manager is gone, the pool is shutting down
+                return
+            if item is None:
+                return
+            event, params = item
+            model.dispatch_remote_event(lobby.LobbyEvent[event], params)
+
+    def close_inboxes(self):
+        """
+        Let the inbox threads of all workers return, before the manager goes.
+        """
+        for inbox in self.__inboxes:
+            inbox.put(None)
+
+    #
+    # Handoff
+    #
+
+    def hand_off(self, name, sock, state):
+        """
+        Pass a client socket to the worker hosting the given game.
+        Return False if there is no such worker (anymore).
+        """
+        owner = self.get_owner(name)
+        if owner is None or owner == self.worker:
+            return False
+
+        state = json.dumps(state).encode('UTF-8')
+        channel = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            fds = array.array('i', [sock.fileno()])
+            channel.sendmsg([state], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)], 0, self.handoff_path(owner))
+        except OSError as e:
+            logging.error("Handoff to worker {} failed: {}".format(owner, repr(e)))
+            return False
+        finally:
+            channel.close()
+        return True
+
+    def serve_handoffs(self, server):
+        channel = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        channel.bind(self.handoff_path(self.worker))
+        while True:
+            state, fds, _, _ = socket.recv_fds(channel, 1 << 20, 1)
+            if not fds:
+                continue
+            state = json.loads(state.decode('UTF-8'))
+            sock = socket.socket(fileno=fds[0])
+            logging.debug("Worker {} adopts player {}".format(self.worker, state['id']))
+            with self.__adopted_lock:
+                self.__adopted[state['id']] = state
+            server.process_request(sock, sock.getpeername())
+
+    def take_adopted(self, id):
+        with self.__adopted_lock:
+            return self.__adopted.pop(id, None)
+
+
+class WorkerTCPServer(TCPServer):
+    """
+    TCPServer that shares its port with the other workers and can let go of
+    sockets that were handed over to another worker.
+    """
+
+    def __init__(self, server_address, handler):
+        self.__detached = set()
+        super().__init__(server_address, handler)
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def detach(self, request):
+        self.__detached.add(request)
+
+    def shutdown_request(self, request):
+        if request in self.__detached:
+            # the peer lives on in another worker, do not shut the connection down
+            self.__detached.discard(request)
+            self.close_request(request)
+            return
+        super().shutdown_request(request)
+
+
+def serve_worker(worker, server_address, federation):
+    federation.worker = worker
+    lobby.federation = federation
+
+    server = WorkerTCPServer(server_address, RequestHandler)
+
+    for target in (federation.serve_inbox, lambda: federation.serve_handoffs(server)):
+        t = threading.Thread(target=target)
+        t.daemon = True
+        t.start()
+
+    logging.info("Worker {} (pid {}) listening on {}:{}".format(worker, os.getpid(), *server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class WorkerPool:
+    """
+    Forks the worker processes and owns the shared lobby state.
+    """
+
+    def __init__(self, server_address, workers):
+        self.__server_address = server_address
+        self.__workers = workers
+        self.__handoff_dir = tempfile.mkdtemp(prefix='battleship-')
+        self.__manager = multiprocessing.Manager()
+        self.__federation = Federation(self.__manager, workers, self.__handoff_dir)
+        self.__processes = []
+
+        # fork right away, before the parent opens any other sockets
+        ctx = multiprocessing.get_context('fork')
+        for i in range(self.__workers):
+            p = ctx.Process(target=serve_worker, args=(i, self.__server_address, self.__federation))
+            p.daemon = True
+            p.start()
+            self.__processes.append(p)
+
+    def serve_forever(self):
+        for p in self.__processes:
+            p.join()
+
+    def shutdown(self):
+        self.__federation.close_inboxes()
+        for p in self.__processes:
+            p.terminate()
+
+    def server_close(self):
+        for p in self.__processes:
+            p.join(1)
+        self.__manager.shutdown()
+        for i in range(self.__workers):
+            try:
+                os.unlink(self.__federation.handoff_path(i))
+            except OSError:
+                pass
+        try:
+            os.rmdir(self.__handoff_dir)
+        except OSError:
+            pass